@@ -73,6 +73,65 @@ INSERT INTO `estudiante` VALUES ('27225685','Samuel','Ochoa','04142415927','Las
 /*!40000 ALTER TABLE `estudiante` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `estudiante_resumen`
+--
+
+DROP TABLE IF EXISTS `estudiante_resumen`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `estudiante_resumen` (
+  `ci_estudiante` varchar(10) NOT NULL,
+  `materias` smallint(5) unsigned NOT NULL,
+  `uc` smallint(5) unsigned NOT NULL,
+  `materias_aprobadas` smallint(5) unsigned NOT NULL,
+  `uc_aprobadas` smallint(5) unsigned NOT NULL,
+  `suma_ponderada` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`ci_estudiante`),
+  CONSTRAINT `estudiante_resumen_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `estudiante_resumen`
+--
+
+LOCK TABLES `estudiante_resumen` WRITE;
+/*!40000 ALTER TABLE `estudiante_resumen` DISABLE KEYS */;
+INSERT INTO `estudiante_resumen` VALUES ('27225685',26,78,26,78,1457),('28371964',15,44,15,44,654);
+/*!40000 ALTER TABLE `estudiante_resumen` ENABLE KEYS */;
+UNLOCK TABLES;
+
+--
+-- Table structure for table `estudiante_resumen_periodo`
+--
+
+DROP TABLE IF EXISTS `estudiante_resumen_periodo`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `estudiante_resumen_periodo` (
+  `ci_estudiante` varchar(10) NOT NULL,
+  `periodo` varchar(7) NOT NULL,
+  `materias` smallint(5) unsigned NOT NULL,
+  `uc` smallint(5) unsigned NOT NULL,
+  `materias_aprobadas` smallint(5) unsigned NOT NULL,
+  `uc_aprobadas` smallint(5) unsigned NOT NULL,
+  `suma_ponderada` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`ci_estudiante`,`periodo`),
+  CONSTRAINT `estudiante_resumen_periodo_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `estudiante_resumen_periodo`
+--
+
+LOCK TABLES `estudiante_resumen_periodo` WRITE;
+/*!40000 ALTER TABLE `estudiante_resumen_periodo` DISABLE KEYS */;
+INSERT INTO `estudiante_resumen_periodo` VALUES ('27225685','2018-01',8,21,8,21,394),('27225685','2018-02',7,21,7,21,391),('27225685','2018-IN',2,7,2,7,128),('27225685','2019-01',9,29,9,29,544),('28371964','2019-01',8,23,8,23,347),('28371964','2019-02',7,21,7,21,307);
+/*!40000 ALTER TABLE `estudiante_resumen_periodo` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `materia`
 --
@@ -108,7 +167,7 @@ DROP TABLE IF EXISTS `materia_carrera`;
 CREATE TABLE `materia_carrera` (
   `id_materia` varchar(10) NOT NULL,
   `id_carrera` varchar(10) NOT NULL,
-  KEY `id_carrera` (`id_carrera`),
+  PRIMARY KEY (`id_carrera`,`id_materia`),
   KEY `materia_carrera_ibfk_1` (`id_materia`),
   CONSTRAINT `materia_carrera_ibfk_1` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE,
   CONSTRAINT `materia_carrera_ibfk_2` FOREIGN KEY (`id_carrera`) REFERENCES `carrera` (`id`) ON UPDATE CASCADE
@@ -137,8 +196,10 @@ CREATE TABLE `record` (
   `id_materia` varchar(10) NOT NULL,
   `nota` tinyint(2) unsigned NOT NULL,
   `periodo` varchar(7) NOT NULL,
+  `periodo_num` smallint(5) unsigned GENERATED ALWAYS AS (CAST(SUBSTRING(`periodo`, 1, 4) AS UNSIGNED) * 3 + CASE UPPER(SUBSTRING(`periodo`, 6, 2)) WHEN '01' THEN 0 WHEN 'IN' THEN 1 ELSE 2 END) VIRTUAL,
   PRIMARY KEY (`ci_estudiante`,`id_materia`),
-  KEY `id_materia` (`id_materia`),
+  KEY `materia_periodo` (`id_materia`,`periodo`),
+  KEY `ci_periodo_num` (`ci_estudiante`,`periodo_num`),
   CONSTRAINT `record_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE,
   CONSTRAINT `record_ibfk_2` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
@@ -150,10 +211,35 @@ CREATE TABLE `record` (
 
 LOCK TABLES `record` WRITE;
 /*!40000 ALTER TABLE `record` DISABLE KEYS */;
-INSERT INTO `record` VALUES ('27225685','ADC403',18,'2019-01'),('27225685','ALG203',20,'2018-IN'),('27225685','BDD304',19,'2019-01'),('27225685','CAL114',18,'2018-01'),('27225685','CAL224',17,'2018-IN'),('27225685','CAL334',18,'2018-02'),('27225685','CAL444',20,'2019-01'),('27225685','CIE102',19,'2018-01'),('27225685','DPT102',16,'2018-01'),('27225685','EDD203',17,'2018-02'),('27225685','EYP503',17,'2019-01'),('27225685','FIS214',20,'2018-02'),('27225685','FIS324',19,'2019-01'),('27225685','INF102',19,'2018-01'),('27225685','ING113',20,'2018-01'),('27225685','ING223',20,'2018-02'),('27225685','ING333',20,'2019-01'),('27225685','LAF312',15,'2019-01'),('27225685','LEN113',20,'2018-01'),('27225685','LEN223',18,'2018-02'),('27225685','LOG103',18,'2018-01'),('27225685','MAT302',20,'2018-02'),('27225685','OAE202',17,'2018-02'),('27225685','PRO413',19,'2019-01'),('27225685','TEC303',20,'2019-01'),('27225685','TID102',20,'2018-01'),('28371964','COM170',14,'2019-01'),('28371964','CTU160',15,'2019-01'),('28371964','CTU260',15,'2019-02'),('28371964','DPT180',14,'2019-01'),('28371964','EST240',14,'2019-02'),('28371964','HYM140',16,'2019-01'),('28371964','IHT150',14,'2019-01'),('28371964','INF130',12,'2019-01'),('28371964','INF230',12,'2019-02'),('28371964','ING120',18,'2019-01'),('28371964','ING220',16,'2019-02'),('28371964','LYC110',20,'2019-01'),('28371964','LYC210',18,'2019-02'),('28371964','REP270',14,'2019-02'),('28371964','TPT250',14,'2019-02');
+INSERT INTO `record` (`ci_estudiante`, `id_materia`, `nota`, `periodo`) VALUES ('27225685','ADC403',18,'2019-01'),('27225685','ALG203',20,'2018-IN'),('27225685','BDD304',19,'2019-01'),('27225685','CAL114',18,'2018-01'),('27225685','CAL224',17,'2018-IN'),('27225685','CAL334',18,'2018-02'),('27225685','CAL444',20,'2019-01'),('27225685','CIE102',19,'2018-01'),('27225685','DPT102',16,'2018-01'),('27225685','EDD203',17,'2018-02'),('27225685','EYP503',17,'2019-01'),('27225685','FIS214',20,'2018-02'),('27225685','FIS324',19,'2019-01'),('27225685','INF102',19,'2018-01'),('27225685','ING113',20,'2018-01'),('27225685','ING223',20,'2018-02'),('27225685','ING333',20,'2019-01'),('27225685','LAF312',15,'2019-01'),('27225685','LEN113',20,'2018-01'),('27225685','LEN223',18,'2018-02'),('27225685','LOG103',18,'2018-01'),('27225685','MAT302',20,'2018-02'),('27225685','OAE202',17,'2018-02'),('27225685','PRO413',19,'2019-01'),('27225685','TEC303',20,'2019-01'),('27225685','TID102',20,'2018-01'),('28371964','COM170',14,'2019-01'),('28371964','CTU160',15,'2019-01'),('28371964','CTU260',15,'2019-02'),('28371964','DPT180',14,'2019-01'),('28371964','EST240',14,'2019-02'),('28371964','HYM140',16,'2019-01'),('28371964','IHT150',14,'2019-01'),('28371964','INF130',12,'2019-01'),('28371964','INF230',12,'2019-02'),('28371964','ING120',18,'2019-01'),('28371964','ING220',16,'2019-02'),('28371964','LYC110',20,'2019-01'),('28371964','LYC210',18,'2019-02'),('28371964','REP270',14,'2019-02'),('28371964','TPT250',14,'2019-02');
 /*!40000 ALTER TABLE `record` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `schema_version`
+--
+
+DROP TABLE IF EXISTS `schema_version`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `schema_version` (
+  `version` int(10) unsigned NOT NULL,
+  `descripcion` varchar(100) NOT NULL,
+  `fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `schema_version`
+--
+
+LOCK TABLES `schema_version` WRITE;
+/*!40000 ALTER TABLE `schema_version` DISABLE KEYS */;
+INSERT INTO `schema_version` VALUES (1,'Tablas de resumen académico','2026-10-18 00:00:00'),(2,'Clave primaria de materia_carrera','2026-10-18 00:00:00'),(3,'Índice de record por materia y período','2026-10-18 00:00:00'),(4,'Código entero del período en record','2026-10-18 00:00:00');
+/*!40000 ALTER TABLE `schema_version` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `usuario`
 --
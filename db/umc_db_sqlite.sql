@@ -0,0 +1,137 @@
+-- Estructura de la base de datos UMC para el motor SQLite.
+--
+-- Equivale a umc_db_structure.sql. Las columnas de texto usan la
+-- intercalación NOCASE para reproducir la comparación sin distinción
+-- de mayúsculas de la intercalación utf8_general_ci de MySQL.
+
+PRAGMA foreign_keys = ON;
+
+--
+-- Table structure for table `carrera`
+--
+
+CREATE TABLE `carrera` (
+  `id` varchar(10) COLLATE NOCASE NOT NULL,
+  `nombre` varchar(50) COLLATE NOCASE NOT NULL,
+  `mencion` varchar(50) COLLATE NOCASE DEFAULT NULL,
+  PRIMARY KEY (`id`)
+);
+
+--
+-- Table structure for table `usuario`
+--
+
+CREATE TABLE `usuario` (
+  `id` varchar(10) COLLATE NOCASE NOT NULL,
+  `password` varchar(20) COLLATE NOCASE NOT NULL,
+  `admin` tinyint(1) NOT NULL,
+  `email` varchar(50) COLLATE NOCASE NOT NULL,
+  PRIMARY KEY (`id`)
+);
+
+--
+-- Table structure for table `estudiante`
+--
+
+CREATE TABLE `estudiante` (
+  `ci` varchar(10) COLLATE NOCASE NOT NULL,
+  `nombre` varchar(50) COLLATE NOCASE NOT NULL,
+  `apellido` varchar(50) COLLATE NOCASE NOT NULL,
+  `telefono` varchar(11) COLLATE NOCASE DEFAULT NULL,
+  `direccion` varchar(200) COLLATE NOCASE DEFAULT NULL,
+  `id_usuario` varchar(10) COLLATE NOCASE NOT NULL,
+  `id_carrera` varchar(10) COLLATE NOCASE NOT NULL,
+  PRIMARY KEY (`ci`),
+  CONSTRAINT `estudiante_ibfk_1` FOREIGN KEY (`id_usuario`) REFERENCES `usuario` (`id`) ON UPDATE CASCADE,
+  CONSTRAINT `estudiante_ibfk_2` FOREIGN KEY (`id_carrera`) REFERENCES `carrera` (`id`) ON UPDATE CASCADE
+);
+CREATE INDEX `estudiante_id_usuario` ON `estudiante` (`id_usuario`);
+CREATE INDEX `estudiante_id_carrera` ON `estudiante` (`id_carrera`);
+
+--
+-- Table structure for table `estudiante_resumen`
+--
+
+CREATE TABLE `estudiante_resumen` (
+  `ci_estudiante` varchar(10) COLLATE NOCASE NOT NULL,
+  `materias` smallint(5) NOT NULL,
+  `uc` smallint(5) NOT NULL,
+  `materias_aprobadas` smallint(5) NOT NULL,
+  `uc_aprobadas` smallint(5) NOT NULL,
+  `suma_ponderada` int(10) NOT NULL,
+  PRIMARY KEY (`ci_estudiante`),
+  CONSTRAINT `estudiante_resumen_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+);
+
+--
+-- Table structure for table `estudiante_resumen_periodo`
+--
+
+CREATE TABLE `estudiante_resumen_periodo` (
+  `ci_estudiante` varchar(10) COLLATE NOCASE NOT NULL,
+  `periodo` varchar(7) COLLATE NOCASE NOT NULL,
+  `materias` smallint(5) NOT NULL,
+  `uc` smallint(5) NOT NULL,
+  `materias_aprobadas` smallint(5) NOT NULL,
+  `uc_aprobadas` smallint(5) NOT NULL,
+  `suma_ponderada` int(10) NOT NULL,
+  PRIMARY KEY (`ci_estudiante`,`periodo`),
+  CONSTRAINT `estudiante_resumen_periodo_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+);
+
+--
+-- Table structure for table `materia`
+--
+
+CREATE TABLE `materia` (
+  `id` varchar(10) COLLATE NOCASE NOT NULL,
+  `nombre` varchar(150) COLLATE NOCASE NOT NULL,
+  `uc` tinyint(2) NOT NULL CHECK (`uc` >= 0),
+  PRIMARY KEY (`id`)
+);
+
+--
+-- Table structure for table `materia_carrera`
+--
+
+CREATE TABLE `materia_carrera` (
+  `id_materia` varchar(10) COLLATE NOCASE NOT NULL,
+  `id_carrera` varchar(10) COLLATE NOCASE NOT NULL,
+  PRIMARY KEY (`id_carrera`,`id_materia`),
+  CONSTRAINT `materia_carrera_ibfk_1` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE,
+  CONSTRAINT `materia_carrera_ibfk_2` FOREIGN KEY (`id_carrera`) REFERENCES `carrera` (`id`) ON UPDATE CASCADE
+);
+CREATE INDEX `materia_carrera_ibfk_1` ON `materia_carrera` (`id_materia`);
+
+--
+-- Table structure for table `record`
+--
+
+CREATE TABLE `record` (
+  `ci_estudiante` varchar(10) COLLATE NOCASE NOT NULL,
+  `id_materia` varchar(10) COLLATE NOCASE NOT NULL,
+  `nota` tinyint(2) NOT NULL CHECK (`nota` >= 0),
+  `periodo` varchar(7) COLLATE NOCASE NOT NULL,
+  `periodo_num` smallint GENERATED ALWAYS AS (CAST(SUBSTR(`periodo`, 1, 4) AS INTEGER) * 3 + CASE UPPER(SUBSTR(`periodo`, 6, 2)) WHEN '01' THEN 0 WHEN 'IN' THEN 1 ELSE 2 END) VIRTUAL,
+  PRIMARY KEY (`ci_estudiante`,`id_materia`),
+  CONSTRAINT `record_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE,
+  CONSTRAINT `record_ibfk_2` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE
+);
+CREATE INDEX `record_materia_periodo` ON `record` (`id_materia`, `periodo`);
+CREATE INDEX `record_ci_periodo_num` ON `record` (`ci_estudiante`, `periodo_num`);
+
+--
+-- Table structure for table `schema_version`
+--
+
+CREATE TABLE `schema_version` (
+  `version` int(10) NOT NULL,
+  `descripcion` varchar(100) NOT NULL,
+  `fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`)
+);
+INSERT INTO `schema_version` (`version`, `descripcion`) VALUES
+  (1, 'Tablas de resumen académico'),
+  (2, 'Clave primaria de materia_carrera'),
+  (3, 'Índice de record por materia y período'),
+  (4, 'Código entero del período en record');
@@ -53,6 +53,45 @@ CREATE TABLE `estudiante` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `estudiante_resumen`
+--
+
+DROP TABLE IF EXISTS `estudiante_resumen`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `estudiante_resumen` (
+  `ci_estudiante` varchar(10) NOT NULL,
+  `materias` smallint(5) unsigned NOT NULL,
+  `uc` smallint(5) unsigned NOT NULL,
+  `materias_aprobadas` smallint(5) unsigned NOT NULL,
+  `uc_aprobadas` smallint(5) unsigned NOT NULL,
+  `suma_ponderada` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`ci_estudiante`),
+  CONSTRAINT `estudiante_resumen_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `estudiante_resumen_periodo`
+--
+
+DROP TABLE IF EXISTS `estudiante_resumen_periodo`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `estudiante_resumen_periodo` (
+  `ci_estudiante` varchar(10) NOT NULL,
+  `periodo` varchar(7) NOT NULL,
+  `materias` smallint(5) unsigned NOT NULL,
+  `uc` smallint(5) unsigned NOT NULL,
+  `materias_aprobadas` smallint(5) unsigned NOT NULL,
+  `uc_aprobadas` smallint(5) unsigned NOT NULL,
+  `suma_ponderada` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`ci_estudiante`,`periodo`),
+  CONSTRAINT `estudiante_resumen_periodo_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `materia`
 --
@@ -78,7 +117,7 @@ DROP TABLE IF EXISTS `materia_carrera`;
 CREATE TABLE `materia_carrera` (
   `id_materia` varchar(10) NOT NULL,
   `id_carrera` varchar(10) NOT NULL,
-  KEY `id_carrera` (`id_carrera`),
+  PRIMARY KEY (`id_carrera`,`id_materia`),
   KEY `materia_carrera_ibfk_1` (`id_materia`),
   CONSTRAINT `materia_carrera_ibfk_1` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE,
   CONSTRAINT `materia_carrera_ibfk_2` FOREIGN KEY (`id_carrera`) REFERENCES `carrera` (`id`) ON UPDATE CASCADE
@@ -97,13 +136,40 @@ CREATE TABLE `record` (
   `id_materia` varchar(10) NOT NULL,
   `nota` tinyint(2) unsigned NOT NULL,
   `periodo` varchar(7) NOT NULL,
+  `periodo_num` smallint(5) unsigned GENERATED ALWAYS AS (CAST(SUBSTRING(`periodo`, 1, 4) AS UNSIGNED) * 3 + CASE UPPER(SUBSTRING(`periodo`, 6, 2)) WHEN '01' THEN 0 WHEN 'IN' THEN 1 ELSE 2 END) VIRTUAL,
   PRIMARY KEY (`ci_estudiante`,`id_materia`),
-  KEY `id_materia` (`id_materia`),
+  KEY `materia_periodo` (`id_materia`,`periodo`),
+  KEY `ci_periodo_num` (`ci_estudiante`,`periodo_num`),
   CONSTRAINT `record_ibfk_1` FOREIGN KEY (`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE,
   CONSTRAINT `record_ibfk_2` FOREIGN KEY (`id_materia`) REFERENCES `materia` (`id`) ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `schema_version`
+--
+
+DROP TABLE IF EXISTS `schema_version`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8 */;
+CREATE TABLE `schema_version` (
+  `version` int(10) unsigned NOT NULL,
+  `descripcion` varchar(100) NOT NULL,
+  `fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `schema_version`
+--
+
+LOCK TABLES `schema_version` WRITE;
+/*!40000 ALTER TABLE `schema_version` DISABLE KEYS */;
+INSERT INTO `schema_version` VALUES (1,'Tablas de resumen académico','2026-10-18 00:00:00'),(2,'Clave primaria de materia_carrera','2026-10-18 00:00:00'),(3,'Índice de record por materia y período','2026-10-18 00:00:00'),(4,'Código entero del período en record','2026-10-18 00:00:00');
+/*!40000 ALTER TABLE `schema_version` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `usuario`
 --
@@ -0,0 +1,52 @@
+# coding=utf-8
+"""Base de datos SQLite temporal para las pruebas."""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from umc_crud import db
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SQLiteTestCase(unittest.TestCase):
+    """Caso de prueba con una base de datos SQLite temporal.
+
+    La base de datos se crea en un directorio temporal, con la
+    estructura de db/umc_db_sqlite.sql y los datos del directorio csv.
+    Los parámetros de CONFIG se agregan al archivo de configuración.
+    """
+
+    CONFIG = ''
+
+    @classmethod
+    def setUpClass(cls):
+        """Prepara el directorio temporal y la configuración."""
+        cls._cwd = os.getcwd()
+        cls._dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(cls._dir, 'db'))
+        os.mkdir(os.path.join(cls._dir, 'config'))
+        shutil.copy(os.path.join(ROOT, 'db', 'umc_db_sqlite.sql'),
+                    os.path.join(cls._dir, 'db'))
+        shutil.copytree(os.path.join(ROOT, 'csv'),
+                        os.path.join(cls._dir, 'csv'))
+        config_file = os.path.join(cls._dir, 'config', 'config.ini')
+        with open(config_file, 'w') as f:
+            f.write('[db]\ndriver = sqlite\n[stats]\nenabled = no\n')
+            f.write(cls.CONFIG)
+        # La caché de la configuración depende de la fecha del archivo,
+        # que puede coincidir con la del caso de prueba anterior
+        now = time.time_ns()
+        os.utime(config_file, ns=(now, now))
+        os.chdir(cls._dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Cierra las conexiones y elimina el directorio temporal."""
+        db.close_pool()
+        os.chdir(cls._cwd)
+        shutil.rmtree(cls._dir)
@@ -0,0 +1,121 @@
+# coding=utf-8
+"""Pruebas de las operaciones en lote sobre record."""
+
+
+import unittest
+from umc_crud import crud, db
+from .sqlite import SQLiteTestCase
+
+
+def new_records(n=3):
+    """Obtiene calificaciones nuevas de todos los estudiantes."""
+    record = []
+    for e in db.execute_sql('SELECT ci FROM estudiante ORDER BY ci DESC'):
+        por_cursar = crud.find_subjects_not_taken_by_student(e['ci'])
+        materias = sorted(m['id_materia'] for m in por_cursar)[:n]
+        for i, materia_id in enumerate(materias):
+            record.append({'ci_estudiante': e['ci'], 'id_materia': materia_id,
+                           'nota': 10 + i, 'periodo': '2021-01'})
+    return record
+
+
+def record_key(r):
+    """Obtiene la clave primaria de un registro."""
+    return r['ci_estudiante'], r['id_materia']
+
+
+def stored(record):
+    """Consulta las filas de record con las claves de los registros."""
+    keys = [record_key(r) for r in record]
+    rows = db.execute_sql(crud.select_records_by_key_query(len(keys)),
+                          [value for key in keys for value in key])
+    return sorted(rows, key=record_key)
+
+
+class BulkTest(SQLiteTestCase):
+    """Pruebas de las operaciones en lote, con lotes de dos filas."""
+
+    CONFIG = '[bulk]\nchunk_rows = 2\n'
+
+    def setUp(self):
+        """Obtiene calificaciones que no existen en la base de datos."""
+        self.record = new_records()
+
+    def tearDown(self):
+        """Elimina las calificaciones creadas por la prueba."""
+        crud.delete_records(self.record)
+
+    def test_create_records(self):
+        """Las calificaciones se insertan en lotes ordenados por clave."""
+        resultados = crud.create_records(self.record)
+        self.assertEqual(len(resultados), (len(self.record) + 1) // 2)
+        self.assertEqual(sum(r['inserted'] for r in resultados),
+                         len(self.record))
+        claves = sorted(record_key(r) for r in self.record)
+        self.assertEqual(resultados[0]['first'], claves[0])
+        self.assertEqual(resultados[-1]['last'], claves[-1])
+        self.assertEqual(stored(self.record),
+                         sorted(self.record, key=record_key))
+
+    def test_create_records_atomic(self):
+        """Si un lote falla, no se inserta ninguno."""
+        repetido = dict(self.record[0], nota=20)
+        with self.assertRaises(Exception):
+            crud.create_records(self.record + [repetido])
+        self.assertEqual(stored(self.record), [])
+
+    def test_update_records(self):
+        """Solo se cuentan las calificaciones que realmente cambian."""
+        crud.create_records(self.record)
+        cambios = [dict(r, nota=r['nota'] + 5) for r in self.record[::2]]
+        cambios += [dict(r, periodo='2021-02') for r in self.record[1::2]]
+        # Si un registro se repite, se aplica el último; este vuelve a
+        # sus datos originales, por lo que no se cuenta
+        cambios.append(dict(self.record[1]))
+        cambios.append(dict(self.record[0], nota=20))
+        cambios.append(dict(self.record[0], nota=19))
+        self.assertEqual(crud.update_records(cambios), len(self.record) - 1)
+        esperado = {record_key(r): r for r in cambios}
+        for r in stored(self.record):
+            self.assertEqual(r, esperado[record_key(r)])
+        self.assertEqual(crud.update_records(cambios), 0)
+
+    def test_update_missing_records(self):
+        """Las calificaciones que no existen no se crean."""
+        self.assertEqual(crud.update_records(self.record), 0)
+        self.assertEqual(stored(self.record), [])
+
+    def test_delete_records(self):
+        """Se eliminan solo los registros dados y se devuelven completos."""
+        crud.create_records(self.record)
+        borrar = self.record[1:]
+        # Una clave repetida o inexistente no afecta el resultado
+        claves = [{'ci_estudiante': r['ci_estudiante'],
+                   'id_materia': r['id_materia']} for r in borrar]
+        claves.append(claves[0])
+        claves.append({'ci_estudiante': borrar[0]['ci_estudiante'],
+                       'id_materia': 'XXX000'})
+        eliminados = crud.delete_records(claves)
+        self.assertEqual(sorted(eliminados, key=record_key),
+                         sorted(borrar, key=record_key))
+        self.assertEqual(stored(self.record), self.record[:1])
+
+    def test_delete_records_where(self):
+        """Se eliminan los registros que cumplen todas las condiciones."""
+        crud.create_records(self.record)
+        materia_id = self.record[0]['id_materia']
+        esperado = crud.find_records(materia_id=materia_id,
+                                     periodo='2021-01')
+        self.assertTrue(esperado)
+        eliminados = crud.delete_records_where(materia_id=materia_id,
+                                               periodo='2021-01')
+        self.assertEqual(sorted(eliminados, key=lambda r: r['ci_estudiante']),
+                         esperado)
+        self.assertEqual(crud.find_records(materia_id=materia_id,
+                                           periodo='2021-01'), [])
+        with self.assertRaises(ValueError):
+            crud.delete_records_where()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Pruebas de la caché del catálogo con el motor SQLite."""
+
+
+import unittest
+from umc_crud import catalog, db
+from .sqlite import SQLiteTestCase
+
+
+class CatalogTest(SQLiteTestCase):
+    """Pruebas del módulo catalog."""
+
+    def setUp(self):
+        """Empieza cada prueba sin catálogo en caché."""
+        catalog.invalidate()
+
+    def tearDown(self):
+        """Descarta el catálogo de la prueba."""
+        catalog.invalidate()
+
+    def _subject(self):
+        """Obtiene una materia de la base de datos."""
+        return db.execute_sql('SELECT * FROM materia ORDER BY id', rows=1)
+
+    def test_key_normalization(self):
+        """Los códigos se buscan sin distinguir mayúsculas ni espacios."""
+        materia = self._subject()
+        cache = catalog.get_catalog()
+        self.assertEqual(cache.find_subject(materia['id'].lower() + '  '),
+                         materia)
+        self.assertIsNone(cache.find_subject('XXX000'))
+        encontradas = cache.find_subjects([materia['id'].lower(), 'XXX000',
+                                           materia['id']])
+        self.assertEqual(encontradas, [materia])
+
+    def test_career_subjects(self):
+        """Solo se devuelven las materias de la carrera dada."""
+        mc = db.execute_sql('SELECT * FROM materia_carrera', rows=1)
+        cache = catalog.get_catalog()
+        encontradas = cache.find_career_subjects(
+            mc['id_carrera'].lower(), [mc['id_materia'].lower(), 'XXX000'])
+        self.assertEqual(encontradas, [{'id_materia': mc['id_materia']}])
+        self.assertEqual(cache.find_career_subjects('XXX', ['XXX000']), [])
+
+    def test_cached_until_invalidated(self):
+        """Los cambios en la base de datos se ven tras invalidate()."""
+        materia = self._subject()
+        cache = catalog.get_catalog()
+        self.assertIs(catalog.get_catalog(), cache)
+        db.execute_sql('UPDATE materia SET nombre = %s WHERE id = %s',
+                       ['Otra', materia['id']])
+        try:
+            self.assertEqual(
+                catalog.get_catalog().find_subject(materia['id']), materia)
+            catalog.invalidate()
+            self.assertEqual(
+                catalog.get_catalog().find_subject(materia['id'])['nombre'],
+                'Otra')
+        finally:
+            db.execute_sql('UPDATE materia SET nombre = %s WHERE id = %s',
+                           [materia['nombre'], materia['id']])
+
+    def test_ttl(self):
+        """El catálogo expira cuando pasan ttl segundos."""
+        cache = catalog.get_catalog()
+        cache.loaded_at -= 3600
+        self.assertIsNot(catalog.get_catalog(), cache)
+
+    def test_copies(self):
+        """Modificar un resultado no altera el catálogo."""
+        materia = self._subject()
+        catalog.get_catalog().find_subject(materia['id'])['nombre'] = 'Otra'
+        self.assertEqual(catalog.get_catalog().find_subject(materia['id']),
+                         materia)
+
+
+if __name__ == '__main__':
+    unittest.main()
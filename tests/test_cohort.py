@@ -0,0 +1,109 @@
+# coding=utf-8
+"""Pruebas del cálculo de índices académicos de grupos."""
+
+
+import random
+import unittest
+from umc_crud import crud, db, student
+from .sqlite import SQLiteTestCase
+
+try:
+    from umc_crud import cohort
+except ImportError:
+    # NumPy es una dependencia opcional
+    cohort = None
+
+
+def random_record(n, seed=0):
+    """Genera n calificaciones al azar de cinco estudiantes."""
+    rng = random.Random(seed)
+    periodos = [f'{year}-{term}' for year in (2018, 2019, 2020)
+                for term in ('01', 'IN', '02')]
+    return [{'ci_estudiante': str(rng.randrange(5)),
+             'periodo': rng.choice(periodos),
+             'uc': rng.randint(1, 5),
+             'nota': rng.randint(0, 20)} for _ in range(n)]
+
+
+def columns(record):
+    """Convierte calificaciones en las columnas de cohort.compute()."""
+    return ([r['ci_estudiante'] for r in record],
+            [r['periodo'] for r in record],
+            [r['uc'] for r in record],
+            [r['nota'] for r in record])
+
+
+@unittest.skipIf(cohort is None, 'Requiere NumPy.')
+class CohortTest(unittest.TestCase):
+    """Pruebas del módulo cohort."""
+
+    def test_round_index(self):
+        """Los índices coinciden con crud.academic_index()."""
+        pares = [(s, u) for u in range(1, 201) for s in range(0, 20*u + 1)]
+        # Incluye cocientes a mitad entre dos centésimas, como 1/8
+        self.assertIn((1, 8), pares)
+        indices = cohort.round_index([s for s, _ in pares],
+                                     [u for _, u in pares])
+        for (s, u), indice in zip(pares, indices.tolist()):
+            self.assertEqual(indice, crud.academic_index(s, u), (s, u))
+        self.assertTrue(cohort.np.isnan(cohort.round_index([0], [0])[0]))
+
+    def test_matches_timeline(self):
+        """Los índices equivalen a los de student.academic_timeline()."""
+        record = random_record(500)
+        indices = cohort.compute(*columns(record))
+        for ci in sorted({r['ci_estudiante'] for r in record}):
+            propio = [r for r in record if r['ci_estudiante'] == ci]
+            timeline = student.academic_timeline(propio)
+            resultado = indices.student(ci)
+            self.assertEqual(resultado['iaa'],
+                             student.record_summary(propio)['iaa'])
+            self.assertEqual(resultado['iap'],
+                             {t['periodo']: t['iap'] for t in timeline})
+            iaa_periodo = {p: i for p, i
+                           in resultado['iaa_periodo'].items()
+                           if p in resultado['iap']}
+            self.assertEqual(iaa_periodo,
+                             {t['periodo']: t['iaa'] for t in timeline})
+        self.assertIsNone(indices.student('X'))
+
+    def test_select(self):
+        """Se eligen los estudiantes en el rango, de mayor a menor."""
+        record = random_record(200, seed=1)
+        indices = cohort.compute(*columns(record))
+        iaa = {ci: indices.student(ci)['iaa']
+               for ci in indices.estudiantes.tolist()}
+        elegidos = indices.select(minimo=8, maximo=12)
+        esperado = sorted(((ci, i) for ci, i in iaa.items()
+                           if i is not None and 8 <= i <= 12),
+                          key=lambda e: (-e[1], e[0]))
+        self.assertEqual(elegidos, esperado)
+        periodo = indices.periodos[0]
+        for ci, indice in indices.select(periodo=periodo):
+            self.assertEqual(indices.student(ci)['iaa_periodo'][periodo],
+                             indice)
+
+    def test_empty(self):
+        """Un grupo sin calificaciones no tiene índices."""
+        indices = cohort.compute([], [], [], [])
+        self.assertEqual(indices.periodos, [])
+        self.assertEqual(indices.select(), [])
+
+
+@unittest.skipIf(cohort is None, 'Requiere NumPy.')
+class CareerIndicesTest(SQLiteTestCase):
+    """Pruebas de los índices de las carreras de la base de datos."""
+
+    def test_matches_summaries(self):
+        """Los índices equivalen a los de crud.academic_summaries()."""
+        estudiantes = db.execute_sql('SELECT ci, id_carrera FROM estudiante')
+        resumenes = crud.academic_summaries([e['ci'] for e in estudiantes])
+        for e in estudiantes:
+            resultado = cohort.career_indices(e['id_carrera']).student(
+                e['ci'])
+            self.assertEqual(resultado['iaa'], resumenes[e['ci']]['iaa'])
+            self.assertEqual(resultado['iap'], resumenes[e['ci']]['iap'])
+
+
+if __name__ == '__main__':
+    unittest.main()
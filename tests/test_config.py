@@ -0,0 +1,74 @@
+# coding=utf-8
+"""Pruebas de la lectura del archivo de configuración."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from umc_crud import config
+
+
+class ReadConfigTest(unittest.TestCase):
+    """Pruebas de config.read_config() y config.Settings."""
+
+    def setUp(self):
+        """Crea un directorio temporal con el archivo de configuración."""
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._dir, 'config'))
+        os.chdir(self._dir)
+        self.write('[db]\ndriver = sqlite\n[pool]\nsize = 2\n', 1)
+
+    def tearDown(self):
+        """Elimina el directorio temporal."""
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir)
+
+    def write(self, text, mtime):
+        """Escribe el archivo con la fecha de modificación dada."""
+        with open(config.CONFIG_FILE, 'w') as f:
+            f.write(text)
+        os.utime(config.CONFIG_FILE, ns=(mtime, mtime))
+
+    def test_cached_until_modified(self):
+        """El archivo se vuelve a leer solo cuando cambia su fecha."""
+        settings = config.read_config()
+        self.assertIs(config.read_config(), settings)
+        # Un cambio con la misma fecha no se detecta
+        self.write('[db]\ndriver = mysql\n', 1)
+        self.assertIs(config.read_config(), settings)
+        self.write('[db]\ndriver = mysql\n', 2)
+        nueva = config.read_config()
+        self.assertIsNot(nueva, settings)
+        self.assertEqual(nueva.get('db', 'driver'), 'mysql')
+
+    def test_defaults(self):
+        """Los parámetros ausentes toman los valores predeterminados."""
+        settings = config.read_config()
+        self.assertEqual(settings.get('db', 'driver'), 'sqlite')
+        self.assertEqual(settings.getint('pool', 'size'), 2)
+        self.assertEqual(settings.getfloat('pool', 'idle_timeout'), 300)
+        self.assertFalse(settings.getboolean('stats', 'enabled'))
+        self.assertIsNone(settings.get('mysql', 'host'))
+        self.assertEqual(settings.getint('otra', 'opcion', 7), 7)
+
+    def test_missing_file(self):
+        """Sin archivo se usan solo los valores predeterminados."""
+        os.remove(config.CONFIG_FILE)
+        settings = config.read_config()
+        self.assertIsNone(settings.mtime)
+        self.assertEqual(settings.get('db', 'driver'), 'mysql')
+        self.assertFalse(config.is_configured())
+
+    def test_read_only(self):
+        """La configuración no se puede modificar."""
+        settings = config.read_config()
+        with self.assertRaises(AttributeError):
+            settings.mtime = None
+        with self.assertRaises(TypeError):
+            settings['db']['driver'] = 'mysql'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# coding=utf-8
+"""Pruebas de las consultas del módulo crud con el motor SQLite."""
+
+
+import unittest
+from umc_crud import crud, db, period, student
+from .sqlite import SQLiteTestCase
+
+
+class RecordPagesTest(SQLiteTestCase):
+    """Pruebas de la consulta paginada de calificaciones."""
+
+    def _students(self):
+        """Obtiene las cédulas de los estudiantes."""
+        return [e['ci'] for e in db.execute_sql('SELECT ci FROM estudiante')]
+
+    def _pages(self, ci, periodo=None, limit=3):
+        """Reúne todas las páginas de calificaciones de un estudiante."""
+        fetch = lambda after, limit: crud.read_records_page(
+            ci, after=after, limit=limit, periodo=periodo)
+        return [(r['periodo'], r['id'])
+                for page in crud.iter_pages(fetch, crud.record_page_key,
+                                            limit=limit)
+                for r in page]
+
+    def test_pages_follow_chronological_order(self):
+        """Las páginas siguen el orden cronológico de read_records()."""
+        for ci in self._students():
+            esperado = sorted(((r['periodo'], r['id'])
+                               for r in crud.read_records(ci)),
+                              key=lambda r: (period.code(r[0]), r[1]))
+            self.assertEqual(self._pages(ci), esperado)
+
+    def test_pages_by_period_range(self):
+        """Las páginas admiten rangos de períodos."""
+        for ci in self._students():
+            esperado = [(r['periodo'], r['id']) for r in
+                        crud.read_records(ci, periodo='2018-IN..2019-01')]
+            self.assertEqual(sorted(self._pages(ci, '2018-IN..2019-01')),
+                             sorted(esperado))
+
+
+class StudentSessionTest(SQLiteTestCase):
+    """Pruebas de los datos calculados desde el récord de student."""
+
+    def test_filter_matches_read_records(self):
+        """El filtro equivale a las condiciones de read_records()."""
+        for e in db.execute_sql('SELECT ci FROM estudiante'):
+            record = crud.read_records(e['ci'])
+            materia_ids = [r['id'] for r in record[::2]]
+            esperado = crud.read_records(e['ci'], materia_ids)
+            filtrado = student.filter_record(
+                record, [m.lower() for m in materia_ids])
+            self.assertEqual(filtrado, esperado)
+
+    def test_summary_matches_server(self):
+        """El resumen del récord equivale a crud.academic_summary()."""
+        for e in db.execute_sql('SELECT ci FROM estudiante'):
+            record = crud.read_records(e['ci'])
+            self.assertEqual(student.record_summary(record),
+                             crud.academic_summary(e['ci']))
+
+
+class ChunkedQueriesTest(SQLiteTestCase):
+    """Pruebas de las consultas en lotes de dos valores, dos a la vez."""
+
+    CONFIG = '[bulk]\nin_chunk_size = 2\nconcurrency = 2\n'
+
+    def _students(self):
+        """Obtiene las cédulas de los estudiantes."""
+        return [e['ci'] for e in db.execute_sql('SELECT ci FROM estudiante')]
+
+    def test_subjects_not_taken_by_students(self):
+        """Equivale a consultar las materias de cada estudiante."""
+        ci_list = self._students()
+        por_cursar = crud.find_subjects_not_taken_by_students(
+            ci_list + ci_list[:1] + ['0'])
+        esperado = {}
+        for ci in ci_list:
+            materias = {m['id_materia'] for m
+                        in crud.find_subjects_not_taken_by_student(ci)}
+            if materias:
+                esperado[ci] = materias
+        self.assertEqual(por_cursar, esperado)
+
+    def test_find_students_order(self):
+        """Los estudiantes se devuelven en el orden dado, sin repetirse."""
+        ci_list = sorted(self._students(), reverse=True)
+        buscar = [ci_list[0], '0', *ci_list, f'{ci_list[0]} ']
+        estudiantes = crud.find_students(buscar)
+        self.assertEqual([e['ci'] for e in estudiantes], ci_list)
+
+    def test_chunk_statements(self):
+        """Los valores se reparten en lotes de in_chunk_size."""
+        statements = crud.in_chunk_statements(
+            crud.find_career_subjects_query, ['A', 'B', 'C', 'D', 'E'],
+            {'max_params': 100}, prefix=['INF'])
+        self.assertEqual([args for _, args in statements],
+                         [['INF', 'A', 'B'], ['INF', 'C', 'D'],
+                          ['INF', 'E']])
+        self.assertEqual(statements[-1][0],
+                         crud.find_career_subjects_query(1))
+        # El límite de parámetros del servidor también se respeta
+        statements = crud.in_chunk_statements(
+            crud.find_subjects_query, ['A', 'B', 'C'], {'max_params': 1})
+        self.assertEqual(len(statements), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
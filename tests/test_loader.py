@@ -0,0 +1,46 @@
+# coding=utf-8
+"""Pruebas de la carga de calificaciones con el motor SQLite."""
+
+
+import unittest
+from umc_crud import crud, db, loader
+from .sqlite import SQLiteTestCase
+
+
+class LoadRecordsTest(SQLiteTestCase):
+    """Pruebas de loader.load_records()."""
+
+    def _write_csv(self, rows):
+        """Escribe un archivo de calificaciones y devuelve su nombre."""
+        filename = 'carga.csv'
+        with open(filename, 'w') as f:
+            f.writelines(','.join(map(str, row)) + '\n' for row in rows)
+        return filename
+
+    def test_last_repeated_row_wins_across_batches(self):
+        """Un par repetido en otro lote toma la última fila del archivo."""
+        ci = db.execute_sql('SELECT ci FROM estudiante', rows=1)['ci']
+        m1, m2, m3 = sorted(
+            crud.find_subjects_not_taken_by_students([ci])[ci])[:3]
+        filename = self._write_csv([[ci, m1, 10, '2020-01'],
+                                    [ci, m2, 11, '2020-01'],
+                                    [ci, m3, 12, '2020-01'],
+                                    [ci, m1, 18, '2020-02']])
+        for batch_size in (1, 2, 4):
+            with self.subTest(batch_size=batch_size):
+                progreso = loader.new_progress()
+                loader.load_records(filename, progreso,
+                                    batch_size=batch_size)
+                self.assertEqual(progreso['nuevas'], 3)
+                self.assertEqual(progreso['repetidas'], 1)
+                notas = {r['id']: (r['nota'], r['periodo'])
+                         for r in crud.read_records(ci, [m1, m2, m3])}
+                self.assertEqual(notas, {m1: (18, '2020-02'),
+                                         m2: (11, '2020-01'),
+                                         m3: (12, '2020-01')})
+                crud.delete_records([{'ci_estudiante': ci, 'id_materia': m}
+                                     for m in (m1, m2, m3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+# coding=utf-8
+"""Pruebas de las migraciones con el motor SQLite."""
+
+
+import unittest
+from umc_crud import migrate
+from .sqlite import SQLiteTestCase
+
+
+class MigrateTest(SQLiteTestCase):
+    """Pruebas del módulo migrate."""
+
+    def test_new_database_is_current(self):
+        """Una base de datos creada con db/ no tiene migraciones pendientes."""
+        self.assertFalse(migrate.is_outdated())
+        self.assertEqual(migrate.migrate(verbose=False), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# coding=utf-8
+"""Pruebas de los períodos académicos."""
+
+
+import unittest
+from umc_crud import db, period
+from umc_crud.period import Period
+from .sqlite import SQLiteTestCase
+
+
+class PeriodTest(unittest.TestCase):
+    """Pruebas del módulo period."""
+
+    def test_round_trip(self):
+        """El texto de un período se recupera a partir de su código."""
+        for s in ('2018-01', '2018-IN', '2018-02', '0999-IN'):
+            p = Period.parse(s)
+            self.assertEqual(str(p), s)
+            self.assertEqual(Period(p.code), p)
+        self.assertEqual(repr(Period.parse('2019-IN')), "Period('2019-IN')")
+
+    def test_chronological_order(self):
+        """Los lapsos de un año se ordenan 01, IN, 02."""
+        periodos = ['2019-02', '2018-IN', '2019-01', '2018-02', '2019-IN',
+                    '2018-01']
+        ordenados = ['2018-01', '2018-IN', '2018-02', '2019-01', '2019-IN',
+                     '2019-02']
+        self.assertEqual([str(p) for p in sorted(map(Period.parse,
+                                                     periodos))],
+                         ordenados)
+        self.assertEqual(sorted(periodos, key=period.code), ordenados)
+        self.assertEqual(period.code('2018-02') + 1, period.code('2019-01'))
+
+    def test_invalid(self):
+        """Los textos que no son períodos se rechazan."""
+        for s in ('2018-03', '2018-in', '2018/01', '18-01', '2018-1',
+                  '20a8-01', ' 2018-01', ''):
+            self.assertFalse(period.is_period(s), s)
+            with self.assertRaises(ValueError):
+                Period.parse(s)
+        self.assertTrue(period.is_period('2018-IN'))
+        # code() no distingue mayúsculas
+        self.assertEqual(period.code('2018-in'), period.code('2018-IN'))
+
+    def test_parse_range(self):
+        """Los rangos incluyen sus extremos y pueden quedar abiertos."""
+        desde, hasta = period.code('2018-01'), period.code('2020-IN')
+        self.assertEqual(period.parse_range('2018-01..2020-in'),
+                         (desde, hasta))
+        self.assertEqual(period.parse_range(' 2018-01 .. '), (desde, None))
+        self.assertEqual(period.parse_range('..2020-IN'), (None, hasta))
+        self.assertEqual(period.parse_range('2018-01'), (desde, desde))
+        for s in ('2020-IN..2018-01', '2018-01..2018-04', 'x'):
+            with self.assertRaises(ValueError):
+                period.parse_range(s)
+
+
+class PeriodColumnTest(SQLiteTestCase):
+    """Pruebas de la columna periodo_num de record."""
+
+    def test_column_matches_code(self):
+        """La columna periodo_num guarda el código de cada período."""
+        rows = db.execute_sql('SELECT periodo, periodo_num FROM record')
+        self.assertTrue(rows)
+        for r in rows:
+            self.assertEqual(r['periodo_num'], period.code(r['periodo']))
+
+
+if __name__ == '__main__':
+    unittest.main()
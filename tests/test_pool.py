@@ -0,0 +1,141 @@
+# coding=utf-8
+"""Pruebas del pool de conexiones."""
+
+
+import threading
+import time
+import unittest
+from umc_crud import db
+
+
+class FakeConnection:
+    """Conexión simulada que cuenta sus verificaciones."""
+
+    def __init__(self, alive=True):
+        """Inicializa la conexión abierta."""
+        self.open = True
+        self.alive = alive
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        """Verifica la conexión; falla si se marcó como caída."""
+        self.pings += 1
+        if not self.alive:
+            raise OSError('Conexión perdida.')
+
+    def close(self):
+        """Cierra la conexión."""
+        self.open = False
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    """Pruebas de db.ConnectionPool."""
+
+    def setUp(self):
+        """Registra las conexiones creadas por el pool."""
+        self.created = []
+
+    def factory(self):
+        """Crea una conexión simulada nueva."""
+        connection = FakeConnection()
+        self.created.append(connection)
+        return connection
+
+    def test_reuse(self):
+        """Una conexión devuelta se vuelve a entregar al mismo hilo."""
+        pool = db.ConnectionPool(self.factory, size=2)
+        with pool.connection() as primera:
+            pass
+        with pool.connection() as segunda:
+            self.assertIs(segunda, primera)
+        self.assertEqual(len(self.created), 1)
+
+    def test_size_and_checkout_timeout(self):
+        """No se abren más de size conexiones a la vez."""
+        pool = db.ConnectionPool(self.factory, size=2, checkout_timeout=0.05)
+        conexiones = [pool.acquire(), pool.acquire()]
+        with self.assertRaises(TimeoutError):
+            pool.acquire()
+        pool.release(conexiones.pop())
+        self.assertEqual(len(self.created), 2)
+
+    def test_wait_for_release(self):
+        """Un hilo espera a que otro devuelva una conexión."""
+        pool = db.ConnectionPool(self.factory, size=1, checkout_timeout=5)
+        connection = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [connection])
+        timer.start()
+        self.assertIs(pool.acquire(), connection)
+        timer.join()
+
+    def test_idle_expiry(self):
+        """Las conexiones inactivas por más de idle_timeout se cierran."""
+        pool = db.ConnectionPool(self.factory, idle_timeout=0.01)
+        with pool.connection() as vieja:
+            pass
+        time.sleep(0.02)
+        with pool.connection() as nueva:
+            self.assertIsNot(nueva, vieja)
+        self.assertFalse(vieja.open)
+
+    def test_ping_after(self):
+        """Solo se verifican las conexiones inactivas por ping_after."""
+        pool = db.ConnectionPool(self.factory, ping_after=60)
+        with pool.connection() as connection:
+            pass
+        with pool.connection():
+            pass
+        self.assertEqual(connection.pings, 0)
+        pool.ping_after = 0
+        with pool.connection():
+            pass
+        self.assertEqual(connection.pings, 1)
+
+    def test_failed_ping_reconnects(self):
+        """Una conexión que no responde se reemplaza por una nueva."""
+        pool = db.ConnectionPool(self.factory)
+        with pool.connection() as connection:
+            connection.alive = False
+        with pool.connection() as nueva:
+            self.assertIsNot(nueva, connection)
+        self.assertFalse(connection.open)
+        self.assertEqual(pool._open, 1)
+
+    def test_discard_on_error(self):
+        """Los errores de conexión descartan la conexión usada."""
+        pool = db.ConnectionPool(self.factory, errors=(OSError,))
+        with self.assertRaises(OSError):
+            with pool.connection() as connection:
+                raise OSError('Conexión perdida.')
+        self.assertFalse(connection.open)
+        with self.assertRaises(ValueError):
+            with pool.connection() as otra:
+                raise ValueError('Error de la petición.')
+        self.assertTrue(otra.open)
+        self.assertEqual(pool._open, 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Si la conexión falla, su cupo queda libre."""
+        def factory():
+            raise OSError('Servidor no disponible.')
+        pool = db.ConnectionPool(factory, size=1, checkout_timeout=0.05)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.acquire()
+        self.assertEqual(pool._open, 0)
+
+    def test_close(self):
+        """Al cerrar el pool se cierran todas sus conexiones."""
+        pool = db.ConnectionPool(self.factory)
+        en_uso = pool.acquire()
+        with pool.connection() as disponible:
+            pass
+        pool.close()
+        self.assertFalse(disponible.open)
+        pool.release(en_uso)
+        self.assertFalse(en_uso.open)
+        self.assertEqual(pool._open, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
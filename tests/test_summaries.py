@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Pruebas del resumen académico con el motor SQLite."""
+
+
+import unittest
+from umc_crud import crud, db
+from .sqlite import SQLiteTestCase
+
+
+def summary_tables():
+    """Obtiene el contenido de las tablas de resumen académico."""
+    return (db.execute_sql('SELECT * FROM estudiante_resumen '
+                           'ORDER BY ci_estudiante'),
+            db.execute_sql('SELECT * FROM estudiante_resumen_periodo '
+                           'ORDER BY ci_estudiante, periodo'))
+
+
+class SummariesTest(SQLiteTestCase):
+    """Pruebas de crud.refresh_summaries() tras cada modificación."""
+
+    def assertSummariesCurrent(self):
+        """Verifica que el resumen coincida con una agregación nueva."""
+        actual = summary_tables()
+        crud.rebuild_summaries()
+        self.assertEqual(actual, summary_tables())
+
+    def _new_records(self, n=3):
+        """Obtiene calificaciones nuevas de dos estudiantes."""
+        record = []
+        for e in db.execute_sql('SELECT ci FROM estudiante LIMIT 2'):
+            por_cursar = crud.find_subjects_not_taken_by_students([e['ci']])
+            for i, m in enumerate(sorted(por_cursar[e['ci']])[:n]):
+                record.append({'ci_estudiante': e['ci'], 'id_materia': m,
+                               'nota': 10 + i, 'periodo': '2021-01'})
+        return record
+
+    def test_bulk_changes(self):
+        """El resumen se mantiene al crear, modificar y eliminar en lote."""
+        record = self._new_records()
+        crud.create_records(record)
+        self.assertSummariesCurrent()
+        cambios = [dict(r, nota=r['nota'] + 5) for r in record[::2]]
+        cambios += [dict(r, periodo='2021-IN') for r in record[1::2]]
+        self.assertEqual(crud.update_records(cambios), len(record))
+        self.assertSummariesCurrent()
+        crud.delete_records(record[:2])
+        self.assertSummariesCurrent()
+        crud.delete_records_where(periodo='2021-IN')
+        self.assertSummariesCurrent()
+        crud.delete_records(record)
+        self.assertSummariesCurrent()
+
+    def test_single_changes(self):
+        """El resumen se mantiene al modificar una sola calificación."""
+        r = self._new_records(1)[0]
+        ci, materia_id = r['ci_estudiante'], r['id_materia']
+        crud.create_record(ci, materia_id, 8, '2021-01')
+        self.assertSummariesCurrent()
+        # Cambiar la calificación de período
+        crud.update_record(ci, materia_id, 16, '2021-02')
+        self.assertSummariesCurrent()
+        crud.delete_record(ci, materia_id)
+        self.assertSummariesCurrent()
+
+    def test_only_affected_periods(self):
+        """Solo se vuelven a agregar los períodos modificados."""
+        r = self._new_records(1)[0]
+        ci = r['ci_estudiante']
+        otro = db.execute_sql('SELECT periodo FROM estudiante_resumen_periodo '
+                              'WHERE ci_estudiante = %s', [ci], rows=1)
+        marca = ('UPDATE estudiante_resumen_periodo SET materias = 99 '
+                 'WHERE ci_estudiante = %s AND periodo = %s')
+        db.execute_sql(marca, [ci, otro['periodo']])
+        crud.create_records([r])
+        materias = db.execute_sql(
+            'SELECT materias FROM estudiante_resumen_periodo '
+            'WHERE ci_estudiante = %s AND periodo = %s',
+            [ci, otro['periodo']], rows=1)['materias']
+        self.assertEqual(materias, 99)
+        crud.delete_records([r])
+        crud.rebuild_summaries()
+
+    def test_academic_summaries(self):
+        """El resumen de varios estudiantes coincide con el individual."""
+        estudiantes = db.execute_sql('SELECT ci FROM estudiante')
+        ci_list = [e['ci'] for e in estudiantes]
+        resumenes = crud.academic_summaries(ci_list + ci_list[:1])
+        self.assertTrue(resumenes)
+        for ci, resumen in resumenes.items():
+            self.assertEqual(resumen, crud.academic_summary(ci))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Pruebas de las transacciones del módulo db con el motor SQLite."""
+
+
+import unittest
+from umc_crud import crud, db
+from .sqlite import SQLiteTestCase
+
+
+def count_records():
+    """Cuenta las calificaciones registradas."""
+    return db.execute_sql('SELECT COUNT(*) AS n FROM record', rows=1)['n']
+
+
+class TransactionTest(SQLiteTestCase):
+    """Pruebas de db.transaction()."""
+
+    def _new_records(self):
+        """Obtiene tres calificaciones nuevas de un estudiante."""
+        ci = db.execute_sql('SELECT ci FROM estudiante', rows=1)['ci']
+        materias = sorted(crud.find_subjects_not_taken_by_students([ci])[ci])
+        return [{'ci_estudiante': ci, 'id_materia': m, 'nota': 15,
+                 'periodo': '2020-01'} for m in materias[:3]]
+
+    def test_rollback_after_nested_savepoint(self):
+        """Un error deshace lo confirmado por un punto de guardado."""
+        antes = count_records()
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                # create_records() usa una transacción anidada
+                crud.create_records(self._new_records())
+                raise RuntimeError
+        self.assertEqual(count_records(), antes)
+
+    def test_commit(self):
+        """Los cambios de una transacción terminada se conservan."""
+        antes = count_records()
+        record = self._new_records()
+        with db.transaction():
+            crud.create_records(record)
+        self.assertEqual(count_records(), antes + len(record))
+        with db.transaction():
+            crud.delete_records(record)
+        self.assertEqual(count_records(), antes)
+
+    def test_read_only_is_not_a_write(self):
+        """Solo las transacciones con modificaciones se anotan."""
+        db._local.last_write = None
+        with db.transaction():
+            db.execute_sql('SELECT COUNT(*) AS n FROM record', rows=1,
+                           read=True)
+        self.assertIsNone(db._local.last_write)
+        record = self._new_records()
+        with db.transaction():
+            crud.create_records(record)
+            crud.delete_records(record)
+        self.assertIsNotNone(db._local.last_write)
+
+
+if __name__ == '__main__':
+    unittest.main()
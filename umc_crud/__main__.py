@@ -10,20 +10,48 @@ de sesión según sea el caso.
 
 
 import argparse
+from . import crud, io, stats
+from .migrate import is_outdated, migrate
 from .config import config, is_configured
 from .login import login
 
 
 def main(args):
     """Función principal del programa."""
-    if args['config'] or not is_configured():
-        config()
-    else:
-        login()
+    if args['stats']:
+        stats.enable()
+    try:
+        if args['config'] or not is_configured():
+            config()
+        elif args['migrate']:
+            # Actualizar la estructura de la base de datos y salir
+            migrate()
+        elif args['rebuild_summary']:
+            # Reconstruir las tablas de resumen académico y salir
+            n = crud.rebuild_summaries()
+            print(f'Resumen académico reconstruido ({n} estudiantes).')
+        elif is_outdated():
+            # La estructura de la base de datos es anterior a la que
+            # espera el programa
+            io.print_error('La base de datos no está actualizada. '
+                           'Ejecute el programa con la opción --migrate.')
+        else:
+            login()
+    finally:
+        if args['stats']:
+            # Mostrar las estadísticas de peticiones SQL al salir
+            stats.print_summary()
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Sistema CRUD de campus UMC.')
     parser.add_argument('--config', action='store_true',
                         help='Configura la conexión a MySQL')
+    parser.add_argument('--stats', action='store_true',
+                        help='Muestra estadísticas de peticiones SQL '
+                             'al salir')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Actualiza la estructura de la base de datos')
+    parser.add_argument('--rebuild-summary', action='store_true',
+                        help='Reconstruye las tablas de resumen académico')
     args = parser.parse_args()
     main(vars(args))
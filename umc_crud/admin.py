@@ -11,7 +11,9 @@ el usuario.
 """
 
 
-from . import crud, io, student
+import os
+from functools import partial
+from . import crud, io, loader, student
 
 
 def main(user_id):
@@ -21,7 +23,9 @@ def main(user_id):
         'Consulta': [
             ['Consultar información personal', get_personal_info],
             ['Consultar récord académico completo', get_record],
-            ['Consultar calificaciones por materia', find_grades]
+            ['Consultar calificaciones por materia', find_grades],
+            ['Consultar calificaciones de una carrera', get_career_records],
+            ['Consultar mejores índices de una carrera', get_career_ranking]
         ],
         'Registro': [
             ['Registrar calificaciones', make_records],
@@ -31,7 +35,8 @@ def main(user_id):
             ['Modificar calificaciones', update_records]
         ],
         'Eliminación': [
-            ['Eliminar calificaciones', delete_records]
+            ['Eliminar calificaciones', delete_records],
+            ['Eliminar calificaciones de una sección', delete_section]
         ],
         'Sesión': [
             ['Salir']
@@ -133,6 +138,70 @@ def find_grades(title=True, intro=True):
                                                    materia_ids))
 
 
+def get_career_records(title=True, intro=True):
+    """Consulta las calificaciones de todos los estudiantes de una carrera."""
+    if title:
+        io.print_h2('Consultar calificaciones de una carrera')
+    if intro:
+        io.print_long('Ingrese el código de la carrera y, opcionalmente, '
+                      'el período académico cuyas calificaciones quiere '
+                      'consultar. Las calificaciones se muestran por '
+                      'páginas.')
+    # Pedir la carrera y buscarla
+    carrera_id = input('Carrera: ').strip().upper()
+    if not crud.read_career_info(carrera_id):
+        io.print_error('Carrera no encontrada.')
+        return
+    # Pedir el período académico o rango de períodos (por ejemplo
+    # 2018-01..2020-IN), si se desea filtrar por período
+    periodo = input('Período académico (opcional): ').strip().upper() or None
+    print()
+    if periodo is not None and not io.validate_period_range(periodo):
+        io.print_error('Período académico inválido.')
+        return
+    # Columnas de la tabla y sus cabeceras
+    cols = {'ci_estudiante': 'Cédula',
+            'id_materia': 'Código',
+            'nombre': 'Materia',
+            'uc': 'UC',
+            'nota': 'Nota',
+            'periodo': 'Período'}
+    widths = dict(zip(cols.keys(), [10, 8, 36, 5, 5, 10]))
+    # Mostrar las calificaciones página por página
+    pages = crud.iter_pages(partial(crud.read_career_records_page,
+                                    carrera_id, periodo=periodo),
+                            crud.career_record_page_key, limit=50)
+    io.print_table_pages(pages, cols, widths)
+
+
+def get_career_ranking(title=True, intro=True):
+    """Consulta los estudiantes de una carrera con mayor IAA."""
+    if title:
+        io.print_h2('Consultar mejores índices de una carrera')
+    if intro:
+        io.print_long('Ingrese el código de la carrera para ver sus '
+                      'estudiantes con mayor índice académico acumulado '
+                      '(IAA).')
+    # Pedir la carrera y buscarla
+    carrera_id = input('Carrera: ').strip().upper()
+    print()
+    if not crud.read_career_info(carrera_id):
+        io.print_error('Carrera no encontrada.')
+        return
+    ranking = crud.academic_ranking(carrera_id, limit=20)
+    if not ranking:
+        io.print_error('La carrera no tiene estudiantes con calificaciones.')
+        return
+    # Columnas de la tabla y sus cabeceras
+    cols = {'ci': 'Cédula',
+            'nombre': 'Nombre',
+            'apellido': 'Apellido',
+            'uc': 'UC',
+            'iaa': 'IAA'}
+    widths = dict(zip(cols.keys(), [10, 20, 20, 5, 6]))
+    io.print_table(ranking, cols, widths)
+
+
 def make_records(title=True, intro=True):
     """Registra calificaciones de un estudiante sin cambiar las anteriores."""
     if title:
@@ -148,60 +217,67 @@ def make_records(title=True, intro=True):
         # Si la lista de estudiantes está vacía, mostrar error
         io.print_error('Los números de cédula ingresados no corresponden '
                        'a ningún estudiante.')
-    else:
-        # De lo contrario, para cada estudiante
-        for estudiante in estudiantes:
-            ci = estudiante['ci']
-            # Columnas de la tabla y sus cabeceras
-            cols = {'ci_estudiante': 'Cédula',
-                    'id_materia': 'Materia',
-                    'nota': 'Nota',
-                    'periodo': 'Período'}
-            # Lista de datos a registrar
-            por_registrar = []
-            # Mostrar el usuario y cédula del estudiante
+        return
+    # Columnas de la tabla y sus cabeceras
+    cols = {'ci_estudiante': 'Cédula',
+            'id_materia': 'Materia',
+            'nota': 'Nota',
+            'periodo': 'Período'}
+    # Lista de datos confirmados de todos los estudiantes
+    confirmados = []
+    # Para cada estudiante
+    for estudiante in estudiantes:
+        ci = estudiante['ci']
+        # Lista de datos a registrar
+        por_registrar = []
+        # Mostrar el usuario y cédula del estudiante
+        print()
+        io.print_h3(f'{estudiante["id_usuario"]} : {ci}')
+        # Buscar materias que no han sido cursadas por el estudiante
+        por_cursar = [item['id_materia'] for item
+                      in crud.find_subjects_not_taken_by_student(ci)]
+        # Pedir las materias a registrar y conservar las que están en
+        # la lista de materias por cursar del estudiante
+        materias = [m.upper() for m in io.input_list('Materia(s): ')
+                    if m.upper() in por_cursar]
+        if materias:
+            # Si quedan materias por registrar
+            print('Registro de calificaciones:')
+            # Para cada materia
+            for materia_id in materias:
+                # Pedir la calificación obtenida por el estudiante
+                nota = io.input_int(f'- {materia_id}: ', newline=False)
+                # Pedir el período académico en el que se cursó
+                periodo = io.input_period('  Período académico: ',
+                                          newline=False)
+                # Agregar datos de la materia por registrar a la lista
+                por_registrar.append({'ci_estudiante': ci,
+                                      'id_materia': materia_id,
+                                      'nota': nota,
+                                      'periodo': periodo})
+        if por_registrar:
+            # Si hay datos por registrar, mostrarlos en una tabla
             print()
-            io.print_h3(f'{estudiante["id_usuario"]} : {ci}')
-            # Buscar materias que no han sido cursadas por el estudiante
-            por_cursar = [item['id_materia'] for item
-                          in crud.find_subjects_not_taken_by_student(ci)]
-            # Pedir las materias a registrar y conservar las que están en
-            # la lista de materias por cursar del estudiante
-            materias = [m.upper() for m in io.input_list('Materia(s): ')
-                        if m.upper() in por_cursar]
-            if materias:
-                # Si quedan materias por registrar
-                print('Registro de calificaciones:')
-                # Para cada materia
-                for materia_id in materias:
-                    # Pedir la calificación obtenida por el estudiante
-                    nota = io.input_int(f'- {materia_id}: ', newline=False)
-                    # Pedir el período académico en el que se cursó
-                    periodo = io.input_period('  Período académico: ',
-                                              newline=False)
-                    # Agregar datos de la materia por registrar a la lista
-                    por_registrar.append({'ci_estudiante': ci,
-                                          'id_materia': materia_id,
-                                          'nota': nota,
-                                          'periodo': periodo})
-            if por_registrar:
-                # Si hay datos por registrar, mostrarlos en una tabla
-                print()
-                print(f'Se crearán {len(por_registrar)} nuevos registros:')
-                io.print_table(por_registrar, cols)
-                # Pedir confirmación antes de registrar los datos
-                confirm = io.input_yes_no('¿Registrar datos? (s/n): ')
-                if confirm:
-                    # Si la respuesta es afirmativa, crear los registros
-                    crud.create_records(por_registrar)
-                    print('Datos registrados exitosamente.')
-                else:
-                    # De lo contrario, mostrar mensaje
-                    print('Registro cancelado.')
+            print(f'Se crearán {len(por_registrar)} nuevos registros:')
+            io.print_table(por_registrar, cols)
+            # Pedir confirmación antes de agregar los datos
+            confirm = io.input_yes_no('¿Registrar datos? (s/n): ')
+            if confirm:
+                # Si la respuesta es afirmativa, agregar los registros
+                confirmados.extend(por_registrar)
             else:
-                # Si no hay datos por registrar, mostrar mensaje
-                print('No se registrarán nuevos datos.')
-            print()
+                # De lo contrario, mostrar mensaje
+                print('Registro cancelado.')
+        else:
+            # Si no hay datos por registrar, mostrar mensaje
+            print('No se registrarán nuevos datos.')
+        print()
+    if confirmados:
+        # Crear todos los registros confirmados a la vez; create_records()
+        # los registra en una sola transacción, todos o ninguno
+        resultados = crud.create_records(confirmados)
+        print_insert_results(resultados)
+        print()
 
 
 def load_csv_records(title=True, intro=True):
@@ -216,11 +292,8 @@ def load_csv_records(title=True, intro=True):
                       'calificación obtenida, y el período en que se '
                       'cursó.')
     # Pedir la ruta del archivo CSV
-    csv = input('Archivo: ')
-    try:
-        # Tratar de abrir el CSV y extraer su contenido
-        csv = io.read_csv(csv)
-    except FileNotFoundError:
+    archivo = input('Archivo: ')
+    if not os.path.isfile(archivo):
         # Si el archivo no se encuentra, mostrar error y salir
         io.print_error('Archivo no encontrado.')
         return
@@ -229,63 +302,75 @@ def load_csv_records(title=True, intro=True):
             'id_materia': 'Materia',
             'nota': 'Nota',
             'periodo': 'Período'}
-    # Filtrar las filas que no tengan el número correcto de campos
-    csv = list(filter(lambda row: len(row) == 4, csv))
-    # Convertir el contenido del CSV al formato requerido por print_table
-    records = [dict(zip(cols.keys(), row)) for row in csv]
-    # Diccionario de datos a registrar
-    por_registrar = {}
-    # Para cada registro
-    for record in records:
-        ci = record['ci_estudiante']
-        materia_id = record['id_materia']
-        # Verificar que la calificación sea un número entero
-        try:
-            # Trata de convertir la calificación a entero
-            record['nota'] = int(record['nota'])
-        except ValueError:
-            # Si no se puede, el registro es inválido. Pasar al siguiente
-            continue
-        # Verificar que el período académico del registro sea válido
-        if not io.validate_period(record['periodo']):
-            # Si no es válido, pasar al siguiente registro
-            continue
-        # Buscar las materias que no han sido cursadas por el estudiante de
-        # la cédula dada. Si no existe ningún estudiante con dicha cédula,
-        # el resultado será un tuple vacío
-        por_cursar = [item['id_materia'] for item
-                      in crud.find_subjects_not_taken_by_student(ci)]
-        if materia_id in por_cursar:
-            # Si la materia no ha sido cursada por el estudiante,
-            # se agregan los datos a la lista de registros por crear.
-            # Si esta combinación de materia y estudiante ya estaba en
-            # la lista, será reemplazada por este nuevo registro.
-            por_registrar[(ci, materia_id)] = record
-    # Convertir el diccionario de datos a lista
-    por_registrar = list(por_registrar.values())
-    print()
-    if por_registrar:
-        # Si hay datos por registrar, preguntar si quiere revisarlos
-        print(f'Se crearán {len(por_registrar)} nuevos registros.')
-        check = io.input_yes_no('¿Desea verlos antes de continuar? (s/n): ')
+    # El archivo se recorre por lotes, sin cargarlo completo en memoria
+    # (ver el módulo loader). Los registros se cuentan al revisarlos o,
+    # si no se revisaron todos, con un recorrido que no registra nada
+    try:
+        check = io.input_yes_no('¿Desea ver los registros nuevos antes de '
+                                'continuar? (s/n): ')
+        progreso = loader.new_progress()
+        shown = None
         if check:
-            # Si la respuesta es afirmativa, mostrar la tabla
-            io.print_table(por_registrar, cols)
+            # Si la respuesta es afirmativa, mostrar la tabla página por
+            # página, contando las filas mientras se recorre el archivo
+            shown = io.print_table_pages(
+                loader.iter_new_records(archivo, progreso), cols)
+        if shown != progreso['nuevas']:
+            # Contar los registros nuevos del archivo completo
+            progreso = loader.new_progress()
+            for lote in loader.iter_new_records(archivo, progreso,
+                                                print_load_progress):
+                # Solo se cuentan los registros nuevos (ver progreso)
+                pass
+            print()
+        print_load_summary(progreso)
+        if not progreso['nuevas']:
+            # Si no hay datos por registrar, mostrar mensaje y salir
+            print('No se registrarán nuevos datos.')
+            print()
+            return
+        print(f'Se crearán {progreso["nuevas"]} nuevos registros.')
         # Pedir confirmación antes de registrar los datos
         confirm = io.input_yes_no('¿Registrar datos? (s/n): ')
         if confirm:
-            # Si la respuesta es afirmativa, crear los registros
-            crud.create_records(por_registrar)
-            print('Datos registrados exitosamente.')
+            # Si la respuesta es afirmativa, crear los registros lote
+            # por lote
+            resultados = loader.load_records(archivo,
+                                             progress=print_load_progress)
+            print()
+            print_insert_results(resultados)
         else:
             # De lo contrario, mostrar mensaje
             print('Registro cancelado.')
-    else:
-        # Si no hay datos por registrar, mostrar mensaje
-        print('No se registrarán nuevos datos.')
+    except FileNotFoundError:
+        # Si el archivo no se encuentra, mostrar error y salir
+        io.print_error('Archivo no encontrado.')
+        return
     print()
 
 
+def print_load_progress(progreso):
+    """Muestra el progreso de la carga de un archivo de calificaciones."""
+    print(f'Lote {progreso["lotes"]}: {progreso["filas"]} filas leídas, '
+          f'{progreso["nuevas"]} registros nuevos.', end='\r')
+
+
+def print_load_summary(progreso):
+    """Muestra los totales de filas de un archivo de calificaciones."""
+    print(f'Filas leídas: {progreso["filas"]} (inválidas: '
+          f'{progreso["invalidas"]}, repetidas: {progreso["repetidas"]}, '
+          f'ya registradas o de estudiantes inexistentes: '
+          f'{progreso["omitidas"]}).')
+
+
+def print_insert_results(resultados):
+    """Muestra el resultado de la inserción de calificaciones por lotes."""
+    insertados = sum(r['inserted'] for r in resultados)
+    tiempo = sum(r['elapsed'] for r in resultados)
+    print(f'{insertados} registros creados exitosamente en '
+          f'{len(resultados)} lote(s) ({tiempo:.2f} s).')
+
+
 def update_records(title=True, intro=True):
     """Modifica calificaciones existentes de uno o varios estudiantes."""
     if title:
@@ -345,8 +430,8 @@ def update_records(title=True, intro=True):
                 confirm = io.input_yes_no('¿Modificar datos? (s/n): ')
                 if confirm:
                     # Si la respuesta es afirmativa, modificar los registros
-                    crud.update_records(por_modificar)
-                    print('Datos modificados exitosamente.')
+                    n = crud.update_records(por_modificar)
+                    print(f'{n} registros modificados exitosamente.')
                 else:
                     # De lo contrario, mostrar mensaje
                     print('Modificación cancelada.')
@@ -411,8 +496,9 @@ def delete_records(title=True, intro=True):
                 confirm = io.input_yes_no('¿Eliminar datos? (s/n): ')
                 if confirm:
                     # Si la respuesta es afirmativa, eliminar los registros
-                    crud.delete_records(por_eliminar)
-                    print('Datos eliminados exitosamente.')
+                    eliminados = crud.delete_records(por_eliminar)
+                    print(f'{len(eliminados)} registros eliminados '
+                          'exitosamente.')
                 else:
                     # De lo contrario, mostrar mensaje
                     print('Eliminación cancelada.')
@@ -420,3 +506,47 @@ def delete_records(title=True, intro=True):
                 # Si no hay datos por eliminar, mostrar mensaje
                 print('No se eliminará ningún dato.')
             print()
+
+
+def delete_section(title=True, intro=True):
+    """Elimina las calificaciones de una materia en un período."""
+    if title:
+        io.print_h2('Eliminar calificaciones de una sección')
+    if intro:
+        io.print_long('Ingrese el código de la materia y el período '
+                      'académico de la sección cuyas calificaciones '
+                      'quiere eliminar de los registros de todos los '
+                      'estudiantes.')
+    # Pedir la materia y el período de la sección
+    materia_id = input('Materia: ').strip().upper()
+    periodo = io.input_period('Período académico: ', newline=False)
+    # Columnas de la tabla y sus cabeceras
+    cols = {'ci_estudiante': 'Cédula',
+            'id_materia': 'Materia',
+            'nota': 'Nota',
+            'periodo': 'Período'}
+    # Buscar los registros de la sección
+    por_eliminar = crud.find_records(materia_id=materia_id, periodo=periodo)
+    print()
+    if por_eliminar:
+        # Si hay datos por eliminar, preguntar si quiere revisarlos
+        print(f'Se eliminarán {len(por_eliminar)} registros.')
+        check = io.input_yes_no('¿Desea verlos antes de continuar? (s/n): ')
+        if check:
+            # Si la respuesta es afirmativa, mostrar la tabla
+            io.print_table(por_eliminar, cols)
+        # Pedir confirmación antes de eliminar los datos
+        confirm = io.input_yes_no('¿Eliminar datos? (s/n): ')
+        if confirm:
+            # Si la respuesta es afirmativa, eliminar todos los registros
+            # de la sección con una sola petición
+            eliminados = crud.delete_records_where(materia_id=materia_id,
+                                                   periodo=periodo)
+            print(f'{len(eliminados)} registros eliminados exitosamente.')
+        else:
+            # De lo contrario, mostrar mensaje
+            print('Eliminación cancelada.')
+    else:
+        # Si no hay datos por eliminar, mostrar mensaje
+        print('No se eliminará ningún dato.')
+    print()
@@ -0,0 +1,607 @@
+# coding=utf-8
+"""Módulo asíncrono de acceso a datos.
+
+Este módulo provee versiones asíncronas (asyncio) de las funciones
+de los módulos db y crud, de modo que un solo bucle de eventos pueda
+atender muchas consultas simultáneas. Usa la librería aiomysql y su
+propio pool de conexiones asíncronas, configurado con los mismos
+parámetros del archivo de configuración que el pool de db.
+
+Las peticiones SQL son las mismas del módulo crud, por lo que ambos
+módulos devuelven resultados con el mismo formato.
+"""
+
+
+import asyncio
+import contextvars
+import itertools
+import time
+from contextlib import asynccontextmanager
+import aiomysql
+from . import catalog, crud, db, stats
+from .config import read_config
+
+
+# Pool de conexiones asíncronas, el bucle de eventos al que pertenece
+# y la configuración con la que se creó
+_pool = None
+_pool_loop = None
+_pool_settings = None
+# Candado de creación del pool y el bucle de eventos al que pertenece
+_pool_lock = None
+_pool_lock_loop = None
+
+# Límites de tamaño de una petición y el pool en que se consultaron
+_limits = None
+_limits_pool = None
+
+# Conexión de la transacción activa en la tarea actual
+_transaction = contextvars.ContextVar('transaction', default=None)
+# Contador para generar nombres únicos de puntos de guardado
+_savepoints = itertools.count(1)
+
+
+def _get_pool_lock():
+    """Obtiene el candado de creación del pool del bucle actual."""
+    global _pool_lock, _pool_lock_loop
+    loop = asyncio.get_running_loop()
+    if _pool_lock_loop is not loop:
+        _pool_lock = asyncio.Lock()
+        _pool_lock_loop = loop
+    return _pool_lock
+
+
+async def get_pool():
+    """Obtiene el pool de conexiones asíncronas, creándolo si no existe."""
+    global _pool, _pool_loop, _pool_settings
+    settings = read_config()
+    if settings.get('db', 'driver') != 'mysql':
+        raise ValueError('El módulo asíncrono solo admite el motor MySQL.')
+    loop = asyncio.get_running_loop()
+    async with _get_pool_lock():
+        if (_pool is None or _pool_loop is not loop
+                or _pool_settings is not settings):
+            if _pool is not None and _pool_loop is loop:
+                _pool.close()
+                await _pool.wait_closed()
+            mysql_conf = settings['mysql']
+            _pool = await aiomysql.create_pool(
+                host=mysql_conf['host'],
+                port=int(mysql_conf.get('port', 3306)),
+                user=mysql_conf['user'],
+                password=mysql_conf['password'],
+                db=mysql_conf['database'],
+                charset='utf8',
+                cursorclass=aiomysql.DictCursor,
+                connect_timeout=settings.getint('db', 'connect_timeout'),
+                minsize=0,
+                maxsize=settings.getint('pool', 'size'),
+                pool_recycle=settings.getfloat('pool', 'idle_timeout'))
+            _pool_loop = loop
+            stats.registry.configure(settings)
+            _pool_settings = settings
+        return _pool
+
+
+async def close_pool():
+    """Cierra las conexiones del pool asíncrono."""
+    global _pool, _pool_loop, _pool_settings
+    async with _get_pool_lock():
+        if _pool is not None:
+            _pool.close()
+            await _pool.wait_closed()
+            _pool = None
+            _pool_loop = None
+            _pool_settings = None
+
+
+async def statement_limits():
+    """Obtiene los límites de tamaño de una petición en el servidor.
+
+    Equivale a db.statement_limits(); se consultan una vez por pool.
+    """
+    global _limits, _limits_pool
+    pool = await get_pool()
+    if _limits_pool is not pool:
+        async with pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(
+                    'SELECT @@max_allowed_packet AS max_bytes')
+                row = await cursor.fetchone()
+        _limits = {'max_bytes': int(row['max_bytes']), 'max_params': None}
+        _limits_pool = pool
+    return _limits
+
+
+@asynccontextmanager
+async def transaction():
+    """Agrupa varias peticiones asíncronas en una sola transacción.
+
+    Equivale a db.transaction(): las peticiones realizadas dentro del
+    bloque usan la misma conexión y se confirman al final, y los
+    bloques anidados se implementan con puntos de guardado.
+    """
+    connection = _transaction.get()
+    if connection is not None:
+        # Transacción anidada: usar un punto de guardado
+        name = f'sp_{next(_savepoints)}'
+        async with connection.cursor() as cursor:
+            await cursor.execute(f'SAVEPOINT {name}')
+        try:
+            yield connection
+        except BaseException:
+            async with connection.cursor() as cursor:
+                await cursor.execute(f'ROLLBACK TO SAVEPOINT {name}')
+            raise
+        async with connection.cursor() as cursor:
+            await cursor.execute(f'RELEASE SAVEPOINT {name}')
+        return
+    pool = await get_pool()
+    async with pool.acquire() as connection:
+        token = _transaction.set(connection)
+        try:
+            yield connection
+        except BaseException:
+            await connection.rollback()
+            raise
+        else:
+            await connection.commit()
+        finally:
+            _transaction.reset(token)
+
+
+async def execute_sql(query, args=None, rows=None, many=False):
+    """
+    Ejecuta una petición SQL de forma asíncrona y devuelve su resultado.
+
+    Argumentos:
+        query (str): Petición a realizar
+        args (tuple/list/dict): Parámetros de la petición (opc)
+        rows (int or None): Número de filas de resultado (opc). Con 0,
+            devuelve el número de filas afectadas por la petición.
+        many (bool): Si la petición se hará con varios conjuntos de datos.
+    """
+    start = time.perf_counter()
+    connection = _transaction.get()
+    if connection is not None:
+        # Unirse a la transacción activa
+        result = await _execute(connection, query, args, rows, many)
+    else:
+        pool = await get_pool()
+        async with pool.acquire() as connection:
+            try:
+                result = await _execute(connection, query, args, rows, many)
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+    stats.registry.record(query, time.perf_counter() - start, result)
+    return result
+
+
+async def execute_chunks(statements, concurrency=1):
+    """
+    Ejecuta varias peticiones de forma asíncrona y devuelve sus resultados.
+
+    Equivale a db.execute_chunks(): fuera de una transacción, hasta
+    concurrency peticiones se realizan a la vez, cada una en su propia
+    conexión del pool. Los resultados se devuelven en el orden de las
+    peticiones.
+
+    Argumentos:
+        statements (list): Pares (petición, parámetros)
+        concurrency (int): Máximo de conexiones usadas al mismo tiempo
+    """
+    if _transaction.get() is not None or concurrency <= 1:
+        # Una conexión solo admite una petición a la vez
+        return [await execute_sql(query, args) for query, args in statements]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(query, args):
+        """Realiza una de las peticiones cuando haya lugar."""
+        async with semaphore:
+            return await execute_sql(query, args)
+
+    return await asyncio.gather(*(run_one(query, args)
+                                  for query, args in statements))
+
+
+async def execute_in_chunks(build, values, prefix=()):
+    """Realiza una consulta con una cláusula IN dividida en lotes.
+
+    Equivale a crud.execute_in_chunks().
+    """
+    statements = crud.in_chunk_statements(build, values,
+                                          await statement_limits(), prefix)
+    concurrency = read_config().getint('bulk', 'concurrency')
+    results = await execute_chunks(statements, concurrency)
+    return [row for result in results for row in result]
+
+
+async def iter_sql(query, args=None, batch_size=None, fetch_size=1000):
+    """Ejecuta una petición y genera sus resultados de forma incremental.
+
+    Equivale a db.iter_sql(), usando un cursor asíncrono sin búfer.
+    """
+    pool = await get_pool()
+    size = batch_size or fetch_size
+    connection = await pool.acquire()
+    finished = False
+    try:
+        async with connection.cursor(aiomysql.SSDictCursor) as cursor:
+            await cursor.execute(query, args)
+            while True:
+                batch = await cursor.fetchmany(size)
+                if not batch:
+                    break
+                if batch_size:
+                    yield batch
+                else:
+                    for row in batch:
+                        yield row
+        await connection.commit()
+        finished = True
+    finally:
+        if not finished:
+            # La conexión tiene filas pendientes: descartarla
+            connection.close()
+        pool.release(connection)
+
+
+async def _execute(connection, query, args, rows, many):
+    """Ejecuta una petición en la conexión dada y recoge su resultado."""
+    async with connection.cursor() as cursor:
+        if many:
+            await cursor.executemany(query, args)
+        else:
+            await cursor.execute(query, args)
+        # Recoge el número de resultados que se piden
+        if rows is None:
+            return await cursor.fetchall()
+        elif rows == 1:
+            return await cursor.fetchone()
+        elif rows > 1:
+            return await cursor.fetchmany(size=rows)
+        elif rows == 0:
+            return cursor.rowcount
+
+
+# Tabla record
+
+async def create_record(ci, materia_id, nota, periodo):
+    """Registra la calificación de un estudiante en una materia."""
+    async with transaction():
+        result = await execute_sql(crud.INSERT_RECORD,
+                                   args=[ci, materia_id, nota, periodo])
+        await refresh_summaries([(ci, periodo)])
+    return result
+
+
+async def create_records(record):
+    """Registra calificaciones de varias materias y estudiantes.
+
+    Equivale a crud.create_records(): inserta en lotes de varias filas
+    y devuelve el resultado de cada lote.
+    """
+    chunks = crud.record_chunks(record, await statement_limits(),
+                                read_config().getint('bulk', 'chunk_rows'))
+    results = []
+    periodos = set()
+    async with transaction():
+        for chunk in chunks:
+            start = time.perf_counter()
+            inserted = await execute_sql(
+                crud.insert_records_query(len(chunk)),
+                crud.insert_records_args(chunk), rows=0)
+            results.append(crud.chunk_result(chunk, inserted,
+                                             time.perf_counter() - start))
+            periodos.update(crud.summary_periods(chunk))
+        await refresh_summaries(periodos)
+    return results
+
+
+async def read_records(ci, materia_ids=None, periodo=None):
+    """Consulta las calificaciones de un estudiante."""
+    args = [ci]
+    n_materias = 0
+    if materia_ids is not None and len(materia_ids) > 0:
+        n_materias = len(materia_ids)
+        args.extend(materia_ids)
+    desde, hasta = crud.period_range_args(periodo, args)
+    query = crud.read_records_query(n_materias, desde, hasta)
+    return await execute_sql(query, args)
+
+
+async def read_records_page(ci, after=None, limit=100, periodo=None):
+    """Consulta una página de las calificaciones de un estudiante."""
+    args = [ci]
+    desde, hasta = crud.period_range_args(periodo, args)
+    if after is not None:
+        args.extend([after[0], after[0], after[1]])
+    args.append(limit)
+    query = crud.read_records_page_query(desde, hasta, after is not None)
+    return await execute_sql(query, args)
+
+
+async def read_career_records_page(carrera_id, after=None, limit=100,
+                                   periodo=None):
+    """Consulta una página de las calificaciones de una carrera."""
+    args = [carrera_id]
+    desde, hasta = crud.period_range_args(periodo, args)
+    if after is not None:
+        args.extend([after[0], after[0], after[1]])
+    args.append(limit)
+    query = crud.read_career_records_page_query(desde, hasta,
+                                                after is not None)
+    return await execute_sql(query, args)
+
+
+async def update_record(ci, materia_id, nota, periodo):
+    """Modifica la calificación de un estudiante en una materia."""
+    async with transaction():
+        anterior = await execute_sql(crud.select_records_by_key_query(1, True),
+                                     [ci, materia_id])
+        result = await execute_sql(crud.UPDATE_RECORD,
+                                   args=[nota, periodo, ci, materia_id])
+        await refresh_summaries(crud.summary_periods(anterior)
+                                | {(ci, periodo)})
+    return result
+
+
+async def update_records(record):
+    """Modifica las calificaciones de varias materias y estudiantes.
+
+    Equivale a crud.update_records(): aplica las calificaciones con una
+    petición por lote y devuelve el número de registros que cambiaron.
+    """
+    record = {(r['ci_estudiante'], r['id_materia']): r for r in record}
+    chunks = crud.record_chunks(record.values(), await statement_limits(),
+                                read_config().getint('bulk', 'chunk_rows'))
+    changed = 0
+    periodos = set()
+    async with transaction():
+        for chunk in chunks:
+            keys = [(r['ci_estudiante'], r['id_materia']) for r in chunk]
+            periodos.update(crud.summary_periods(await execute_sql(
+                crud.select_records_by_key_query(len(keys), True),
+                [value for key in keys for value in key])))
+            periodos.update(crud.summary_periods(chunk))
+            changed += await execute_sql(
+                crud.update_records_query(len(chunk), 'mysql'),
+                crud.insert_records_args(chunk), rows=0)
+        if changed:
+            await refresh_summaries(periodos)
+    return changed
+
+
+async def delete_record(ci, materia_id):
+    """Elimina la calificación de un estudiante en una materia."""
+    async with transaction():
+        deleted = await execute_sql(crud.select_records_by_key_query(1, True),
+                                    [ci, materia_id])
+        result = await execute_sql(crud.DELETE_RECORD,
+                                   args=[ci, materia_id])
+        await refresh_summaries(crud.summary_periods(deleted))
+    return result
+
+
+async def delete_records(record):
+    """Elimina las calificaciones de varias materias y estudiantes.
+
+    Equivale a crud.delete_records(): elimina con una petición por lote
+    y devuelve los registros eliminados.
+    """
+    keys = sorted({(r['ci_estudiante'], r['id_materia']) for r in record})
+    chunks = crud.key_chunks(keys, await statement_limits(),
+                             read_config().getint('bulk', 'chunk_rows'))
+    deleted = []
+    async with transaction():
+        for chunk in chunks:
+            n = len(chunk)
+            args = [value for key in chunk for value in key]
+            query = crud.select_records_by_key_query(n, True)
+            deleted.extend(await execute_sql(query, args))
+            query = crud.delete_records_by_key_query(n)
+            await execute_sql(query, args)
+        await refresh_summaries(crud.summary_periods(deleted))
+    return deleted
+
+
+async def find_records(materia_id=None, periodo=None, ci=None):
+    """Consulta los registros que cumplen las condiciones dadas."""
+    where, args = crud.records_where(materia_id, periodo, ci)
+    return await execute_sql(
+        f'SELECT {", ".join(crud.RECORD_COLUMNS)} FROM record '
+        f'WHERE {where} ORDER BY ci_estudiante, id_materia', args)
+
+
+async def delete_records_where(materia_id=None, periodo=None, ci=None):
+    """Elimina los registros que cumplen las condiciones dadas.
+
+    Equivale a crud.delete_records_where().
+    """
+    where, args = crud.records_where(materia_id, periodo, ci)
+    async with transaction():
+        deleted = await execute_sql(
+            f'SELECT {", ".join(crud.RECORD_COLUMNS)} FROM record '
+            f'WHERE {where} FOR UPDATE', args)
+        await execute_sql(f'DELETE FROM record WHERE {where}', args)
+        await refresh_summaries(crud.summary_periods(deleted))
+    return deleted
+
+
+def iter_records(batch_size=None):
+    """Recorre todos los registros de calificaciones de forma incremental."""
+    return iter_sql(crud.ITER_RECORDS, batch_size=batch_size)
+
+
+def iter_career_records(carrera_id, batch_size=None):
+    """Recorre las calificaciones de los estudiantes de una carrera."""
+    return iter_sql(crud.ITER_CAREER_RECORDS, args=[carrera_id],
+                    batch_size=batch_size)
+
+
+# Tabla usuario
+
+async def authenticate_user(usuario_id, usuario_pw):
+    """Trata de encontrar la combinación dada de usuario y contraseña."""
+    return await execute_sql(crud.AUTHENTICATE_USER,
+                             args=[usuario_id, usuario_pw], rows=1)
+
+
+# Tabla estudiante
+
+async def find_student_by_username(usuario_id):
+    """Consulta toda la información de un estudiante según su usuario."""
+    return await execute_sql(crud.FIND_STUDENT_BY_USERNAME,
+                             args=[usuario_id], rows=1)
+
+
+async def find_student_by_ci(ci):
+    """Consulta toda la información de un estudiante según su cédula."""
+    return await execute_sql(crud.FIND_STUDENT_BY_CI, args=[ci], rows=1)
+
+
+async def find_students(ci_list):
+    """Consulta estudiantes por su número de cédula.
+
+    Equivale a crud.find_students().
+    """
+    if not ci_list:
+        return ()
+    keys = crud.unique_keys(ci_list)
+    rows = await execute_in_chunks(crud.find_students_query,
+                                   list(keys.values()))
+    found = {catalog.key(row['ci']): row for row in rows}
+    return [found[k] for k in keys if k in found]
+
+
+async def find_students_page(carrera_id=None, after=None, limit=100):
+    """Consulta una página de estudiantes, o de los de una carrera."""
+    args = []
+    if carrera_id is not None:
+        args.append(carrera_id)
+    if after is not None:
+        args.append(after)
+    args.append(limit)
+    query = crud.find_students_page_query(carrera_id is not None,
+                                          after is not None)
+    return await execute_sql(query, args)
+
+
+def iter_students(carrera_id=None, batch_size=None):
+    """Recorre todos los estudiantes, o los de una carrera, en orden."""
+    if carrera_id is None:
+        return iter_sql(crud.ITER_STUDENTS, batch_size=batch_size)
+    return iter_sql(crud.ITER_CAREER_STUDENTS, args=[carrera_id],
+                    batch_size=batch_size)
+
+
+# Tabla carrera
+
+async def read_career_info(carrera_id):
+    """Consulta la información de una carrera según su código."""
+    return await execute_sql(crud.READ_CAREER_INFO, args=[carrera_id],
+                             rows=1)
+
+
+# Tabla materia
+
+async def find_subject(materia_id):
+    """Consulta la información de una materia por su código."""
+    return await execute_sql(crud.FIND_SUBJECT, args=[materia_id], rows=1)
+
+
+async def find_subjects(materia_ids):
+    """Consulta la información de varias materias."""
+    if not materia_ids:
+        return ()
+    return await execute_in_chunks(crud.find_subjects_query,
+                                   list(crud.unique_keys(materia_ids)
+                                        .values()))
+
+
+# Tabla materia_carrera
+
+async def find_career_subject(carrera_id, materia_id):
+    """Consulta una materia en una carrera por su código"""
+    return await execute_sql(crud.FIND_CAREER_SUBJECT,
+                             args=[carrera_id, materia_id], rows=1)
+
+
+async def find_career_subjects(carrera_id, materia_ids):
+    """Consulta materias en una carrera por su código."""
+    if not materia_ids:
+        return ()
+    return await execute_in_chunks(crud.find_career_subjects_query,
+                                   list(crud.unique_keys(materia_ids)
+                                        .values()),
+                                   prefix=[carrera_id])
+
+
+# Múltiples tablas
+
+async def find_subjects_not_taken_by_student(ci_estudiante):
+    """Consulta materias que no han sido cursadas por el estudiante."""
+    return await execute_sql(crud.FIND_SUBJECTS_NOT_TAKEN_BY_STUDENT,
+                             args={'ci': ci_estudiante})
+
+
+async def find_subjects_not_taken_by_students(ci_list):
+    """Consulta las materias no cursadas por cada uno de los estudiantes.
+
+    Equivale a crud.find_subjects_not_taken_by_students().
+    """
+    rows = await execute_in_chunks(
+        crud.find_subjects_not_taken_by_students_query, sorted(set(ci_list)))
+    por_cursar = {}
+    for row in rows:
+        por_cursar.setdefault(row['ci'], set()).add(row['id_materia'])
+    return por_cursar
+
+
+async def academic_summary(ci):
+    """Calcula los índices académicos de un estudiante.
+
+    Equivale a crud.academic_summary().
+    """
+    query = crud.academic_summaries_query(1)
+    summaries = crud.fold_academic_summaries(await execute_sql(query, [ci]))
+    return next(iter(summaries.values()), crud.empty_academic_summary())
+
+
+async def academic_summaries(ci_list):
+    """Calcula los índices académicos de varios estudiantes.
+
+    Equivale a crud.academic_summaries().
+    """
+    rows = await execute_in_chunks(crud.academic_summaries_query,
+                                   sorted(set(ci_list)))
+    return crud.fold_academic_summaries(rows)
+
+
+async def academic_ranking(carrera_id=None, limit=10):
+    """Consulta los estudiantes con mayor IAA, o los de una carrera.
+
+    Equivale a crud.academic_ranking().
+    """
+    args = [carrera_id] if carrera_id is not None else []
+    args.append(limit)
+    query = crud.academic_ranking_query(carrera_id is not None)
+    rows = await execute_sql(query, args)
+    for row in rows:
+        row['iaa'] = crud.academic_index(int(row.pop('suma_ponderada')),
+                                         int(row['uc']))
+    return rows
+
+
+async def refresh_summaries(periodos):
+    """Actualiza el resumen académico de los pares (cédula, período) dados.
+
+    Equivale a crud.refresh_summaries().
+    """
+    statements = crud.refresh_summaries_statements(periodos,
+                                                   await statement_limits())
+    async with transaction():
+        for query, args in statements:
+            await execute_sql(query, args)
@@ -0,0 +1,340 @@
+# coding=utf-8
+"""Módulo de motores de base de datos.
+
+Este módulo provee los motores (backends) con los que el módulo db
+puede conectarse a la base de datos: MySQL, mediante la librería
+PyMySQL, y SQLite, una base de datos local incorporada que no
+requiere un servidor.
+
+Ambos motores entregan conexiones con la misma interfaz que las
+conexiones de PyMySQL (cursores que devuelven diccionarios y
+parámetros con el formato %s o %(nombre)s), de modo que el resto
+del programa puede usar las mismas peticiones SQL con cualquiera
+de ellos. El motor se elige con el parámetro `driver` de la sección
+`[db]` del archivo de configuración.
+"""
+
+
+import csv
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+try:
+    import pymysql
+except ImportError:
+    # PyMySQL solo es necesario para el motor MySQL
+    pymysql = None
+
+
+class Backend:
+    """Motor de base de datos genérico."""
+
+    # Nombre del motor en el archivo de configuración
+    name = None
+    # Excepciones que indican que una conexión quedó inutilizable
+    connection_errors = ()
+
+    def connect(self, settings, replica=None):
+        """Crea una conexión con los parámetros de la configuración dada.
+
+        Si se indica una réplica (par host, puerto), la conexión se
+        hace a ella en lugar del servidor principal.
+        """
+        raise NotImplementedError
+
+    def begin(self, connection):
+        """Inicia una transacción en la conexión (ver db.transaction())."""
+        connection.begin()
+
+    def stream_cursor(self, connection):
+        """Crea un cursor que lee los resultados de forma incremental."""
+        raise NotImplementedError
+
+    def limits(self, connection):
+        """Obtiene los límites de tamaño de una petición en el servidor.
+
+        Devuelve un diccionario con el tamaño máximo en bytes de una
+        petición (max_bytes) y el número máximo de parámetros que puede
+        tener (max_params). Un valor None indica que no hay límite.
+        """
+        raise NotImplementedError
+
+
+class MySQLBackend(Backend):
+    """Motor de base de datos MySQL."""
+
+    name = 'mysql'
+
+    def __init__(self):
+        """Inicializa el motor MySQL."""
+        if pymysql is None:
+            raise ImportError('El motor MySQL requiere la librería PyMySQL.')
+        self.connection_errors = (pymysql.err.OperationalError,)
+
+    def connect(self, settings, replica=None):
+        """Crea una conexión al servidor MySQL de la configuración."""
+        mysql_conf = settings['mysql']
+        host, port = replica or (mysql_conf['host'],
+                                 int(mysql_conf.get('port', 3306)))
+        return pymysql.connect(host=host,
+                               port=port,
+                               user=mysql_conf['user'],
+                               password=mysql_conf['password'],
+                               database=mysql_conf['database'],
+                               charset='utf8',
+                               cursorclass=pymysql.cursors.DictCursor,
+                               connect_timeout=settings.getint(
+                                   'db', 'connect_timeout'))
+
+    def stream_cursor(self, connection):
+        """Crea un cursor sin búfer (SSDictCursor)."""
+        return connection.cursor(pymysql.cursors.SSDictCursor)
+
+    def limits(self, connection):
+        """Obtiene el tamaño máximo de una petición (max_allowed_packet).
+
+        PyMySQL inserta los parámetros en la petición antes de enviarla,
+        por lo que su número no está limitado.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT @@max_allowed_packet AS max_bytes')
+            max_bytes = cursor.fetchone()['max_bytes']
+        connection.commit()
+        return {'max_bytes': int(max_bytes), 'max_params': None}
+
+
+class SQLiteBackend(Backend):
+    """Motor de base de datos SQLite incorporado.
+
+    Si el archivo de la base de datos no existe, se crea con la
+    estructura de db/umc_db_sqlite.sql y los datos iniciales de los
+    archivos CSV del directorio csv, equivalentes a db/umc_db.sql.
+    """
+
+    name = 'sqlite'
+    # Archivo con la estructura de la base de datos
+    schema_file = os.path.join('db', 'umc_db_sqlite.sql')
+    # Datos iniciales: tabla y archivo CSV, en orden de dependencias
+    seed_files = [('usuario', os.path.join('csv', 'usuario.csv')),
+                  ('carrera', os.path.join('csv', 'carrera.csv')),
+                  ('estudiante', os.path.join('csv', 'estudiante.csv')),
+                  ('materia', os.path.join('csv', 'pensum.csv')),
+                  ('materia_carrera', os.path.join('csv', 'materias.csv')),
+                  ('record', os.path.join('csv', 'record-janedoe.csv')),
+                  ('record', os.path.join('csv', 'record-s8a.csv')),
+                  ('estudiante_resumen',
+                   os.path.join('csv', 'estudiante_resumen.csv')),
+                  ('estudiante_resumen_periodo',
+                   os.path.join('csv', 'estudiante_resumen_periodo.csv'))]
+
+    def __init__(self):
+        """Inicializa el motor SQLite."""
+        self._init_lock = threading.Lock()
+
+    def connect(self, settings, replica=None):
+        """Crea una conexión al archivo SQLite de la configuración.
+
+        SQLite no admite réplicas, por lo que el argumento replica se
+        ignora. La conexión se abre en modo autocommit
+        (isolation_level=None): las transacciones se inician de forma
+        explícita con begin(), de modo que un SAVEPOINT anidado nunca
+        abre (ni su RELEASE confirma) la transacción principal.
+        """
+        path = settings.get('sqlite', 'path')
+        with self._init_lock:
+            create = not os.path.exists(path)
+            raw = sqlite3.connect(
+                path, check_same_thread=False, isolation_level=None,
+                timeout=settings.getfloat('db', 'connect_timeout'))
+            raw.row_factory = _dict_row
+            raw.execute('PRAGMA foreign_keys = ON')
+            connection = SQLiteConnection(raw)
+            if create:
+                self.initialize(connection)
+        return connection
+
+    def initialize(self, connection):
+        """Crea la estructura y carga los datos iniciales."""
+        raw = connection.raw
+        with open(self.schema_file, encoding='utf-8') as schema:
+            raw.executescript(schema.read())
+        connection.begin()
+        for table, filename in self.seed_files:
+            with open(filename, newline='', encoding='utf-8') as csvfile:
+                rows = [[None if value == '\\N' else value for value in row]
+                        for row in csv.reader(csvfile) if row]
+            if rows:
+                marks = ', '.join(['?'] * len(rows[0]))
+                raw.executemany(f'INSERT INTO {table} VALUES ({marks})', rows)
+        raw.commit()
+
+    def stream_cursor(self, connection):
+        """Crea un cursor; SQLite ya lee los resultados paso a paso."""
+        return connection.cursor()
+
+    def limits(self, connection):
+        """Obtiene el tamaño máximo y el número máximo de parámetros."""
+        raw = connection.raw
+        if hasattr(raw, 'getlimit'):
+            return {'max_bytes': raw.getlimit(sqlite3.SQLITE_LIMIT_SQL_LENGTH),
+                    'max_params': raw.getlimit(
+                        sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)}
+        # Valores predeterminados de las versiones antiguas de SQLite
+        return {'max_bytes': 1000000, 'max_params': 999}
+
+
+class SQLiteConnection:
+    """Conexión SQLite con la interfaz de una conexión de PyMySQL."""
+
+    def __init__(self, raw):
+        """Envuelve la conexión sqlite3 dada."""
+        self.raw = raw
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        """Crea un cursor que devuelve las filas como diccionarios."""
+        return SQLiteCursor(self.raw.cursor())
+
+    def begin(self):
+        """Inicia una transacción."""
+        self.raw.execute('BEGIN')
+
+    def ping(self, reconnect=False):
+        """Verifica que la conexión siga abierta."""
+        if not self.open:
+            raise sqlite3.ProgrammingError('La conexión está cerrada.')
+
+    def commit(self):
+        """Confirma la transacción actual."""
+        self.raw.commit()
+
+    def rollback(self):
+        """Deshace la transacción actual."""
+        self.raw.rollback()
+
+    def close(self):
+        """Cierra la conexión."""
+        self.open = False
+        self.raw.close()
+
+
+class SQLiteCursor:
+    """Cursor SQLite con la interfaz de un cursor de PyMySQL.
+
+    Traduce los parámetros %s y %(nombre)s de las peticiones al
+    formato de sqlite3 (? y :nombre).
+    """
+
+    def __init__(self, cursor):
+        """Envuelve el cursor sqlite3 dado."""
+        self._cursor = cursor
+
+    def __enter__(self):
+        """Permite usar el cursor en un bloque with."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Cierra el cursor al salir del bloque with."""
+        self.close()
+
+    @property
+    def rowcount(self):
+        """Número de filas afectadas por la última petición."""
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        """Identificador de la última fila insertada."""
+        return self._cursor.lastrowid
+
+    def execute(self, query, args=None):
+        """Ejecuta una petición."""
+        self._cursor.execute(translate(query), _params(args))
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        """Ejecuta una petición con varios conjuntos de parámetros."""
+        self._cursor.executemany(translate(query),
+                                 [_params(a) for a in args])
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        """Obtiene la siguiente fila del resultado."""
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        """Obtiene las siguientes filas del resultado."""
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        """Obtiene las filas restantes del resultado."""
+        return self._cursor.fetchall()
+
+    def mogrify(self, query, args=None):
+        """Devuelve la petición con los parámetros insertados."""
+        if isinstance(args, dict):
+            return re.sub(r'%\((\w+)\)s',
+                          lambda m: _literal(args[m.group(1)]),
+                          query).replace('%%', '%')
+        values = iter(args or ())
+        return re.sub(r'%s|%%',
+                      lambda m: ('%' if m.group() == '%%'
+                                 else _literal(next(values))),
+                      query)
+
+    def close(self):
+        """Cierra el cursor."""
+        self._cursor.close()
+
+
+@lru_cache(maxsize=512)
+def translate(query):
+    """Traduce los parámetros de una petición al formato de sqlite3."""
+    return re.sub(r'%\((\w+)\)s|%s|%%',
+                  lambda m: (f':{m.group(1)}' if m.group(1)
+                             else '?' if m.group() == '%s' else '%'),
+                  query)
+
+
+def _params(args):
+    """Convierte los parámetros de una petición al formato de sqlite3."""
+    if args is None:
+        return ()
+    if isinstance(args, dict):
+        return args
+    return tuple(args)
+
+
+def _literal(value):
+    """Representa un valor como literal SQL."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _dict_row(cursor, row):
+    """Convierte una fila de sqlite3 en diccionario."""
+    return {column[0]: value
+            for column, value in zip(cursor.description, row)}
+
+
+# Motores disponibles según su nombre en la configuración
+BACKENDS = {backend.name: backend
+            for backend in (MySQLBackend, SQLiteBackend)}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name):
+    """Obtiene el motor de base de datos con el nombre dado."""
+    with _backends_lock:
+        if name not in _backends:
+            if name not in BACKENDS:
+                raise ValueError(f'Motor de base de datos desconocido: {name}')
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
@@ -0,0 +1,111 @@
+# coding=utf-8
+"""Módulo de caché del catálogo académico.
+
+Las tablas materia, carrera y materia_carrera (el catálogo) casi nunca
+cambian, por lo que este módulo las carga completas en memoria una
+sola vez y las guarda en diccionarios indexados por código. Las
+funciones de consulta de materias y carreras del módulo crud se sirven
+desde esta caché, sin consultar la base de datos.
+
+La caché se vuelve a cargar cuando pasan `ttl` segundos (sección
+`[cache]` del archivo de configuración), cuando cambia la
+configuración, o cuando se invalida explícitamente con invalidate().
+"""
+
+
+import threading
+import time
+from .config import read_config
+from .db import execute_sql
+
+
+SELECT_SUBJECTS = 'SELECT * FROM materia'
+SELECT_CAREERS = 'SELECT * FROM carrera'
+SELECT_CAREER_SUBJECTS = 'SELECT id_carrera, id_materia FROM materia_carrera'
+
+
+def key(value):
+    """Normaliza un código para buscarlo en el catálogo.
+
+    Reproduce la comparación de MySQL, que no distingue mayúsculas ni
+    toma en cuenta los espacios al final.
+    """
+    return str(value).rstrip().upper()
+
+
+class Catalog:
+    """Contenido de las tablas del catálogo, indexado por código."""
+
+    def __init__(self, materias, carreras, materias_carrera):
+        """Indexa las filas de las tablas del catálogo."""
+        self.materias = {key(m['id']): m for m in materias}
+        self.carreras = {key(c['id']): c for c in carreras}
+        # Materias de cada carrera: {carrera: {materia: código original}}
+        self.materias_carrera = {}
+        for mc in materias_carrera:
+            materias_de = self.materias_carrera.setdefault(
+                key(mc['id_carrera']), {})
+            materias_de[key(mc['id_materia'])] = mc['id_materia']
+        self.loaded_at = time.monotonic()
+
+    def find_subject(self, materia_id):
+        """Busca una materia por su código."""
+        materia = self.materias.get(key(materia_id))
+        return dict(materia) if materia is not None else None
+
+    def find_subjects(self, materia_ids):
+        """Busca varias materias por su código, sin repetirlas."""
+        keys = dict.fromkeys(key(m) for m in materia_ids)
+        return [dict(self.materias[k]) for k in keys if k in self.materias]
+
+    def read_career_info(self, carrera_id):
+        """Busca una carrera por su código."""
+        carrera = self.carreras.get(key(carrera_id))
+        return dict(carrera) if carrera is not None else None
+
+    def find_career_subjects(self, carrera_id, materia_ids):
+        """Busca cuáles de las materias dadas pertenecen a la carrera."""
+        materias_de = self.materias_carrera.get(key(carrera_id), {})
+        keys = dict.fromkeys(key(m) for m in materia_ids)
+        return [{'id_materia': materias_de[k]} for k in keys
+                if k in materias_de]
+
+
+# Catálogo en caché, la configuración con la que se cargó, y candado
+# para cargarlo
+_catalog = None
+_catalog_settings = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Obtiene el catálogo, cargándolo si no existe o si expiró."""
+    global _catalog, _catalog_settings
+    settings = read_config()
+    catalog = _catalog
+    if catalog is not None and not _expired(catalog, settings):
+        return catalog
+    with _catalog_lock:
+        if _catalog is None or _expired(_catalog, settings):
+            _catalog = Catalog(execute_sql(SELECT_SUBJECTS, read=True),
+                               execute_sql(SELECT_CAREERS, read=True),
+                               execute_sql(SELECT_CAREER_SUBJECTS,
+                                           read=True))
+            _catalog_settings = settings
+        return _catalog
+
+
+def invalidate():
+    """Descarta el catálogo en caché; se cargará en la próxima consulta."""
+    global _catalog, _catalog_settings
+    with _catalog_lock:
+        _catalog = None
+        _catalog_settings = None
+
+
+def _expired(catalog, settings):
+    """Verifica si el catálogo dado debe volver a cargarse."""
+    if settings is not _catalog_settings:
+        return True
+    ttl = settings.getfloat('cache', 'ttl')
+    return ttl is not None and time.monotonic() - catalog.loaded_at >= ttl
@@ -0,0 +1,178 @@
+# coding=utf-8
+"""Módulo de cálculo de índices académicos de grupos de estudiantes.
+
+Calcula, para todos los estudiantes de un grupo (por ejemplo, los de
+una carrera), el índice académico acumulado (IAA), el índice
+académico parcial (IAP) de cada período y el IAA al final de cada
+período, con operaciones vectorizadas sobre las calificaciones en
+forma de columnas (cédula, período, UC, nota). Sirve para elaborar
+cuadros de honor, listas de estudiantes en riesgo o cortes de becas.
+
+Los índices son idénticos a los de crud.academic_index(), que es el
+cálculo usado por los módulos de estudiante y administrador.
+
+Requiere la librería NumPy.
+"""
+
+
+import numpy as np
+from . import crud, io
+
+
+class CohortIndices:
+    """Índices académicos de un grupo de estudiantes.
+
+    Atributos:
+        estudiantes (ndarray): Cédulas de los estudiantes, ordenadas
+        periodos (list): Períodos académicos, en orden cronológico
+        iaa (ndarray): IAA de cada estudiante
+        iap (ndarray): IAP de cada estudiante (filas) en cada período
+            (columnas)
+        iaa_periodo (ndarray): IAA de cada estudiante (filas) al final
+            de cada período (columnas)
+
+    Los índices sin UC cursadas valen NaN.
+    """
+
+    def __init__(self, estudiantes, periodos, iaa, iap, iaa_periodo):
+        """Inicializa los índices con los arreglos dados."""
+        self.estudiantes = estudiantes
+        self.periodos = periodos
+        self.iaa = iaa
+        self.iap = iap
+        self.iaa_periodo = iaa_periodo
+        # Fila de cada estudiante y columna de cada período
+        self._filas = {ci: i for i, ci in enumerate(estudiantes.tolist())}
+        self._columnas = {p: j for j, p in enumerate(periodos)}
+
+    def student(self, ci):
+        """Devuelve los índices de un estudiante, o None si no está.
+
+        Devuelve un diccionario con el IAA ('iaa'), el IAP de los
+        períodos cursados ('iap': {período: índice}) y el IAA al final
+        de cada período desde el primero cursado ('iaa_periodo').
+        """
+        i = self._filas.get(ci)
+        if i is None:
+            return None
+        return {'iaa': _value(self.iaa[i]),
+                'iap': {p: _value(self.iap[i, j])
+                        for j, p in enumerate(self.periodos)
+                        if not np.isnan(self.iap[i, j])},
+                'iaa_periodo': {p: _value(self.iaa_periodo[i, j])
+                                for j, p in enumerate(self.periodos)
+                                if not np.isnan(self.iaa_periodo[i, j])}}
+
+    def select(self, minimo=None, maximo=None, periodo=None):
+        """Selecciona los estudiantes con IAA en el rango dado.
+
+        Si se indica un período, se usa el IAA al final de ese período.
+        Los límites minimo y maximo se incluyen en el rango. Devuelve
+        una lista de pares (cédula, índice), de mayor a menor índice.
+        """
+        if periodo is None:
+            indices = self.iaa
+        else:
+            indices = self.iaa_periodo[:, self._columnas[periodo]]
+        elegidos = ~np.isnan(indices)
+        if minimo is not None:
+            elegidos &= indices >= minimo
+        if maximo is not None:
+            elegidos &= indices <= maximo
+        filas = np.flatnonzero(elegidos)
+        # Orden estable: a igual índice, por cédula
+        filas = filas[np.argsort(-indices[filas], kind='stable')]
+        return [(str(self.estudiantes[i]), float(indices[i])) for i in filas]
+
+
+def compute(ci, periodo, uc, nota):
+    """Calcula los índices académicos de un grupo de estudiantes.
+
+    Recibe las calificaciones como cuatro columnas del mismo largo
+    (listas o arreglos): cédula del estudiante, período, UC de la
+    materia y nota. Las sumas de cada estudiante y período se obtienen
+    con np.bincount() y las acumuladas con np.cumsum(), en un solo
+    paso sobre todas las calificaciones. Devuelve un CohortIndices.
+    """
+    estudiantes, fila = np.unique(np.asarray(ci, dtype=str),
+                                  return_inverse=True)
+    codigos, columna = np.unique(np.char.upper(np.asarray(periodo,
+                                                          dtype=str)),
+                                 return_inverse=True)
+    # Ordenar los períodos cronológicamente (ver io.period_key())
+    orden = sorted(range(len(codigos)),
+                   key=lambda j: io.period_key(codigos[j]))
+    posicion = np.empty(len(codigos), dtype=np.intp)
+    posicion[orden] = np.arange(len(codigos))
+    periodos = [str(codigos[j]) for j in orden]
+    # Sumas de UC y de notas ponderadas por estudiante y período
+    uc = np.asarray(uc, dtype=np.int64)
+    nota = np.asarray(nota, dtype=np.int64)
+    shape = (len(estudiantes), len(periodos))
+    celda = fila.ravel() * shape[1] + posicion[columna.ravel()]
+    suma_uc = _group_sum(celda, uc, shape)
+    suma_ponderada = _group_sum(celda, uc * nota, shape)
+    iap = round_index(suma_ponderada, suma_uc)
+    iaa_periodo = round_index(np.cumsum(suma_ponderada, axis=1),
+                              np.cumsum(suma_uc, axis=1))
+    if periodos:
+        iaa = iaa_periodo[:, -1].copy()
+    else:
+        iaa = np.full(len(estudiantes), np.nan)
+    return CohortIndices(estudiantes, periodos, iaa, iap, iaa_periodo)
+
+
+def round_index(suma_ponderada, suma_uc):
+    """Calcula índices académicos como crud.academic_index().
+
+    np.round() redondea a la centésima par los cocientes que quedan a
+    mitad entre dos centésimas, mientras que round() redondea el valor
+    exacto del cociente en punto flotante, que puede quedar por encima
+    o por debajo de la mitad. Esos casos se detectan con aritmética
+    entera y se calculan con crud.academic_index(); los demás
+    coinciden. Devuelve NaN donde no hay UC.
+    """
+    suma_ponderada = np.asarray(suma_ponderada, dtype=np.int64)
+    suma_uc = np.asarray(suma_uc, dtype=np.int64)
+    validos = suma_uc > 0
+    divisor = np.where(validos, suma_uc, 1)
+    indices = np.round(np.where(validos, suma_ponderada / divisor, np.nan),
+                       2)
+    mitades = validos & (2 * (100 * suma_ponderada % divisor) == divisor)
+    for posicion in zip(*np.nonzero(mitades)):
+        indices[posicion] = crud.academic_index(
+            int(suma_ponderada[posicion]), int(suma_uc[posicion]))
+    return indices
+
+
+def career_columns(carrera_id, batch_size=1000):
+    """Consulta las calificaciones de una carrera en forma de columnas.
+
+    Devuelve las listas (cédula, período, UC, nota), leídas por lotes
+    con crud.iter_career_records().
+    """
+    ci, periodo, uc, nota = [], [], [], []
+    for batch in crud.iter_career_records(carrera_id, batch_size=batch_size):
+        ci.extend(r['ci_estudiante'] for r in batch)
+        periodo.extend(r['periodo'] for r in batch)
+        uc.extend(r['uc'] for r in batch)
+        nota.extend(r['nota'] for r in batch)
+    return ci, periodo, uc, nota
+
+
+def career_indices(carrera_id):
+    """Calcula los índices académicos de los estudiantes de una carrera."""
+    return compute(*career_columns(carrera_id))
+
+
+def _group_sum(celda, valores, shape):
+    """Suma los valores de cada celda de una matriz de forma shape."""
+    # Las sumas en punto flotante son exactas mientras no superen 2**53
+    sumas = np.bincount(celda, weights=valores,
+                        minlength=shape[0] * shape[1])
+    return sumas.astype(np.int64).reshape(shape)
+
+
+def _value(indice):
+    """Convierte un índice de NumPy en float, o None si es NaN."""
+    return None if np.isnan(indice) else float(indice)
@@ -5,13 +5,140 @@ Provee funciones para leer y crear el archivo de configuración,
 verificar si el programa ya está configurado, y permitir al usuario
 ingresar los datos de configuración interactivamente mediante la
 función principal config().
+
+El archivo de configuración se lee una sola vez y se guarda en caché
+como un objeto inmutable (Settings), el cual se vuelve a cargar
+únicamente cuando cambia la fecha de modificación del archivo.
 """
 
 
 import configparser
+import os
+import threading
+from types import MappingProxyType
 from . import io
 
 
+# Ruta del archivo de configuración
+CONFIG_FILE = 'config/config.ini'
+
+# Valores predeterminados de los parámetros opcionales
+DEFAULTS = {
+    'db': {
+        # Motor de base de datos a utilizar: mysql o sqlite
+        'driver': 'mysql',
+        # Segundos de espera al establecer una conexión
+        'connect_timeout': '10',
+    },
+    'pool': {
+        # Número máximo de conexiones abiertas
+        'size': '5',
+        # Segundos de inactividad antes de cerrar una conexión
+        'idle_timeout': '300',
+        # Segundos de espera por una conexión libre (vacío: sin límite)
+        'checkout_timeout': '30',
+        # Segundos de inactividad a partir de los cuales una conexión se
+        # verifica (ping) antes de entregarse (0: siempre)
+        'ping_after': '30',
+    },
+    'replicas': {
+        # Réplicas de lectura de MySQL, separadas por comas (host[:puerto])
+        'hosts': '',
+        # Segundos que se excluye una réplica tras un error de conexión
+        'eject_time': '30',
+        # Segundos tras una modificación en los que las lecturas del mismo
+        # hilo se hacen en el servidor principal (0: desactivado)
+        'read_your_writes': '5',
+    },
+    'sqlite': {
+        # Archivo de la base de datos del motor SQLite
+        'path': 'db/umc.sqlite3',
+    },
+    'bulk': {
+        # Máximo de filas por petición de inserción masiva
+        'chunk_rows': '1000',
+        # Máximo de valores por lote de las consultas con cláusula IN
+        'in_chunk_size': '500',
+        # Conexiones usadas a la vez para consultar los lotes (1: todos
+        # en una sola conexión, uno tras otro)
+        'concurrency': '1',
+    },
+    'cache': {
+        # Segundos de validez de los datos guardados en caché
+        'ttl': '3600',
+    },
+    'stats': {
+        # Registrar estadísticas de las peticiones SQL (también se
+        # activa con la opción --stats)
+        'enabled': 'no',
+        # Segundos a partir de los cuales una petición se considera lenta
+        'slow_query_threshold': '1.0',
+        # Archivo del registro de peticiones lentas
+        'slow_query_log': 'slow_query.log',
+    },
+}
+
+
+class Settings:
+    """Configuración del programa, de solo lectura.
+
+    Se accede a cada sección como un diccionario inmutable, por ejemplo
+    settings['mysql']['host'], y a los parámetros opcionales con los
+    métodos get(), getint(), getfloat() y getboolean(), que toman en
+    cuenta los valores predeterminados de DEFAULTS.
+    """
+
+    __slots__ = ('_sections', 'mtime')
+
+    def __init__(self, sections, mtime=None):
+        """Crea la configuración a partir de un diccionario de secciones."""
+        merged = {name: dict(options) for name, options in DEFAULTS.items()}
+        for name, options in sections.items():
+            merged.setdefault(name, {}).update(options)
+        object.__setattr__(self, '_sections', MappingProxyType(
+            {name: MappingProxyType(options)
+             for name, options in merged.items()}))
+        object.__setattr__(self, 'mtime', mtime)
+
+    def __setattr__(self, name, value):
+        """Impide modificar la configuración."""
+        raise AttributeError('La configuración es de solo lectura.')
+
+    def __getitem__(self, section):
+        """Obtiene una sección de la configuración."""
+        return self._sections[section]
+
+    def has_section(self, section):
+        """Verifica si la sección dada existe."""
+        return section in self._sections
+
+    def get(self, section, option, fallback=None):
+        """Obtiene el valor de un parámetro como texto."""
+        return self._sections.get(section, {}).get(option, fallback)
+
+    def getint(self, section, option, fallback=None):
+        """Obtiene el valor de un parámetro como número entero."""
+        value = self.get(section, option)
+        return int(value) if value not in (None, '') else fallback
+
+    def getfloat(self, section, option, fallback=None):
+        """Obtiene el valor de un parámetro como número real."""
+        value = self.get(section, option)
+        return float(value) if value not in (None, '') else fallback
+
+    def getboolean(self, section, option, fallback=None):
+        """Obtiene el valor de un parámetro como booleano."""
+        value = self.get(section, option)
+        if value in (None, ''):
+            return fallback
+        return configparser.ConfigParser.BOOLEAN_STATES[value.lower()]
+
+
+# Configuración en caché y candado para actualizarla
+_settings = None
+_settings_lock = threading.Lock()
+
+
 def config(title=True, intro=True):
     """Configura el programa a partir de la entrada del usuario."""
     if title:
@@ -36,24 +163,42 @@ def config(title=True, intro=True):
 
 
 def create_config(mysql_data):
-    """Crea un nuevo archivo de configuración."""
+    """Crea o actualiza el archivo de configuración."""
+    global _settings
     conf = configparser.ConfigParser()
+    # Conservar los parámetros opcionales del archivo existente
+    conf.read(CONFIG_FILE)
     conf['mysql'] = mysql_data
-    with open('config/config.ini', 'w') as configfile:
-        conf.write(configfile)
+    with _settings_lock:
+        with open(CONFIG_FILE, 'w') as configfile:
+            conf.write(configfile)
+        # Actualizar la caché con la nueva configuración
+        _settings = _parse(conf, _mtime())
+    return _settings
 
 
 def read_config():
-    """Lee el archivo de configuración."""
-    conf = configparser.ConfigParser()
-    conf.read('config/config.ini')
-    return conf
+    """Obtiene la configuración, leyendo el archivo solo si cambió."""
+    global _settings
+    mtime = _mtime()
+    settings = _settings
+    if settings is not None and settings.mtime == mtime:
+        return settings
+    with _settings_lock:
+        if _settings is None or _settings.mtime != mtime:
+            conf = configparser.ConfigParser()
+            conf.read(CONFIG_FILE)
+            _settings = _parse(conf, mtime)
+        return _settings
 
 
 def is_configured():
     """Verifica si el archivo de configuración existe y está completo."""
     # Trata de cargar la configuración
     conf = read_config()
+    # El motor SQLite no necesita datos de conexión
+    if conf.get('db', 'driver') == 'sqlite':
+        return True
     # Comprobar que la sección 'mysql' existe
     if not conf.has_section('mysql'):
         return False
@@ -64,3 +209,18 @@ def is_configured():
         if not conf.get('mysql', option):
             return False
     return True
+
+
+def _mtime():
+    """Obtiene la fecha de modificación del archivo de configuración."""
+    try:
+        return os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
+        # El archivo no existe o no se puede leer
+        return None
+
+
+def _parse(conf, mtime):
+    """Convierte un ConfigParser en un objeto Settings."""
+    return Settings({name: dict(conf[name]) for name in conf.sections()},
+                    mtime)
@@ -7,157 +7,996 @@ base del funcionamiento de los módulos de estudiante y administrador.
 
 Incluye funciones para crear, consultar, modificar y eliminar
 récords académicos, así como funciones de consulta de usuarios,
-estudiantes, carreras y materias.
+estudiantes, carreras y materias. Las funciones de consulta se marcan
+como lecturas (read=True), de modo que pueden atenderse desde las
+réplicas de lectura.
 """
 
 
-from .db import execute_sql
+import time
+from . import catalog, db, period
+from .config import read_config
+from .db import execute_sql, iter_sql
+
+
+# Peticiones SQL de este módulo. Se definen como constantes para que
+# el módulo asíncrono (aio) pueda reutilizarlas.
+
+RECORD_COLUMNS = ('ci_estudiante', 'id_materia', 'nota', 'periodo')
+# La columna periodo_num de record se genera a partir de periodo
+INSERT_RECORD = (f'INSERT INTO record ({", ".join(RECORD_COLUMNS)}) '
+                 'VALUES (%s, %s, %s, %s)')
+INSERT_RECORDS = (f'INSERT INTO record ({", ".join(RECORD_COLUMNS)}) '
+                  'VALUES ')
+UPDATE_RECORD = ('UPDATE record SET nota = %s, periodo = %s '
+                 'WHERE ci_estudiante = %s AND id_materia = %s')
+DELETE_RECORD = ('DELETE FROM record '
+                 'WHERE ci_estudiante = %s AND id_materia = %s')
+AUTHENTICATE_USER = 'SELECT * FROM usuario WHERE id = %s AND password = %s'
+FIND_STUDENT_BY_USERNAME = 'SELECT * FROM estudiante WHERE id_usuario = %s'
+FIND_STUDENT_BY_CI = 'SELECT * FROM estudiante WHERE ci = %s'
+READ_CAREER_INFO = 'SELECT * FROM carrera WHERE id = %s'
+FIND_SUBJECT = 'SELECT * FROM materia WHERE id = %s'
+FIND_CAREER_SUBJECT = ('SELECT id_materia FROM materia_carrera '
+                       'WHERE id_carrera = %s AND id_materia = %s')
+FIND_SUBJECTS_NOT_TAKEN_BY_STUDENT = (
+    'SELECT id_materia FROM materia_carrera WHERE id_carrera = '
+    '(SELECT id_carrera FROM estudiante WHERE ci = %(ci)s) AND '
+    'id_materia NOT IN (SELECT id_materia FROM record '
+    'WHERE ci_estudiante = %(ci)s)')
+# Modificación de varias calificaciones en una sola petición, según el
+# motor de base de datos. Solo cuenta las filas que realmente cambian.
+UPDATE_RECORDS = {
+    'mysql': ('UPDATE record INNER JOIN ({rows}) AS v '
+              'ON record.ci_estudiante = v.ci_estudiante '
+              'AND record.id_materia = v.id_materia '
+              'SET record.nota = v.nota, record.periodo = v.periodo '
+              'WHERE record.nota <> v.nota OR record.periodo <> v.periodo'),
+    # En SQLite, las columnas de VALUES se llaman column1, column2...
+    'sqlite': ('UPDATE record SET nota = v.column3, periodo = v.column4 '
+               'FROM (VALUES {rows}) AS v '
+               'WHERE record.ci_estudiante = v.column1 '
+               'AND record.id_materia = v.column2 '
+               'AND (record.nota <> v.column3 '
+               'OR record.periodo <> v.column4)'),
+}
+ITER_RECORDS = ('SELECT ci_estudiante, id_materia, nota, periodo FROM record '
+                'ORDER BY ci_estudiante, id_materia')
+ITER_CAREER_RECORDS = (
+    'SELECT record.ci_estudiante, record.id_materia, materia.uc, '
+    'record.nota, record.periodo '
+    'FROM estudiante INNER JOIN record '
+    'ON estudiante.ci = record.ci_estudiante '
+    'INNER JOIN materia ON materia.id = record.id_materia '
+    'WHERE estudiante.id_carrera = %s '
+    'ORDER BY record.ci_estudiante, record.id_materia')
+ITER_STUDENTS = 'SELECT * FROM estudiante ORDER BY ci'
+ITER_CAREER_STUDENTS = ('SELECT * FROM estudiante WHERE id_carrera = %s '
+                        'ORDER BY ci')
+# Tablas de resumen académico (ver refresh_summaries()). Las columnas
+# son sumas sobre las calificaciones de cada estudiante, o de cada
+# estudiante y período.
+SUMMARY_COLUMNS = ('materias', 'uc', 'materias_aprobadas', 'uc_aprobadas',
+                   'suma_ponderada')
+INSERT_PERIOD_SUMMARIES = (
+    'INSERT INTO estudiante_resumen_periodo '
+    f'(ci_estudiante, periodo, {", ".join(SUMMARY_COLUMNS)}) '
+    'SELECT record.ci_estudiante, record.periodo, COUNT(*), '
+    'SUM(materia.uc), '
+    'SUM(CASE WHEN record.nota >= 12 THEN 1 ELSE 0 END), '
+    'SUM(CASE WHEN record.nota >= 12 THEN materia.uc ELSE 0 END), '
+    'SUM(materia.uc * record.nota) '
+    'FROM record INNER JOIN materia ON materia.id = record.id_materia '
+    '{where}GROUP BY record.ci_estudiante, record.periodo')
+INSERT_SUMMARIES = (
+    'INSERT INTO estudiante_resumen '
+    f'(ci_estudiante, {", ".join(SUMMARY_COLUMNS)}) '
+    'SELECT ci_estudiante, '
+    + ', '.join(f'SUM({column})' for column in SUMMARY_COLUMNS) +
+    ' FROM estudiante_resumen_periodo {where}GROUP BY ci_estudiante')
 
 
 # Tabla record
 
 def create_record(ci, materia_id, nota, periodo, test=False):
     """Registra la calificación de un estudiante en una materia."""
-    query = 'INSERT INTO record VALUES (%s, %s, %s, %s)'
-    return execute_sql(query, args=[ci, materia_id, nota, periodo], test=test)
+    args = [ci, materia_id, nota, periodo]
+    if test:
+        return execute_sql(INSERT_RECORD, args=args, test=test)
+    with db.transaction():
+        result = execute_sql(INSERT_RECORD, args=args)
+        refresh_summaries([(ci, periodo)])
+    return result
 
 
 def create_records(record):
-    """Registra calificaciones de varias materias y estudiantes."""
-    query = 'INSERT INTO record VALUES (%s, %s, %s, %s)'
-    args = [tuple(r.values()) for r in record]
-    return execute_sql(query, args, many=True)
+    """Registra calificaciones de varias materias y estudiantes.
+
+    Las calificaciones se insertan en lotes mediante peticiones INSERT
+    de varias filas (ver record_chunks()), todos en una sola
+    transacción junto con el resumen académico de los estudiantes.
+    Devuelve una lista con el resultado de cada lote (ver
+    chunk_result()).
+    """
+    chunks = record_chunks(record, db.statement_limits(),
+                           read_config().getint('bulk', 'chunk_rows'))
+    results = []
+    periodos = set()
+    with db.transaction():
+        for chunk in chunks:
+            start = time.perf_counter()
+            inserted = execute_sql(insert_records_query(len(chunk)),
+                                   insert_records_args(chunk), rows=0)
+            results.append(chunk_result(chunk, inserted,
+                                        time.perf_counter() - start))
+            periodos.update(summary_periods(chunk))
+        refresh_summaries(periodos)
+    return results
+
+
+def record_chunks(record, limits, chunk_rows=1000):
+    """Divide calificaciones en lotes para insertarlos de una vez.
+
+    Las filas se ordenan por clave primaria (cédula y materia), de
+    modo que se insertan en el orden del índice y se reducen las
+    divisiones de sus páginas. Cada lote tiene como máximo chunk_rows
+    filas y respeta los límites de tamaño y número de parámetros de
+    una petición (ver db.statement_limits()).
+    """
+    rows = sorted(record, key=lambda r: (r['ci_estudiante'], r['id_materia']))
+    max_rows = chunk_rows
+    if limits.get('max_params'):
+        max_rows = min(max_rows, limits['max_params'] // len(RECORD_COLUMNS))
+    max_bytes = limits.get('max_bytes')
+    if max_bytes:
+        # Reservar espacio para el encabezado de la petición y el protocolo
+        max_bytes -= len(INSERT_RECORDS) + 1024
+    chunk = []
+    size = 0
+    for r in rows:
+        row_size = _record_size(r)
+        if chunk and (len(chunk) >= max_rows
+                      or (max_bytes and size + row_size > max_bytes)):
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append(r)
+        size += row_size
+    if chunk:
+        yield chunk
+
+
+def insert_records_query(n):
+    """Genera la petición de inserción de n calificaciones."""
+    row = f'({db.in_placeholders(len(RECORD_COLUMNS))})'
+    return INSERT_RECORDS + ', '.join([row] * n)
+
+
+def insert_records_args(chunk):
+    """Genera los parámetros de insert_records_query() para un lote.
+
+    También sirven para update_records_query(), que usa las mismas
+    columnas en el mismo orden.
+    """
+    return [r[column] for r in chunk for column in RECORD_COLUMNS]
+
+
+def chunk_result(chunk, inserted, elapsed):
+    """Resume el resultado de la inserción de un lote de calificaciones.
+
+    Devuelve un diccionario con el número de filas del lote (rows), las
+    filas insertadas (inserted), las claves de la primera y la última
+    fila (first y last), y el tiempo de la inserción (elapsed).
+    """
+    return {'rows': len(chunk),
+            'inserted': inserted,
+            'first': (chunk[0]['ci_estudiante'], chunk[0]['id_materia']),
+            'last': (chunk[-1]['ci_estudiante'], chunk[-1]['id_materia']),
+            'elapsed': elapsed}
+
+
+def _record_size(r):
+    """Estima el tamaño en bytes de una fila dentro de la petición."""
+    # Cada valor puede duplicar su tamaño al escaparse, y se agregan
+    # comillas, separadores y paréntesis
+    return sum(2 * len(str(r[column]).encode('utf-8')) + 4
+               for column in RECORD_COLUMNS) + 4
 
 
 def read_records(ci, materia_ids=None, periodo=None, test=False):
-    """Consulta las calificaciones de un estudiante."""
+    """Consulta las calificaciones de un estudiante.
+
+    El período puede ser uno solo (por ejemplo 2019-IN) o un rango de
+    períodos (por ejemplo 2018-01..2020-IN, ver period.parse_range()).
+    Las calificaciones se ordenan cronológicamente por período. El
+    filtro y el orden usan el código entero del período (columna
+    periodo_num de record).
+    """
+    args = [ci]
+    n_materias = 0
+    if materia_ids is not None and len(materia_ids) > 0:
+        # Utilizar la lista de materias si se provee
+        n_materias = len(materia_ids)
+        args.extend(materia_ids)
+    desde, hasta = period_range_args(periodo, args)
+    query = read_records_query(n_materias, desde, hasta)
+    return execute_sql(query, args, test=test, read=True)
+
+
+def read_records_query(n_materias, desde=False, hasta=False):
+    """Genera la petición de consulta de calificaciones de un estudiante.
+
+    desde y hasta indican si se filtra por el primer y el último
+    período de un rango (ver period_range_args()).
+    """
     query = ('SELECT materia.id, materia.nombre, materia.uc, '
              'record.nota, record.periodo '
              'FROM materia INNER JOIN record '
              'ON materia.id = record.id_materia '
              'WHERE record.ci_estudiante = %s')
+    if n_materias:
+        query += f' AND materia.id IN ({db.in_placeholders(n_materias)})'
+    if desde:
+        query += ' AND record.periodo_num >= %s'
+    if hasta:
+        query += ' AND record.periodo_num <= %s'
+    query += ' ORDER BY record.periodo_num'
+    return query
+
+
+def period_range_args(periodo, args):
+    """Agrega a args los códigos de un período o rango de períodos.
+
+    Devuelve el par (desde, hasta) que indica cuáles extremos del rango
+    se agregaron; si no se indica un período, no se agrega ninguno.
+    Lanza ValueError si el período o rango no es válido.
+    """
+    if periodo is None:
+        return False, False
+    desde, hasta = period.parse_range(periodo)
+    args.extend(code for code in (desde, hasta) if code is not None)
+    return desde is not None, hasta is not None
+
+
+def read_records_page(ci, after=None, limit=100, periodo=None, test=False):
+    """Consulta una página de las calificaciones de un estudiante.
+
+    Las calificaciones se ordenan cronológicamente por período y luego
+    por código de materia, igual que en read_records(), usando el
+    código entero del período (columna periodo_num). La página empieza
+    después de la clave after, un par (periodo_num, id_materia)
+    obtenido de la última fila de la página anterior con
+    record_page_key(), y tiene hasta limit filas. El período puede ser
+    uno solo o un rango de períodos (ver period_range_args()).
+    """
     args = [ci]
-    if materia_ids is not None and len(materia_ids) > 0:
-        # Utilizar la lista de materias si se provee
-        query += (' AND materia.id IN ('
-                  + ', '.join(['%s' for m in materia_ids])
-                  + ')')
-        args.extend(materia_ids)
-    if periodo is not None:
-        # Toma en cuenta solo el período indicado, si se provee
-        query += ' AND record.periodo = %s'
-        args.append(periodo)
-    query += ' ORDER BY record.periodo'
-    return execute_sql(query, args, test=test)
+    desde, hasta = period_range_args(periodo, args)
+    if after is not None:
+        args.extend([after[0], after[0], after[1]])
+    args.append(limit)
+    query = read_records_page_query(desde, hasta, after is not None)
+    return execute_sql(query, args, test=test, read=True)
+
+
+def read_records_page_query(desde, hasta, after):
+    """Genera la petición de consulta de una página de calificaciones."""
+    query = ('SELECT materia.id, materia.nombre, materia.uc, '
+             'record.nota, record.periodo, record.periodo_num '
+             'FROM materia INNER JOIN record '
+             'ON materia.id = record.id_materia '
+             'WHERE record.ci_estudiante = %s')
+    if desde:
+        query += ' AND record.periodo_num >= %s'
+    if hasta:
+        query += ' AND record.periodo_num <= %s'
+    if after:
+        query += (' AND (record.periodo_num > %s OR (record.periodo_num = %s '
+                  'AND record.id_materia > %s))')
+    query += ' ORDER BY record.periodo_num, record.id_materia LIMIT %s'
+    return query
+
+
+def record_page_key(row):
+    """Obtiene la clave de paginación de una fila de read_records_page()."""
+    return (row['periodo_num'], row['id'])
+
+
+def read_career_records_page(carrera_id, after=None, limit=100,
+                             periodo=None, test=False):
+    """Consulta una página de las calificaciones de una carrera.
+
+    Las calificaciones se ordenan por la clave primaria de record
+    (cédula y materia). La página empieza después de la clave after,
+    un par (ci_estudiante, id_materia) obtenido con
+    career_record_page_key(), y tiene hasta limit filas. Si se indica
+    un período o un rango de períodos (ver period_range_args()), solo
+    se incluyen sus calificaciones.
+    """
+    args = [carrera_id]
+    desde, hasta = period_range_args(periodo, args)
+    if after is not None:
+        args.extend([after[0], after[0], after[1]])
+    args.append(limit)
+    query = read_career_records_page_query(desde, hasta,
+                                           after is not None)
+    return execute_sql(query, args, test=test, read=True)
+
+
+def read_career_records_page_query(desde, hasta, after):
+    """Genera la petición de una página de calificaciones de una carrera."""
+    query = ('SELECT record.ci_estudiante, record.id_materia, '
+             'materia.nombre, materia.uc, record.nota, record.periodo '
+             'FROM estudiante INNER JOIN record '
+             'ON estudiante.ci = record.ci_estudiante '
+             'INNER JOIN materia ON materia.id = record.id_materia '
+             'WHERE estudiante.id_carrera = %s')
+    if desde:
+        query += ' AND record.periodo_num >= %s'
+    if hasta:
+        query += ' AND record.periodo_num <= %s'
+    if after:
+        query += (' AND (record.ci_estudiante > %s '
+                  'OR (record.ci_estudiante = %s AND record.id_materia > %s))')
+    query += ' ORDER BY record.ci_estudiante, record.id_materia LIMIT %s'
+    return query
+
+
+def career_record_page_key(row):
+    """Obtiene la clave de paginación de read_career_records_page()."""
+    return (row['ci_estudiante'], row['id_materia'])
+
+
+def iter_pages(fetch_page, page_key, limit=100):
+    """Recorre página por página los resultados de una consulta paginada.
+
+    fetch_page es una función que recibe los argumentos after y limit
+    y devuelve una página (por ejemplo, read_records_page con sus demás
+    argumentos fijos mediante functools.partial), y page_key obtiene
+    la clave de paginación de una fila. Genera las páginas, cada una
+    como una lista, hasta la última.
+    """
+    after = None
+    while True:
+        page = list(fetch_page(after=after, limit=limit))
+        if page:
+            yield page
+        if len(page) < limit:
+            return
+        after = page_key(page[-1])
 
 
 def update_record(ci, materia_id, nota, periodo, test=False):
     """Modifica la calificación de un estudiante en una materia."""
-    query = ('UPDATE record SET nota = %s, periodo = %s '
-             'WHERE ci_estudiante = %s AND id_materia = %s')
-    return execute_sql(query, args=[nota, periodo, ci, materia_id])
+    args = [nota, periodo, ci, materia_id]
+    if test:
+        return execute_sql(UPDATE_RECORD, args=args, test=test)
+    lock = db.current_backend().name == 'mysql'
+    with db.transaction():
+        # El período anterior también cambia si la calificación se mueve
+        anterior = execute_sql(select_records_by_key_query(1, lock),
+                               [ci, materia_id])
+        result = execute_sql(UPDATE_RECORD, args=args)
+        refresh_summaries(summary_periods(anterior) | {(ci, periodo)})
+    return result
 
 
 def update_records(record):
-    """Modifica las calificaciones de varias materias y estudiantes."""
-    query = ('UPDATE record SET nota = %s, periodo = %s '
-             'WHERE ci_estudiante = %s AND id_materia = %s')
-    args = [(r['nota'], r['periodo'], r['ci_estudiante'], r['id_materia'])
-            for r in record]
-    return execute_sql(query, args, many=True)
+    """Modifica las calificaciones de varias materias y estudiantes.
+
+    Las calificaciones se aplican en lotes (ver record_chunks()), con
+    una sola petición UPDATE por lote que las cruza con la tabla, y
+    todos los lotes en una sola transacción. Si una materia de un
+    estudiante aparece varias veces, se aplica la última.
+
+    Devuelve el número de registros cuya calificación o período
+    realmente cambió.
+    """
+    # Conservar solo la última modificación de cada registro
+    record = {(r['ci_estudiante'], r['id_materia']): r for r in record}
+    chunks = record_chunks(record.values(), db.statement_limits(),
+                           read_config().getint('bulk', 'chunk_rows'))
+    dialect = db.current_backend().name
+    lock = dialect == 'mysql'
+    changed = 0
+    periodos = set()
+    with db.transaction():
+        for chunk in chunks:
+            # Los períodos anteriores y nuevos de las calificaciones
+            keys = [(r['ci_estudiante'], r['id_materia']) for r in chunk]
+            periodos.update(summary_periods(execute_sql(
+                select_records_by_key_query(len(keys), lock),
+                [value for key in keys for value in key])))
+            periodos.update(summary_periods(chunk))
+            changed += execute_sql(update_records_query(len(chunk), dialect),
+                                   insert_records_args(chunk), rows=0)
+        if changed:
+            refresh_summaries(periodos)
+    return changed
+
+
+def update_records_query(n, dialect):
+    """Genera la petición de modificación de n calificaciones.
+
+    Las nuevas calificaciones se incluyen en la petición como una
+    tabla derivada, con la sintaxis del motor indicado (ver
+    UPDATE_RECORDS).
+    """
+    if dialect == 'mysql':
+        first = ('SELECT ' + ', '.join(f'%s AS {column}'
+                                       for column in RECORD_COLUMNS))
+        other = f' UNION ALL SELECT {db.in_placeholders(len(RECORD_COLUMNS))}'
+        rows = first + other * (n - 1)
+    else:
+        row = f'({db.in_placeholders(len(RECORD_COLUMNS))})'
+        rows = ', '.join([row] * n)
+    return UPDATE_RECORDS[dialect].format(rows=rows)
 
 
 def delete_record(ci, materia_id, test=False):
     """Elimina la calificación de un estudiante en una materia."""
-    query = 'DELETE FROM record WHERE ci_estudiante = %s AND id_materia = %s'
-    return execute_sql(query, args=[ci, materia_id], test=test)
+    if test:
+        return execute_sql(DELETE_RECORD, args=[ci, materia_id], test=test)
+    lock = db.current_backend().name == 'mysql'
+    with db.transaction():
+        deleted = execute_sql(select_records_by_key_query(1, lock),
+                              [ci, materia_id])
+        result = execute_sql(DELETE_RECORD, args=[ci, materia_id])
+        refresh_summaries(summary_periods(deleted))
+    return result
 
 
 def delete_records(record):
-    """Elimina las calificaciones de varias materias y estudiantes."""
-    query = 'DELETE FROM record WHERE ci_estudiante = %s AND id_materia = %s'
-    args = [(r['ci_estudiante'], r['id_materia']) for r in record]
-    return execute_sql(query, args, many=True)
+    """Elimina las calificaciones de varias materias y estudiantes.
+
+    Los registros se eliminan en lotes, con una sola petición DELETE
+    por lote que los identifica por su clave primaria (ver
+    key_chunks()), y todos los lotes en una sola transacción.
+
+    Devuelve la lista de registros eliminados, con todos sus datos,
+    para dejar constancia de ellos.
+    """
+    keys = sorted({(r['ci_estudiante'], r['id_materia']) for r in record})
+    limits = db.statement_limits()
+    lock = db.current_backend().name == 'mysql'
+    deleted = []
+    with db.transaction():
+        for chunk in key_chunks(keys, limits,
+                                read_config().getint('bulk', 'chunk_rows')):
+            n = len(chunk)
+            args = [value for key in chunk for value in key]
+            query = select_records_by_key_query(n, lock)
+            deleted.extend(execute_sql(query, args))
+            query = delete_records_by_key_query(n)
+            execute_sql(query, args)
+        refresh_summaries(summary_periods(deleted))
+    return deleted
+
+
+def key_chunks(keys, limits, chunk_rows=1000, width=2):
+    """Divide claves en lotes para una cláusula IN.
+
+    Cada clave ocupa width parámetros de la petición (por ejemplo, dos
+    para la clave primaria de record). El tamaño de los lotes es el
+    menor entre chunk_rows y el límite de parámetros del servidor.
+    """
+    keys = list(keys)
+    size = chunk_rows
+    if limits.get('max_params'):
+        size = min(size, limits['max_params'] // width)
+    size = max(size, 1)
+    for i in range(0, len(keys), size):
+        yield keys[i:i+size]
+
+
+def in_chunk_statements(build, values, limits, prefix=()):
+    """Divide una consulta con una cláusula IN en varias peticiones.
+
+    Cada lote tiene hasta `in_chunk_size` valores (sección [bulk]).
+    build(n) genera la petición para n valores, y prefix son los
+    parámetros que preceden a la lista. Devuelve la lista de pares
+    (petición, parámetros).
+    """
+    size = read_config().getint('bulk', 'in_chunk_size')
+    statements = []
+    for chunk in key_chunks(values, limits, size, width=1):
+        statements.append((build(len(chunk)), [*prefix, *chunk]))
+    return statements
+
+
+def execute_in_chunks(build, values, prefix=(), test=False):
+    """Realiza una consulta con una cláusula IN dividida en lotes.
+
+    Los lotes (ver in_chunk_statements()) se consultan con hasta
+    `concurrency` conexiones a la vez (sección [bulk]), y sus filas se
+    devuelven juntas, en el orden de los lotes.
+    """
+    statements = in_chunk_statements(build, values,
+                                     db.statement_limits(), prefix)
+    concurrency = read_config().getint('bulk', 'concurrency')
+    results = db.execute_chunks(statements, concurrency, test=test)
+    return [row for result in results for row in result or ()]
+
+
+def unique_keys(values):
+    """Elimina los códigos repetidos de una lista, conservando su orden.
+
+    Devuelve un diccionario {código normalizado: primer código dado},
+    con la normalización del catálogo (ver catalog.key()).
+    """
+    keys = {}
+    for value in values:
+        keys.setdefault(catalog.key(value), value)
+    return keys
+
+
+def records_by_key(n):
+    """Genera la condición que identifica n registros por su clave."""
+    keys = ', '.join(['(%s, %s)'] * n)
+    return f'(ci_estudiante, id_materia) IN ({keys})'
+
+
+def select_records_by_key_query(n, lock=False):
+    """Genera la petición de consulta de n registros por su clave.
+
+    Si lock es verdadero, los registros se bloquean (FOR UPDATE) hasta
+    el final de la transacción.
+    """
+    query = (f'SELECT {", ".join(RECORD_COLUMNS)} FROM record '
+             f'WHERE {records_by_key(n)}')
+    if lock:
+        query += ' FOR UPDATE'
+    return query
+
+
+def delete_records_by_key_query(n):
+    """Genera la petición de eliminación de n registros por su clave."""
+    return f'DELETE FROM record WHERE {records_by_key(n)}'
+
+
+def find_records(materia_id=None, periodo=None, ci=None, test=False):
+    """Consulta los registros que cumplen las condiciones dadas.
+
+    Las condiciones son las mismas de delete_records_where(), por lo
+    que permite revisar los registros antes de eliminarlos.
+    """
+    where, args = records_where(materia_id, periodo, ci)
+    return execute_sql(f'SELECT {", ".join(RECORD_COLUMNS)} FROM record '
+                       f'WHERE {where} ORDER BY ci_estudiante, id_materia',
+                       args, test=test, read=True)
+
+
+def delete_records_where(materia_id=None, periodo=None, ci=None):
+    """Elimina los registros que cumplen las condiciones dadas.
+
+    Por ejemplo, delete_records_where(materia_id='MAT101',
+    periodo='2020-01') elimina todas las calificaciones de una sección.
+    La eliminación se hace en el servidor con una sola petición, en la
+    misma transacción que la consulta de los registros eliminados.
+
+    Devuelve la lista de registros eliminados.
+    """
+    where, args = records_where(materia_id, periodo, ci)
+    lock = ' FOR UPDATE' if db.current_backend().name == 'mysql' else ''
+    with db.transaction():
+        deleted = execute_sql(f'SELECT {", ".join(RECORD_COLUMNS)} '
+                              f'FROM record WHERE {where}{lock}', args)
+        execute_sql(f'DELETE FROM record WHERE {where}', args)
+        refresh_summaries(summary_periods(deleted))
+    return deleted
+
+
+def records_where(materia_id=None, periodo=None, ci=None):
+    """Genera la condición y los parámetros de una consulta de record.
+
+    Se requiere al menos una condición, para evitar eliminar todos los
+    registros por error.
+    """
+    conditions = []
+    args = []
+    for column, value in (('id_materia', materia_id),
+                          ('periodo', periodo),
+                          ('ci_estudiante', ci)):
+        if value is not None:
+            conditions.append(f'{column} = %s')
+            args.append(value)
+    if not conditions:
+        raise ValueError('Se requiere al menos una condición.')
+    return ' AND '.join(conditions), args
+
+
+def iter_records(batch_size=None):
+    """Recorre todos los registros de calificaciones de forma incremental."""
+    return iter_sql(ITER_RECORDS, batch_size=batch_size)
+
+
+def iter_career_records(carrera_id, batch_size=None):
+    """Recorre las calificaciones de los estudiantes de una carrera."""
+    return iter_sql(ITER_CAREER_RECORDS, args=[carrera_id],
+                    batch_size=batch_size)
 
 
 # Tabla usuario
 
 def authenticate_user(usuario_id, usuario_pw, test=False):
     """Trata de encontrar la combinación dada de usuario y contraseña."""
-    query = 'SELECT * FROM usuario WHERE id = %s AND password = %s'
-    return execute_sql(query, args=[usuario_id, usuario_pw], rows=1)
+    return execute_sql(AUTHENTICATE_USER, args=[usuario_id, usuario_pw],
+                       rows=1, read=True)
 
 
 # Tabla estudiante
 
 def find_student_by_username(usuario_id, test=False):
     """Consulta toda la información de un estudiante según su usuario."""
-    query = 'SELECT * FROM estudiante WHERE id_usuario = %s'
-    return execute_sql(query, args=[usuario_id], rows=1, test=test)
+    return execute_sql(FIND_STUDENT_BY_USERNAME, args=[usuario_id], rows=1,
+                       test=test, read=True)
 
 
 def find_student_by_ci(ci, test=False):
     """Consulta toda la información de un estudiante según su cédula."""
-    query = 'SELECT * FROM estudiante  WHERE ci = %s'
-    return execute_sql(query, args=[ci], rows=1, test=test)
+    return execute_sql(FIND_STUDENT_BY_CI, args=[ci], rows=1, test=test,
+                       read=True)
 
 
 def find_students(ci_list, test=False):
-    """Consulta estudiantes por su número de cédula."""
-    query = ('SELECT * FROM estudiante WHERE ci IN ('
-             + ', '.join(['%s' for ci in ci_list]) + ')')
-    return execute_sql(query, args=ci_list, test=test)
+    """Consulta estudiantes por su número de cédula.
+
+    Las listas largas se consultan en lotes (ver execute_in_chunks()).
+    Los estudiantes se devuelven en el orden de las cédulas dadas, sin
+    repetirlos.
+    """
+    if not ci_list:
+        return ()
+    keys = unique_keys(ci_list)
+    rows = execute_in_chunks(find_students_query,
+                             list(keys.values()), test=test)
+    found = {catalog.key(row['ci']): row for row in rows}
+    return [found[k] for k in keys if k in found]
+
+
+def find_students_query(n):
+    """Genera la petición de consulta de n estudiantes."""
+    return f'SELECT * FROM estudiante WHERE ci IN ({db.in_placeholders(n)})'
+
+
+def find_students_page(carrera_id=None, after=None, limit=100, test=False):
+    """Consulta una página de estudiantes, o de los de una carrera.
+
+    Los estudiantes se ordenan por cédula (clave primaria). La página
+    empieza después de la cédula after, obtenida de la última fila de
+    la página anterior con student_page_key(), y tiene hasta limit
+    filas.
+    """
+    args = []
+    if carrera_id is not None:
+        args.append(carrera_id)
+    if after is not None:
+        args.append(after)
+    args.append(limit)
+    query = find_students_page_query(carrera_id is not None,
+                                     after is not None)
+    return execute_sql(query, args, test=test, read=True)
+
+
+def find_students_page_query(por_carrera, after):
+    """Genera la petición de consulta de una página de estudiantes."""
+    conditions = []
+    if por_carrera:
+        conditions.append('id_carrera = %s')
+    if after:
+        conditions.append('ci > %s')
+    query = 'SELECT * FROM estudiante'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    return query + ' ORDER BY ci LIMIT %s'
+
+
+def student_page_key(row):
+    """Obtiene la clave de paginación de una fila de find_students_page()."""
+    return row['ci']
+
+
+def iter_students(carrera_id=None, batch_size=None):
+    """Recorre todos los estudiantes, o los de una carrera, en orden."""
+    if carrera_id is None:
+        return iter_sql(ITER_STUDENTS, batch_size=batch_size)
+    return iter_sql(ITER_CAREER_STUDENTS, args=[carrera_id],
+                    batch_size=batch_size)
 
 
 # Tabla carrera
 
 def read_career_info(carrera_id, test=False):
-    """Consulta la información de una carrera según su código."""
-    query = 'SELECT * FROM carrera WHERE id = %s'
-    return execute_sql(query, args=[carrera_id], rows=1, test=test)
+    """Consulta la información de una carrera según su código.
+
+    Se sirve desde la caché del catálogo (ver el módulo catalog),
+    excepto en modo de prueba.
+    """
+    if not test:
+        return catalog.get_catalog().read_career_info(carrera_id)
+    return execute_sql(READ_CAREER_INFO, args=[carrera_id], rows=1,
+                       test=test, read=True)
 
 
 # Tabla materia
 
 def find_subject(materia_id, test=False):
-    """Consulta la información de una materia por su código."""
-    query = 'SELECT * FROM materia WHERE id = %s'
-    return execute_sql(query, args=[materia_id], rows=1, test=test)
+    """Consulta la información de una materia por su código.
+
+    Se sirve desde la caché del catálogo, excepto en modo de prueba.
+    """
+    if not test:
+        return catalog.get_catalog().find_subject(materia_id)
+    return execute_sql(FIND_SUBJECT, args=[materia_id], rows=1, test=test,
+                       read=True)
 
 
 def find_subjects(materia_ids, test=False):
-    """Consulta la información de varias materias."""
-    query = ('SELECT * FROM materia WHERE id IN ('
-             + ', '.join(['%s' for m in materia_ids]) + ')')
-    return execute_sql(query, args=materia_ids, test=test)
+    """Consulta la información de varias materias.
+
+    Se sirve desde la caché del catálogo, excepto en modo de prueba.
+    """
+    if not materia_ids:
+        return ()
+    if not test:
+        return catalog.get_catalog().find_subjects(materia_ids)
+    return execute_in_chunks(find_subjects_query,
+                             list(unique_keys(materia_ids).values()),
+                             test=test)
+
+
+def find_subjects_query(n):
+    """Genera la petición de consulta de n materias."""
+    return f'SELECT * FROM materia WHERE id IN ({db.in_placeholders(n)})'
 
 
 # Tabla materia_carrera
 
 def find_career_subject(carrera_id, materia_id, test=False):
-    """Consulta una materia en una carrera por su código"""
-    query = ('SELECT id_materia FROM materia_carrera '
-             'WHERE id_carrera = %s AND id_materia = %s')
+    """Consulta una materia en una carrera por su código.
+
+    Se sirve desde la caché del catálogo, excepto en modo de prueba.
+    """
+    if not test:
+        found = catalog.get_catalog().find_career_subjects(carrera_id,
+                                                           [materia_id])
+        return found[0] if found else None
     args = [carrera_id, materia_id]
-    return execute_sql(query, args, rows=1, test=test)
+    return execute_sql(FIND_CAREER_SUBJECT, args, rows=1, test=test,
+                       read=True)
 
 
 def find_career_subjects(carrera_id, materia_ids, test=False):
-    """Consulta materias en una carrera por su código."""
-    query = ('SELECT id_materia FROM materia_carrera WHERE id_carrera = %s '
-             + 'AND id_materia IN ('
-             + ', '.join(['%s' for materia in materia_ids]) + ')')
-    args = [carrera_id]
-    args.extend(materia_ids)
-    return execute_sql(query, args, test=test)
+    """Consulta materias en una carrera por su código.
+
+    Se sirve desde la caché del catálogo, excepto en modo de prueba.
+    """
+    if not materia_ids:
+        return ()
+    if not test:
+        return catalog.get_catalog().find_career_subjects(carrera_id,
+                                                          materia_ids)
+    return execute_in_chunks(find_career_subjects_query,
+                             list(unique_keys(materia_ids).values()),
+                             prefix=[carrera_id], test=test)
+
+
+def find_career_subjects_query(n):
+    """Genera la petición de consulta de n materias de una carrera."""
+    return ('SELECT id_materia FROM materia_carrera WHERE id_carrera = %s '
+            f'AND id_materia IN ({db.in_placeholders(n)})')
 
 
 # Múltiples tablas
 
 def find_subjects_not_taken_by_student(ci_estudiante, test=False):
     """Consulta materias que no han sido cursadas por el estudiante."""
-    query = ('SELECT id_materia FROM materia_carrera WHERE id_carrera = '
-             '(SELECT id_carrera FROM estudiante WHERE ci = %(ci)s) AND '
-             'id_materia NOT IN (SELECT id_materia FROM record '
-             'WHERE ci_estudiante = %(ci)s)')
-    return execute_sql(query, args={'ci': ci_estudiante}, test=test)
+    return execute_sql(FIND_SUBJECTS_NOT_TAKEN_BY_STUDENT,
+                       args={'ci': ci_estudiante}, test=test, read=True)
+
+
+def find_subjects_not_taken_by_students(ci_list, test=False):
+    """Consulta las materias no cursadas por cada uno de los estudiantes.
+
+    Equivale a llamar find_subjects_not_taken_by_student() para cada
+    cédula, pero con una sola petición por lote de estudiantes (ver
+    execute_in_chunks()). Devuelve un diccionario {cédula: conjunto de
+    materias}; las cédulas que no corresponden a ningún estudiante, o
+    cuyos estudiantes no tienen materias por cursar, no se incluyen.
+    """
+    rows = execute_in_chunks(find_subjects_not_taken_by_students_query,
+                             sorted(set(ci_list)), test=test)
+    por_cursar = {}
+    for row in rows:
+        por_cursar.setdefault(row['ci'], set()).add(row['id_materia'])
+    return por_cursar
+
+
+def find_subjects_not_taken_by_students_query(n):
+    """Genera la petición de materias no cursadas por n estudiantes.
+
+    Cruza las materias de la carrera de cada estudiante con su récord
+    y conserva las que no tienen registro (anti-join).
+    """
+    return ('SELECT estudiante.ci, materia_carrera.id_materia '
+            'FROM estudiante INNER JOIN materia_carrera '
+            'ON materia_carrera.id_carrera = estudiante.id_carrera '
+            'LEFT JOIN record ON record.ci_estudiante = estudiante.ci '
+            'AND record.id_materia = materia_carrera.id_materia '
+            f'WHERE estudiante.ci IN ({db.in_placeholders(n)}) '
+            'AND record.ci_estudiante IS NULL')
+
+
+def academic_summary(ci, test=False):
+    """Calcula los índices académicos de un estudiante.
+
+    Devuelve un diccionario con el número de materias y UC cursadas
+    ('materias', 'uc') y aprobadas ('materias_aprobadas',
+    'uc_aprobadas'), la suma de las notas ponderadas por sus UC
+    ('suma_ponderada'), el índice académico acumulado ('iaa') y el
+    índice académico parcial de cada período ('iap': {período:
+    índice}). Ver academic_summaries().
+    """
+    query = academic_summaries_query(1)
+    rows = execute_sql(query, [ci], test=test, read=True)
+    summaries = fold_academic_summaries(rows or ())
+    return next(iter(summaries.values()), empty_academic_summary())
+
+
+def academic_summaries(ci_list, test=False):
+    """Calcula los índices académicos de varios estudiantes.
+
+    Los índices se calculan a partir de la tabla de resumen por
+    período (ver refresh_summaries()), consultada con una petición por
+    lote de estudiantes (ver execute_in_chunks()), que devuelve una
+    fila por estudiante y período en lugar de una por calificación.
+    Devuelve un diccionario {cédula: resumen} (ver
+    academic_summary()); los estudiantes sin calificaciones no se
+    incluyen.
+    """
+    rows = execute_in_chunks(academic_summaries_query, sorted(set(ci_list)),
+                             test=test)
+    return fold_academic_summaries(rows)
+
+
+def academic_summaries_query(n):
+    """Genera la petición de consulta del resumen de n estudiantes.
+
+    Devuelve, por estudiante y período, el número de materias y UC
+    cursadas y aprobadas y la suma de las notas ponderadas.
+    """
+    return ('SELECT ci_estudiante AS ci, periodo, '
+            f'{", ".join(SUMMARY_COLUMNS)} '
+            'FROM estudiante_resumen_periodo '
+            f'WHERE ci_estudiante IN ({db.in_placeholders(n)})')
+
+
+def empty_academic_summary():
+    """Crea el resumen académico de un estudiante sin calificaciones."""
+    return {'materias': 0, 'uc': 0, 'materias_aprobadas': 0,
+            'uc_aprobadas': 0, 'suma_ponderada': 0, 'iaa': None, 'iap': {}}
+
+
+def fold_academic_summaries(rows):
+    """Reúne las filas de academic_summaries_query() por estudiante."""
+    summaries = {}
+    for row in rows:
+        summary = summaries.get(row['ci'])
+        if summary is None:
+            summary = summaries[row['ci']] = empty_academic_summary()
+        # MySQL devuelve las sumas como decimales
+        uc = int(row['uc'])
+        suma_ponderada = int(row['suma_ponderada'])
+        summary['materias'] += int(row['materias'])
+        summary['uc'] += uc
+        summary['materias_aprobadas'] += int(row['materias_aprobadas'])
+        summary['uc_aprobadas'] += int(row['uc_aprobadas'])
+        summary['suma_ponderada'] += suma_ponderada
+        summary['iap'][row['periodo']] = academic_index(suma_ponderada, uc)
+    for summary in summaries.values():
+        summary['iaa'] = academic_index(summary['suma_ponderada'],
+                                        summary['uc'])
+    return summaries
+
+
+def academic_index(suma_ponderada, suma_uc):
+    """Calcula un índice académico a partir de sus sumas.
+
+    Devuelve None si no hay UC cursadas.
+    """
+    if suma_uc == 0:
+        return None
+    return round(suma_ponderada/suma_uc, 2)
+
+
+def academic_ranking(carrera_id=None, limit=10, test=False):
+    """Consulta los estudiantes con mayor IAA, o los de una carrera.
+
+    Se consulta la tabla de resumen por estudiante, sin agregar sus
+    calificaciones. Cada fila incluye la cédula, el nombre y el
+    apellido del estudiante, sus UC cursadas y su IAA.
+    """
+    args = [carrera_id] if carrera_id is not None else []
+    args.append(limit)
+    query = academic_ranking_query(carrera_id is not None)
+    rows = execute_sql(query, args, test=test, read=True)
+    for row in rows or ():
+        row['iaa'] = academic_index(int(row.pop('suma_ponderada')),
+                                    int(row['uc']))
+    return rows
+
+
+def academic_ranking_query(por_carrera):
+    """Genera la petición de consulta de los estudiantes con mayor IAA."""
+    query = ('SELECT estudiante.ci, estudiante.nombre, estudiante.apellido, '
+             'resumen.uc, resumen.suma_ponderada '
+             'FROM estudiante_resumen AS resumen INNER JOIN estudiante '
+             'ON estudiante.ci = resumen.ci_estudiante '
+             'WHERE resumen.uc > 0')
+    if por_carrera:
+        query += ' AND estudiante.id_carrera = %s'
+    # En SQLite, la división de dos enteros es entera
+    return query + (' ORDER BY resumen.suma_ponderada * 1.0 / resumen.uc '
+                    'DESC, estudiante.ci LIMIT %s')
+
+
+def refresh_summaries(periodos):
+    """Actualiza el resumen académico de los pares (cédula, período) dados.
+
+    Las funciones de modificación de record la llaman en su misma
+    transacción con los pares afectados (ver summary_periods()).
+    """
+    statements = refresh_summaries_statements(periodos,
+                                              db.statement_limits())
+    with db.transaction():
+        for query, args in statements:
+            execute_sql(query, args)
+
+
+def summary_periods(record):
+    """Obtiene los pares (cédula, período) de varias calificaciones."""
+    return {(r['ci_estudiante'], r['periodo']) for r in record}
+
+
+def refresh_summaries_statements(periodos, limits):
+    """Genera las peticiones de refresh_summaries(), por lotes."""
+    size = read_config().getint('bulk', 'in_chunk_size')
+    statements = []
+    for chunk in key_chunks(sorted(set(periodos)), limits, size):
+        ci_list = sorted({ci for ci, periodo in chunk})
+        args = [value for key in chunk for value in key]
+        delete_periods, insert_periods, delete, insert = (
+            refresh_summaries_queries(len(chunk), len(ci_list)))
+        statements.extend([(delete_periods, args), (insert_periods, args),
+                           (delete, ci_list), (insert, ci_list)])
+    return statements
+
+
+def refresh_summaries_queries(n_periodos, n_estudiantes):
+    """Genera las peticiones de actualización del resumen.
+
+    Se eliminan y se vuelven a calcular las filas de n_periodos pares
+    (cédula, período), y luego las de sus n_estudiantes estudiantes.
+    """
+    pairs = ', '.join(['(%s, %s)'] * n_periodos)
+    periods = f'(ci_estudiante, periodo) IN ({pairs})'
+    students = f'ci_estudiante IN ({db.in_placeholders(n_estudiantes)})'
+    return (f'DELETE FROM estudiante_resumen_periodo WHERE {periods}',
+            INSERT_PERIOD_SUMMARIES.format(
+                where=f'WHERE (record.ci_estudiante, record.periodo) '
+                      f'IN ({pairs}) '),
+            f'DELETE FROM estudiante_resumen WHERE {students}',
+            INSERT_SUMMARIES.format(where=f'WHERE {students} '))
+
+
+def rebuild_summaries():
+    """Reconstruye por completo las tablas de resumen académico.
+
+    Es necesario si se modifican las calificaciones fuera del programa
+    o las UC de alguna materia. Devuelve el número de estudiantes con
+    resumen.
+    """
+    with db.transaction():
+        execute_sql('DELETE FROM estudiante_resumen')
+        execute_sql('DELETE FROM estudiante_resumen_periodo')
+        execute_sql(INSERT_PERIOD_SUMMARIES.format(where=''))
+        return execute_sql(INSERT_SUMMARIES.format(where=''), rows=0)
@@ -2,63 +2,691 @@
 """Módulo de manejo de base datos.
 
 Este módulo provee las funciones básicas de interacción con la
-base de datos MySQL: una función para conectarse a la base de datos
-usando los datos del archivo de configuración, y una función para
-realizar peticiones SQL y obtener su resultado.
+base de datos: una función para conectarse a la base de datos
+usando el motor (ver el módulo backends) y los datos del archivo de
+configuración, un conjunto (pool) de conexiones reutilizables, un
+administrador de transacciones que permite agrupar varias
+peticiones, una función para realizar peticiones SQL y obtener su
+resultado, y otra para recorrer resultados grandes de forma
+incremental.
+
+Si la configuración incluye réplicas de lectura de MySQL (sección
+`[replicas]`), las consultas marcadas como lecturas se reparten entre
+ellas, y las modificaciones y las transacciones usan el servidor
+principal.
 """
 
 
-import pymysql
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from . import stats
+from .backends import get_backend
 from .config import read_config
 
 
-def connect():
-    """Crea una conexión a la base de datos indicada en la configuración."""
-    mysql_conf = read_config()['mysql']
-    return pymysql.connect(host=mysql_conf['host'],
-                           user=mysql_conf['user'],
-                           password=mysql_conf['password'],
-                           database=mysql_conf['database'],
-                           charset='utf8',
-                           cursorclass=pymysql.cursors.DictCursor)
+def current_backend():
+    """Obtiene el motor de base de datos indicado en la configuración."""
+    return get_backend(read_config().get('db', 'driver'))
+
+
+def connect(replica=None):
+    """Crea una conexión a la base de datos indicada en la configuración.
+
+    Si se indica una réplica (par host, puerto), la conexión se hace a
+    ella en lugar del servidor principal.
+    """
+    settings = read_config()
+    return get_backend(settings.get('db', 'driver')).connect(settings,
+                                                             replica)
+
+
+class ConnectionPool:
+    """Conjunto de conexiones reutilizables a la base de datos.
+
+    El pool mantiene como máximo `size` conexiones abiertas. Las
+    conexiones inactivas por más de `idle_timeout` segundos se cierran,
+    y las que llevan más de `ping_after` segundos inactivas se verifican
+    (ping) antes de entregarse. Cada hilo reutiliza preferentemente la
+    última conexión que devolvió al pool.
+    """
+
+    def __init__(self, factory=connect, size=5, idle_timeout=300,
+                 checkout_timeout=None, errors=(), ping_after=0):
+        """Inicializa el pool con la función de conexión dada."""
+        self.factory = factory
+        # Excepciones tras las cuales una conexión se descarta
+        self.errors = errors
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.ping_after = ping_after
+        self.closed = False
+        # Conexiones disponibles: pares (conexión, último uso)
+        self._idle = []
+        # Número de conexiones abiertas (disponibles o en uso)
+        self._open = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def acquire(self, timeout=None):
+        """Obtiene una conexión del pool, creándola si es necesario."""
+        if timeout is None:
+            timeout = self.checkout_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._close_expired()
+                connection, last_used = self._take_idle()
+                if connection is not None:
+                    break
+                if self._open < self.size:
+                    # Reserva el cupo antes de conectarse fuera del candado
+                    self._open += 1
+                    connection = None
+                    break
+                # Esperar a que otro hilo devuelva una conexión
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            'No hay conexiones disponibles en el pool.')
+                self._cond.wait(remaining)
+        if connection is None:
+            return self._create()
+        if time.monotonic() - last_used < self.ping_after:
+            # Conexión usada hace poco: se entrega sin verificarla
+            return connection
+        return self._check(connection)
+
+    def release(self, connection, discard=False):
+        """Devuelve una conexión al pool o la descarta si está dañada."""
+        with self._cond:
+            if discard or self.closed or not connection.open:
+                self._open -= 1
+                self._safe_close(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+                # Recordar la conexión para reutilizarla en este hilo
+                self._local.connection = connection
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Provee una conexión del pool durante un bloque with."""
+        connection = self.acquire()
+        discard = False
+        try:
+            yield connection
+        except self.errors:
+            # Los errores de conexión dejan la conexión inutilizable
+            discard = True
+            raise
+        finally:
+            self.release(connection, discard)
+
+    def close(self):
+        """Cierra el pool y todas sus conexiones disponibles.
+
+        Las conexiones que estén en uso se cierran al ser devueltas.
+        """
+        with self._cond:
+            self.closed = True
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._open -= 1
+                self._safe_close(connection)
+            self._cond.notify_all()
+
+    def _take_idle(self):
+        """Extrae una conexión disponible, prefiriendo la del hilo actual.
+
+        Devuelve el par (conexión, último uso), o (None, None) si no hay
+        conexiones disponibles.
+        """
+        if not self._idle:
+            return None, None
+        preferred = getattr(self._local, 'connection', None)
+        for i, (connection, _) in enumerate(self._idle):
+            if connection is preferred:
+                return self._idle.pop(i)
+        # Tomar la conexión usada más recientemente
+        return self._idle.pop()
+
+    def _close_expired(self):
+        """Cierra las conexiones que llevan demasiado tiempo inactivas."""
+        limit = time.monotonic() - self.idle_timeout
+        alive = []
+        for connection, last_used in self._idle:
+            if last_used < limit:
+                self._open -= 1
+                self._safe_close(connection)
+            else:
+                alive.append((connection, last_used))
+        self._idle = alive
+
+    def _create(self):
+        """Crea una nueva conexión, liberando su cupo si falla."""
+        try:
+            return self.factory()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def _check(self, connection):
+        """Verifica que la conexión siga viva; si no, la reconecta."""
+        try:
+            connection.ping(reconnect=True)
+        except Exception:
+            # La conexión no se pudo recuperar: reemplazarla por una nueva
+            self._safe_close(connection)
+            return self._create()
+        return connection
+
+    @staticmethod
+    def _safe_close(connection):
+        """Cierra la conexión ignorando errores de red."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class ReplicaSet:
+    """Conjunto de réplicas de lectura, cada una con su propio pool.
+
+    Las réplicas se eligen por turnos (round-robin). Una réplica que
+    falla al conectarse se excluye durante `eject_time` segundos, tras
+    los cuales se vuelve a intentar.
+    """
+
+    def __init__(self, replicas, pool_factory, eject_time=30):
+        """Inicializa el conjunto con las réplicas (host, puerto) dadas."""
+        self.replicas = list(replicas)
+        self.eject_time = eject_time
+        self.pools = {replica: pool_factory(replica)
+                      for replica in self.replicas}
+        # Momento hasta el cual cada réplica excluida no se usa
+        self._ejected = {}
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Elige la siguiente réplica disponible, o None si no hay."""
+        with self._lock:
+            now = time.monotonic()
+            for replica, until in list(self._ejected.items()):
+                if until <= now:
+                    # Ya pasó el tiempo de exclusión: volver a intentar
+                    del self._ejected[replica]
+            available = [replica for replica in self.replicas
+                         if replica not in self._ejected]
+            if not available:
+                return None
+            return available[next(self._turn) % len(available)]
+
+    def eject(self, replica):
+        """Excluye temporalmente una réplica que falló."""
+        with self._lock:
+            self._ejected[replica] = time.monotonic() + self.eject_time
 
+    def close(self):
+        """Cierra los pools de todas las réplicas."""
+        for pool in self.pools.values():
+            pool.close()
 
-def execute_sql(query, args=None, rows=None, many=False, test=False):
+
+_pool = None
+_replicas = None
+_pool_settings = None
+_pool_lock = threading.Lock()
+
+
+def parse_replicas(value):
+    """Convierte la lista de réplicas de la configuración en pares.
+
+    Cada réplica se indica como host o host:puerto, separadas por
+    comas; el puerto predeterminado es 3306.
+    """
+    replicas = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append((host, int(port) if port else 3306))
+    return replicas
+
+
+def get_pool():
+    """Obtiene el pool de conexiones del programa, creándolo si no existe.
+
+    Si la configuración cambió desde la creación del pool, el pool
+    anterior se cierra y se crea uno nuevo con los nuevos parámetros.
+    """
+    _refresh_pools()
+    return _pool
+
+
+def get_replicas():
+    """Obtiene el conjunto de réplicas de lectura, o None si no hay."""
+    _refresh_pools()
+    return _replicas
+
+
+def _refresh_pools():
+    """Crea el pool y las réplicas, o los recrea si hay cambios."""
+    global _pool, _replicas, _pool_settings
+    settings = read_config()
+    if _pool is not None and _pool_settings is settings:
+        return
+    with _pool_lock:
+        if _pool is not None and _pool_settings is settings:
+            return
+        if _pool is not None:
+            _pool.close()
+        if _replicas is not None:
+            _replicas.close()
+        driver = settings.get('db', 'driver')
+        backend = get_backend(driver)
+        new_pool = partial(
+            ConnectionPool,
+            errors=backend.connection_errors,
+            size=settings.getint('pool', 'size'),
+            idle_timeout=settings.getfloat('pool', 'idle_timeout'),
+            checkout_timeout=settings.getfloat('pool', 'checkout_timeout'),
+            ping_after=settings.getfloat('pool', 'ping_after', 0))
+        _pool = new_pool()
+        replicas = []
+        if driver == 'mysql':
+            # Solo el motor MySQL admite réplicas de lectura
+            replicas = parse_replicas(settings.get('replicas', 'hosts'))
+        _replicas = None
+        if replicas:
+            _replicas = ReplicaSet(
+                replicas,
+                lambda replica: new_pool(factory=partial(connect, replica)),
+                eject_time=settings.getfloat('replicas', 'eject_time'))
+        stats.registry.configure(settings)
+        _pool_settings = settings
+
+
+def close_pool():
+    """Cierra las conexiones del pool del programa y de las réplicas."""
+    global _pool, _replicas, _pool_settings
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if _replicas is not None:
+            _replicas.close()
+            _replicas = None
+        _pool_settings = None
+
+
+def in_placeholders(n):
+    """Genera los marcadores de parámetros de una cláusula IN."""
+    return ', '.join(['%s'] * n)
+
+
+_limits = None
+_limits_settings = None
+
+
+def statement_limits():
+    """Obtiene los límites de tamaño de una petición en el servidor.
+
+    Devuelve el diccionario de Backend.limits(). Los límites se
+    consultan una sola vez mientras la configuración no cambie.
+    """
+    global _limits, _limits_settings
+    settings = read_config()
+    if _limits is None or _limits_settings is not settings:
+        with get_pool().connection() as connection:
+            _limits = current_backend().limits(connection)
+        _limits_settings = settings
+    return _limits
+
+
+class Transaction:
+    """Transacción activa sobre una conexión del pool.
+
+    Todas las peticiones de execute_sql() realizadas dentro de la
+    transacción usan la misma conexión y se confirman una sola vez al
+    final. Las transacciones anidadas se implementan con puntos de
+    guardado (savepoints).
+    """
+
+    def __init__(self, connection):
+        """Inicializa la transacción con la conexión dada."""
+        self.connection = connection
+        # Si la transacción realizó alguna petición que no sea lectura
+        self.wrote = False
+        self._savepoints = 0
+
+    def savepoint(self):
+        """Crea un punto de guardado y devuelve su nombre."""
+        self._savepoints += 1
+        name = f'sp_{self._savepoints}'
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SAVEPOINT {name}')
+        return name
+
+    def rollback_to(self, name):
+        """Deshace los cambios realizados desde el punto de guardado dado."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'ROLLBACK TO SAVEPOINT {name}')
+
+    def release(self, name):
+        """Elimina el punto de guardado dado, conservando sus cambios."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'RELEASE SAVEPOINT {name}')
+
+
+_local = threading.local()
+
+
+def current_transaction():
+    """Obtiene la transacción activa en el hilo actual, si existe."""
+    return getattr(_local, 'transaction', None)
+
+
+@contextmanager
+def transaction():
+    """Agrupa varias peticiones en una sola transacción.
+
+    Uso:
+        with transaction():
+            crud.create_records(...)
+            crud.update_records(...)
+
+    Si el bloque termina normalmente, los cambios se confirman; si
+    ocurre una excepción, se deshacen. Si ya existe una transacción en
+    el hilo actual, el bloque se une a ella mediante un punto de
+    guardado, de modo que un error solo deshace los cambios del bloque.
+    Solo las transacciones con alguna petición que no sea de lectura
+    (read=False en execute_sql()) se anotan como modificaciones del
+    hilo (ver _recent_write()).
+    """
+    tx = current_transaction()
+    if tx is not None:
+        # Transacción anidada: usar un punto de guardado
+        name = tx.savepoint()
+        try:
+            yield tx
+        except BaseException:
+            tx.rollback_to(name)
+            raise
+        tx.release(name)
+        return
+    with get_pool().connection() as connection:
+        # Iniciar la transacción de forma explícita, de modo que los
+        # puntos de guardado anidados queden dentro de ella
+        current_backend().begin(connection)
+        tx = Transaction(connection)
+        _local.transaction = tx
+        try:
+            yield tx
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            connection.commit()
+            if tx.wrote:
+                _mark_write()
+        finally:
+            _local.transaction = None
+
+
+def execute_sql(query, args=None, rows=None, many=False, test=False,
+                read=False):
     """
     Ejecuta una petición SQL y devuelve su resultado.
 
+    Si hay una transacción activa en el hilo actual, la petición se
+    realiza en su conexión y se confirma al terminar la transacción.
+    Las lecturas fuera de una transacción se hacen en una réplica, si
+    hay réplicas configuradas (ver read_pool()).
+
     Argumentos:
         query (str): Petición a realizar
         args (tuple/list/dict): Parámetros de la petición (opc)
-        rows (int or None): Número de filas de resultado (opc).
+        rows (int or None): Número de filas de resultado (opc). Con 0,
+            devuelve el número de filas afectadas por la petición.
         many (bool): Si la petición se hará con varios conjuntos de datos.
         test (bool): Modo de prueba (solo muestra la petición)
+        read (bool): Si la petición solo lee datos (opc).
     """
-    result = None
-    # Crea la conexión a la base de datos
-    connection = connect()
+    start = time.perf_counter()
+    tx = current_transaction()
+    if tx is not None:
+        # Unirse a la transacción activa
+        result = _execute(tx.connection, query, args, rows, many, test)
+        if not read and not test:
+            tx.wrote = True
+    elif read:
+        result = _read(lambda pool: _run(pool, query, args, rows, False,
+                                         test))
+    else:
+        # Toma una conexión del pool
+        result = _run(get_pool(), query, args, rows, many, test)
+        if not test:
+            _mark_write()
+    if not test:
+        stats.registry.record(query, time.perf_counter() - start, result)
+    return result
+
+
+def execute_chunks(statements, concurrency=1, test=False):
+    """
+    Ejecuta varias peticiones de lectura y devuelve sus resultados.
+
+    Sirve para dividir una consulta grande en lotes, por ejemplo una
+    cláusula IN con miles de valores. Con concurrency igual a 1, las
+    peticiones se realizan una tras otra en una sola conexión; con un
+    valor mayor, se reparten entre varias conexiones del pool que se
+    usan al mismo tiempo. En ambos casos, los resultados se devuelven
+    en el orden de las peticiones.
+
+    Argumentos:
+        statements (list): Pares (petición, parámetros)
+        concurrency (int): Máximo de conexiones usadas al mismo tiempo
+        test (bool): Modo de prueba (solo muestra las peticiones)
+    """
+    statements = list(statements)
+    tx = current_transaction()
+    if tx is not None or test:
+        # Las peticiones se unen a la transacción activa, que tiene una
+        # sola conexión, o solo se muestran
+        return [execute_sql(query, args, test=test, read=True)
+                for query, args in statements]
+    caller = stats.find_caller() if stats.enabled() else None
+    # Las lecturas propias deben verse también desde los otros hilos
+    primary = _recent_write()
+    workers = min(concurrency, len(statements), get_pool().size)
+    if workers <= 1:
+        return _read(lambda pool: _run_all(pool, statements, caller),
+                     primary)
+
+    def run_one(statement):
+        """Realiza una de las peticiones en su propia conexión."""
+        return _read(lambda pool: _run_all(pool, [statement], caller),
+                     primary)[0]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_one, statements))
+
+
+def read_pool(primary=False):
+    """Elige el pool en el que se debe hacer una lectura.
+
+    Devuelve un par (pool, réplica). Si no hay réplicas disponibles, si
+    se pide el servidor principal (primary), o si el hilo actual hizo
+    una modificación hace menos de `read_your_writes` segundos, se usa
+    el pool del servidor principal y la réplica es None.
+    """
+    replicas = get_replicas()
+    if replicas is None or primary or _recent_write():
+        return get_pool(), None
+    replica = replicas.choose()
+    if replica is None:
+        # Todas las réplicas están excluidas
+        return get_pool(), None
+    return replicas.pools[replica], replica
+
+
+def _read(run, primary=False):
+    """Realiza una lectura en una réplica o en el servidor principal.
+
+    run es una función que recibe el pool a usar y realiza la lectura.
+    """
+    pool, replica = read_pool(primary)
+    if replica is None:
+        return run(pool)
     try:
-        with connection.cursor() as cursor:
-            if test and not many:
-                # Modo de prueba: imprime la petición solamente.
-                # No funciona con múltiples conjuntos de datos.
-                print(cursor.mogrify(query, args))
-            else:
-                # Ejecuta la petición
-                if many:
-                    cursor.executemany(query, args)
+        return run(pool)
+    except pool.errors:
+        # La réplica no responde: excluirla y leer del servidor principal
+        get_replicas().eject(replica)
+        return run(get_pool())
+
+
+def _run(pool, query, args, rows, many, test):
+    """Realiza una petición en una conexión del pool dado."""
+    with pool.connection() as connection:
+        try:
+            result = _execute(connection, query, args, rows, many, test)
+            # Confirma la transacción
+            connection.commit()
+        except Exception:
+            # Deshace la transacción para devolver la conexión limpia
+            connection.rollback()
+            raise
+    return result
+
+
+def _run_all(pool, statements, caller):
+    """Realiza varias peticiones seguidas en una conexión del pool dado."""
+    results = []
+    with pool.connection() as connection:
+        try:
+            for query, args in statements:
+                start = time.perf_counter()
+                result = _execute(connection, query, args, None, False,
+                                  False)
+                stats.registry.record(query, time.perf_counter() - start,
+                                      result, caller=caller)
+                results.append(result)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return results
+
+
+def _mark_write():
+    """Anota el momento de la última modificación del hilo actual."""
+    _local.last_write = time.monotonic()
+
+
+def _recent_write():
+    """Verifica si el hilo actual debe leer sus propias modificaciones."""
+    last_write = getattr(_local, 'last_write', None)
+    if last_write is None:
+        return False
+    window = read_config().getfloat('replicas', 'read_your_writes', 0)
+    return time.monotonic() - last_write < window
+
+
+def iter_sql(query, args=None, batch_size=None, fetch_size=1000, read=True):
+    """
+    Ejecuta una petición SQL y genera sus resultados de forma incremental.
+
+    Las filas se leen del servidor mediante un cursor sin búfer
+    (SSDictCursor en MySQL), por lo que la memoria usada no depende
+    del tamaño del resultado. La petición usa su propia conexión del
+    pool, fuera de cualquier transacción activa en el hilo actual, y
+    por tratarse de una lectura puede hacerse en una réplica.
+
+    Argumentos:
+        query (str): Petición a realizar
+        args (tuple/list/dict): Parámetros de la petición (opc)
+        batch_size (int or None): Si se indica, genera listas de hasta
+            batch_size filas en lugar de filas individuales (opc).
+        fetch_size (int): Filas leídas del servidor en cada paso (opc).
+        read (bool): Si la petición puede hacerse en una réplica (opc).
+    """
+    # Identificar el origen de la petición antes de empezar a generar
+    caller = stats.find_caller() if stats.enabled() else None
+    return _iter_sql(query, args, batch_size, fetch_size, read, caller)
+
+
+def _iter_sql(query, args, batch_size, fetch_size, read, caller):
+    """Genera los resultados de una petición de iter_sql()."""
+    pool, replica = read_pool() if read else (get_pool(), None)
+    try:
+        connection = pool.acquire()
+    except pool.errors:
+        if replica is None:
+            raise
+        # La réplica no responde: excluirla y leer del servidor principal
+        get_replicas().eject(replica)
+        pool = get_pool()
+        connection = pool.acquire()
+    size = batch_size or fetch_size
+    discard = True
+    start = time.perf_counter()
+    total = 0
+    try:
+        with current_backend().stream_cursor(connection) as cursor:
+            cursor.execute(query, args)
+            while True:
+                batch = cursor.fetchmany(size)
+                if not batch:
+                    break
+                total += len(batch)
+                if batch_size:
+                    yield batch
                 else:
-                    cursor.execute(query, args)
-                # Recoge el número de resultados que se piden
-                if rows is None:
-                    result = cursor.fetchall()
-                elif rows == 1:
-                    result = cursor.fetchone()
-                elif rows > 1:
-                    result = cursor.fetchmany(size=rows)
-        # Confirma la transacción
+                    yield from batch
         connection.commit()
+        discard = False
+        # El tiempo incluye el consumo de las filas por el llamador
+        stats.registry.record(query, time.perf_counter() - start,
+                              caller=caller, rows=total)
     finally:
-        # Cierra la conexión
-        connection.close()
+        # Si el generador no se consumió por completo, la conexión aún
+        # tiene filas pendientes y no se puede reutilizar
+        pool.release(connection, discard)
+
+
+def _execute(connection, query, args, rows, many, test):
+    """Ejecuta una petición en la conexión dada y recoge su resultado."""
+    result = None
+    with connection.cursor() as cursor:
+        if test and not many:
+            # Modo de prueba: imprime la petición solamente.
+            # No funciona con múltiples conjuntos de datos.
+            print(cursor.mogrify(query, args))
+        else:
+            # Ejecuta la petición
+            if many:
+                cursor.executemany(query, args)
+            else:
+                cursor.execute(query, args)
+            # Recoge el número de resultados que se piden
+            if rows is None:
+                result = cursor.fetchall()
+            elif rows == 1:
+                result = cursor.fetchone()
+            elif rows > 1:
+                result = cursor.fetchmany(size=rows)
+            elif rows == 0:
+                result = cursor.rowcount
     return result
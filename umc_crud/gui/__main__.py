@@ -11,9 +11,11 @@ QApplication y ejecuta el controlador del flujo del programa.
 import argparse
 import os
 import sys
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWidgets import QApplication, QMessageBox
 from PyQt5.QtGui import QIcon
+from .. import stats
 from ..config import is_configured
+from ..migrate import is_outdated
 from . import admin, config, login, student, utils
 
 
@@ -49,6 +51,14 @@ class MainController:
         """Muestra la ventana de inicio de sesión."""
         if not is_configured():
             QApplication.instance().exit()
+        if is_outdated():
+            # La estructura de la base de datos es anterior a la que
+            # espera el programa
+            QMessageBox.critical(
+                None, 'Base de datos no actualizada',
+                'La base de datos no está actualizada. Ejecute '
+                'python3 -m umc_crud --migrate antes de continuar.')
+            sys.exit(1)
         self.login = login.LoginDialog()
         self.login.setWindowIcon(self.icon)
         utils.center_window(self.login)
@@ -79,9 +89,15 @@ class MainController:
 
 def main(args):
     """Función principal del programa."""
+    if args['stats']:
+        stats.enable()
     app = QApplication(sys.argv)
     control = MainController(args)
-    sys.exit(app.exec())
+    status = app.exec()
+    if args['stats']:
+        # Mostrar las estadísticas de peticiones SQL al salir
+        stats.print_summary()
+    sys.exit(status)
 
 
 if __name__ == '__main__':
@@ -89,5 +105,8 @@ if __name__ == '__main__':
         description='Sistema CRUD de campus UMC con interfaz gráfica.')
     parser.add_argument('--config', action='store_true',
                         help='Configura la conexión a MySQL')
+    parser.add_argument('--stats', action='store_true',
+                        help='Muestra estadísticas de peticiones SQL '
+                             'al salir')
     args = parser.parse_args()
     main(vars(args))
@@ -13,8 +13,8 @@ componentes y funciones del módulo.
 
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
-from .. import crud
-from ..io import read_csv, split_list, validate_period
+from .. import crud, loader
+from ..io import split_list
 from ..student import calculate_ia
 from . import student, utils
 
@@ -285,6 +285,9 @@ class RecordLoaderWidget(qtw.QWidget):
                 resize_mode = qtw.QHeaderView.Stretch
             self.record_tbl_header.setSectionResizeMode(i, resize_mode)
         main_layout.addWidget(self.record_tbl, stretch=2)
+        # Progreso de la carga del archivo
+        self.progreso = utils.create_label('')
+        main_layout.addWidget(self.progreso)
         # Botón de registro de calificaciones
         registrar_btn = qtw.QPushButton('Registrar')
         registrar_btn.clicked.connect(self._make_records)
@@ -301,12 +304,20 @@ class RecordLoaderWidget(qtw.QWidget):
         if not archivo:
             return
         self.archivo.setText(archivo)
-        # Extraer contenido del CSV
-        csv = read_csv(archivo)
-        # Filtrar las filas que no tengan el número correcto de campos
-        csv = list(filter(lambda row: len(row) == 4, read_csv(archivo)))
-        if not csv:
-            # Si no quedan filas, mostrar error
+        self.record_tbl_model.replace_record([])
+        # Recorrer el archivo por lotes (ver el módulo loader) y agregar
+        # a la tabla las calificaciones nuevas de cada lote
+        progreso = loader.new_progress()
+        try:
+            for lote in loader.iter_new_records(archivo, progreso,
+                                                self._show_progress):
+                self.record_tbl_model.append_records(
+                    self._complete_records(lote))
+        except FileNotFoundError:
+            utils.show_error_message('Archivo no encontrado.', self)
+            return
+        if progreso['filas'] == progreso['invalidas']:
+            # Si no hay filas válidas, mostrar error
             error = ('El archivo CSV seleccionado no posee contenido o '
                      'no tiene el número adecuado de filas. Los archivos '
                      'de registro de calificaciones deben consistir de '
@@ -314,66 +325,45 @@ class RecordLoaderWidget(qtw.QWidget):
                      'código de materia, la calificación obtenida, y el '
                      'período en que se cursó.')
             utils.show_error_message(error, self)
-            return
-        # Diccionario de datos a registrar
-        por_registrar = {}
-        # Diccionario de materias por cursar de cada estudiante en el CSV
-        por_cursar = {}
-        # Para cada fila
-        for fila in csv:
-            # Crear un registro
-            record = {'ci': fila[0],
-                 'estudiante': '',
-                 'id': fila[1],
-                 'nombre': '',
-                 'uc': '',
-                 'nota': fila[2],
-                 'periodo': fila[3]}
-            # Identificadores
-            ci = record['ci']
-            materia_id = record['id']
-            # Verificar que la calificación sea un número entero
-            try:
-                # Trata de convertir la calificación a entero
-                record['nota'] = int(record['nota'])
-            except ValueError:
-                # Si no se puede, el registro es inválido. Pasar al siguiente
-                continue
-            # Verificar que el período académico del registro sea válido
-            if not validate_period(record['periodo']):
-                # Si no es válido, pasar al siguiente registro
-                continue
-            # Buscar las materias que no han sido cursadas por el estudiante de
-            # la cédula dada. Si no existe ningún estudiante con dicha cédula,
-            # el resultado será un tuple vacío
-            if ci not in por_cursar.keys():
-                mpc = crud.find_subjects_not_taken_by_student(ci)
-                por_cursar[ci] = [item['id_materia'] for item in mpc]
-            # Verificar que la materia esté en la lista de materias por
-            # cursar del estudiante
-            if materia_id in por_cursar[ci]:
-                # Si la materia no ha sido cursada por el estudiante,
-                # se busca la información faltante
-                estudiante = crud.find_student_by_ci(ci)
-                record['estudiante'] = ' '.join([estudiante["nombre"],
-                                            estudiante["apellido"]])
-                materia = crud.find_subject(materia_id)
-                record['nombre'] = materia['nombre']
-                record['uc'] = materia['uc']
-                # Se agregan los datos a la lista de registros por crear.
-                # Si esta combinación de materia y estudiante ya estaba en
-                # la lista, será reemplazada por este nuevo registro.
-                por_registrar[(ci, materia_id)] = record
-        # Convertir el diccionario de datos a lista
-        por_registrar = list(por_registrar.values())
-        if por_registrar:
-            # Si hay datos por registrar, mostrarlos en la tabla
-            self.record_tbl_model.replace_record(por_registrar)
-        else:
+        elif not progreso['nuevas']:
             # Si no hay datos por registrar, mostrar error
             utils.show_error_message(
                 'No se registrarán nuevos datos.', self)
-            return
+
+    def _show_progress(self, progreso):
+        """Muestra el progreso de la carga del archivo."""
+        self.progreso.setText(
+            f'Filas leídas: {progreso["filas"]} (inválidas: '
+            f'{progreso["invalidas"]}, repetidas: {progreso["repetidas"]}, '
+            f'omitidas: {progreso["omitidas"]}). '
+            f'Registros nuevos: {progreso["nuevas"]}.')
+        # Actualizar la ventana mientras se recorre el archivo
+        qtw.QApplication.processEvents()
+
+    def _complete_records(self, lote):
+        """Completa un lote de calificaciones con los datos de la tabla.
+
+        Se consultan los estudiantes y las materias del lote, con un
+        número fijo de consultas por lote.
+        """
+        estudiantes = {e['ci']: e for e in crud.find_students(
+            list({r['ci_estudiante'] for r in lote}))}
+        materias = {m['id']: m for m in crud.find_subjects(
+            list({r['id_materia'] for r in lote}))}
+        completos = []
+        for r in lote:
+            estudiante = estudiantes[r['ci_estudiante']]
+            materia = materias[r['id_materia']]
+            completos.append(
+                {'ci': r['ci_estudiante'],
+                 'estudiante': ' '.join([estudiante["nombre"],
+                                         estudiante["apellido"]]),
+                 'id': r['id_materia'],
+                 'nombre': materia['nombre'],
+                 'uc': materia['uc'],
+                 'nota': r['nota'],
+                 'periodo': r['periodo']})
+        return completos
 
     def _make_records(self):
         """Registra las nuevas calificaciones."""
@@ -393,7 +383,8 @@ class RecordLoaderWidget(qtw.QWidget):
         crud.create_records(record)
         # Vacía los campos y la tabla
         self.archivo.clear()
-        self.record_tbl_model.replace_record({})
+        self.progreso.clear()
+        self.record_tbl_model.replace_record([])
 
 
 class RecordUpdaterWidget(RecordManipulatorWidget):
@@ -14,8 +14,8 @@ componentes y funciones del módulo.
 import PyQt5.QtCore as qtc
 import PyQt5.QtWidgets as qtw
 from .. import crud
-from ..io import split_list, validate_period
-from ..student import calculate_ia
+from ..io import split_list, validate_period, validate_period_range
+from ..student import IndexAccumulator, academic_timeline
 from . import utils
 
 
@@ -195,6 +195,9 @@ class StudentRecordWidget(qtw.QWidget):
         # Modelo interno de la tabla
         self.record_tbl_model = RecordTableModel(self.record_headers)
         self.record_tbl.setModel(self.record_tbl_model)
+        # La información adicional se actualiza con cada cambio de la tabla
+        self.record_tbl_model.dataChanged.connect(self._update_record_info)
+        self.record_tbl_model.rowsInserted.connect(self._update_record_info)
         # Configura el encabezado de la tabla
         self.record_tbl_header = self.record_tbl.horizontalHeader()
         for i, header in enumerate(self.record_headers.keys()):
@@ -212,6 +215,19 @@ class StudentRecordWidget(qtw.QWidget):
         main_layout.addWidget(self.uc_aprobadas)
         self.indice_academico = utils.create_label('Índice Académico (IA):')
         main_layout.addWidget(self.indice_academico)
+        # Tabla de índices por período de los registros consultados
+        main_layout.addWidget(utils.create_label_h2('Índices por período'))
+        self.timeline_tbl = qtw.QTableView()
+        self.timeline_tbl_model = TimelineTableModel(
+            {'periodo': 'Período',
+             'uc': 'UC cursadas',
+             'uc_aprobadas': 'UC aprobadas',
+             'iap': 'IAP',
+             'iaa': 'IA acumulado'})
+        self.timeline_tbl.setModel(self.timeline_tbl_model)
+        self.timeline_tbl.horizontalHeader().setSectionResizeMode(
+            qtw.QHeaderView.Stretch)
+        main_layout.addWidget(self.timeline_tbl, stretch=1)
         self.setLayout(main_layout)
 
     def _get_record(self):
@@ -241,10 +257,10 @@ class StudentRecordWidget(qtw.QWidget):
         periodo = self.periodo_input.text().upper().strip()
         if not periodo:
             periodo = None
-        elif not validate_period(periodo):
+        elif not validate_period_range(periodo):
             utils.show_error_message(
-                ('Ingrese un período académico válido. '
-                 'Ejemplos: 2018-02, 2019-IN, 2020-01'),
+                ('Ingrese un período académico o un rango de períodos '
+                 'válido. Ejemplos: 2018-02, 2019-IN, 2018-01..2020-IN'),
                 self)
             return
         # Buscar el récord académico con los datos obtenidos
@@ -253,37 +269,95 @@ class StudentRecordWidget(qtw.QWidget):
                                    periodo)
         # Realizar el reemplazo de los datos
         self.record_tbl_model.replace_record(record)
+        self.timeline_tbl_model.replace_timeline(academic_timeline(record))
         # Actualizar la información adicional
         self._update_record_info()
 
-    def _update_record_info(self):
-        """Actualiza la información adicional del récord académico."""
-        # Extraer las UC de las materias cursadas
-        uc_cursadas = [r['uc'] for r in self.record_tbl_model.record]
+    def _update_record_info(self, *args):
+        """Actualiza la información adicional del récord académico.
+
+        Los datos se toman de las sumas que lleva el modelo de la tabla
+        (ver IndexAccumulator), sin recorrer el récord.
+        """
+        indices = self.record_tbl_model.indices
         # Mostrar el número de materias cursadas y su total de UC
         self.uc_cursadas.setText(
-            f'Materias cursadas: {len(uc_cursadas)} ({sum(uc_cursadas)} UC)')
-        # Extraer las UC de las materias aprobadas
-        uc_aprobadas = [r['uc'] for r in self.record_tbl_model.record
-                        if r['nota'] >= 12]
+            f'Materias cursadas: {indices.materias} ({indices.uc} UC)')
         # Mostrar el número de materias aprobadas y su total de UC
         self.uc_aprobadas.setText(
-            f'Materias aprobadas: {len(uc_aprobadas)} '
-            f'({sum(uc_aprobadas)} UC)')
+            f'Materias aprobadas: {indices.materias_aprobadas} '
+            f'({indices.uc_aprobadas} UC)')
         # Mostrar el índice académico del registro dado
-        ia = calculate_ia(self.record_tbl_model.record) or "N/A"
+        ia = indices.ia or "N/A"
         self.indice_academico.setText(f'Índice Académico (IA): {ia}')
 
 
+class TimelineTableModel(qtc.QAbstractTableModel):
+    """Modelo interno para tablas de índices académicos por período.
+
+    Muestra el resultado de academic_timeline(), de solo lectura.
+    """
+
+    def __init__(self, header, timeline=None, parent=None):
+        """Inicializa el modelo de tabla con los datos y cabecera dados."""
+        super().__init__(parent)
+        self.timeline = timeline or []
+        self.header = header
+        self._columns = list(header.keys())
+
+    def data(self, index, role):
+        """Provee los datos del período en el índice y rol dado."""
+        if role == qtc.Qt.DisplayRole:
+            value = self.timeline[index.row()][self._columns[index.column()]]
+            # Los índices sin UC cursadas no tienen valor
+            return 'N/A' if value is None else value
+
+    def rowCount(self, parent):
+        """Obtiene el número de períodos."""
+        return len(self.timeline)
+
+    def columnCount(self, parent):
+        """Obtiene el número de columnas de la tabla."""
+        return len(self.header)
+
+    def headerData(self, section, orientation, role):
+        """Obtiene los datos de la cabecera de la tabla."""
+        if role == qtc.Qt.DisplayRole:
+            if orientation == qtc.Qt.Horizontal:
+                return str(self.header[self._columns[section]])
+
+    def replace_timeline(self, timeline):
+        """Reemplaza los períodos de la tabla."""
+        self.beginResetModel()
+        self.timeline = timeline
+        self.endResetModel()
+
+
 class RecordTableModel(qtc.QAbstractTableModel):
-    """Modelo interno para tablas de récords académicos."""
+    """Modelo interno para tablas de récords académicos.
+
+    Además de recibir todos los registros de una vez, el modelo puede
+    obtenerlos página por página de una consulta paginada (ver
+    set_pages()), a medida que la vista los va mostrando.
+
+    El atributo indices lleva las sumas de UC y notas de los registros
+    (ver IndexAccumulator): se calculan de nuevo al reemplazar los
+    registros y se actualizan en cada página obtenida o nota editada.
+    """
 
     def __init__(self, header, record=None, editable=False, parent=None):
         """Inicializa el modelo de tabla con el récord y cabecera dados."""
         super().__init__(parent)
         self.record = record or []
+        self.indices = IndexAccumulator(self.record)
         self.header = header
         self.editable = ['nota', 'periodo'] if editable else []
+        # Consulta paginada: función de consulta, función de clave,
+        # tamaño de página, y clave de la última fila obtenida
+        self._fetch_page = None
+        self._page_key = None
+        self._page_size = 0
+        self._after = None
 
     def flags(self, index):
         """Provee las propiedades (flags) del índice dado."""
@@ -335,8 +409,9 @@ class RecordTableModel(qtc.QAbstractTableModel):
                     nota = int(value)
                     if nota in range(21):
                         # Si la nota ingresada está entre 0 y 20,
-                        # registrar el nuevo valor
-                        self.record[row][col] = value
+                        # actualizar las sumas y registrar el nuevo valor
+                        self.indices.change_grade(self.record[row], nota)
+                        self.record[row][col] = nota
                         self.dataChanged.emit(index, index)
                         # Cambio exitoso
                         return True
@@ -364,4 +439,51 @@ class RecordTableModel(qtc.QAbstractTableModel):
         """Reemplaza los registros de la tabla."""
         self.beginResetModel()
         self.record = record
+        self.indices = IndexAccumulator(record)
+        self._fetch_page = None
         self.endResetModel()
+
+    def set_pages(self, fetch_page, page_key, page_size=100):
+        """Reemplaza los registros por los de una consulta paginada.
+
+        fetch_page recibe los argumentos after y limit y devuelve una
+        página de registros (por ejemplo, crud.read_records_page con sus
+        demás argumentos fijos), y page_key obtiene la clave de
+        paginación de un registro. Se obtiene la primera página, y las
+        siguientes cuando la vista las necesite (ver fetchMore()).
+        """
+        self.replace_record([])
+        self._fetch_page = fetch_page
+        self._page_key = page_key
+        self._page_size = page_size
+        self._after = None
+        self.fetchMore(qtc.QModelIndex())
+
+    def canFetchMore(self, parent):
+        """Indica si quedan páginas por obtener de la consulta paginada."""
+        return self._fetch_page is not None and not parent.isValid()
+
+    def fetchMore(self, parent):
+        """Obtiene la siguiente página de la consulta paginada."""
+        if not self.canFetchMore(parent):
+            return
+        page = list(self._fetch_page(after=self._after,
+                                     limit=self._page_size))
+        if len(page) < self._page_size:
+            # Era la última página
+            self._fetch_page = None
+        if page:
+            self._after = self._page_key(page[-1])
+            self.append_records(page)
+
+    def append_records(self, records):
+        """Agrega registros al final de la tabla."""
+        if not records:
+            return
+        first = len(self.record)
+        self.beginInsertRows(qtc.QModelIndex(), first,
+                             first + len(records) - 1)
+        self.record.extend(records)
+        for registro in records:
+            self.indices.add(registro)
+        self.endInsertRows()
@@ -11,6 +11,7 @@ import csv
 import re
 import textwrap as tw
 from math import ceil
+from .period import code, is_period, parse_range
 
 
 def print_h1(s, newline=True):
@@ -53,27 +54,72 @@ def print_table(data, cols=None, widths=None, newline=True):
         # Si no hay datos, no hay nada que mostrar
         print_error('Tabla vacía')
     else:
-        if cols is None:
-            # Si no se proveen nombres de columna manualmente,
-            # usar los de los datos
-            cols = {c: c for c in data[0].keys()}
-        if widths is None:
-            # Si no se proveen anchos de columna manualmente,
-            # calcularlos a partir de los nombres de columna
-            widths = {c: (4*ceil(len(cols[c])/4) + 4) for c in cols.keys()}
-        # Mostrar cabecera de la tabla
-        print(' '.join([f'{tw.shorten(str(cols[col]), width=w) :<{w}}'
-                        for col, w in widths.items()]))
-        # Mostrar barra separadora decorativa
-        print('+'.join(['-'*w for w in widths.values()]))
-        # Mostrar datos de la tabla
-        for row in data:
-            print(' '.join([f'{tw.shorten(str(row[col]), width=w) :<{w}}'
-                            for col, w in widths.items()]))
+        cols, widths = _table_columns(data, cols, widths)
+        _print_table_header(cols, widths)
+        _print_table_rows(data, widths)
         if newline:
             print()
 
 
+def print_table_pages(pages, cols=None, widths=None, newline=True):
+    """Muestra una tabla cuyos datos se obtienen página por página.
+
+    pages es un iterable de listas de filas, por ejemplo el resultado
+    de crud.iter_pages(). La cabecera se muestra una sola vez, y antes
+    de mostrar cada página siguiente se pregunta al usuario si desea
+    continuar. Devuelve el número de filas mostradas.
+    """
+    pages = iter(pages)
+    page = next(pages, None)
+    if not page:
+        # Si no hay datos, no hay nada que mostrar
+        print_error('Tabla vacía')
+        return 0
+    cols, widths = _table_columns(page, cols, widths)
+    _print_table_header(cols, widths)
+    shown = 0
+    while page:
+        _print_table_rows(page, widths)
+        shown += len(page)
+        # Obtener la página siguiente antes de preguntar, para saber si
+        # quedan más datos
+        page = next(pages, None)
+        if page and not input_yes_no(f'{shown} filas mostradas. '
+                                     '¿Mostrar más? (s/n): ', newline=False):
+            break
+    if newline:
+        print()
+    return shown
+
+
+def _table_columns(data, cols, widths):
+    """Determina las columnas y sus anchos para una tabla."""
+    if cols is None:
+        # Si no se proveen nombres de columna manualmente,
+        # usar los de los datos
+        cols = {c: c for c in data[0].keys()}
+    if widths is None:
+        # Si no se proveen anchos de columna manualmente,
+        # calcularlos a partir de los nombres de columna
+        widths = {c: (4*ceil(len(cols[c])/4) + 4) for c in cols.keys()}
+    return cols, widths
+
+
+def _print_table_header(cols, widths):
+    """Muestra la cabecera de una tabla."""
+    print(' '.join([f'{tw.shorten(str(cols[col]), width=w) :<{w}}'
+                    for col, w in widths.items()]))
+    # Mostrar barra separadora decorativa
+    print('+'.join(['-'*w for w in widths.values()]))
+
+
+def _print_table_rows(data, widths):
+    """Muestra filas de datos de una tabla."""
+    for row in data:
+        print(' '.join([f'{tw.shorten(str(row[col]), width=w) :<{w}}'
+                        for col, w in widths.items()]))
+
+
 def print_hr(symbol='-', width=80, newline=True):
     """Muestra una línea horizontal."""
     print(symbol*width)
@@ -185,21 +231,47 @@ def input_period(prompt, newline=True):
 
 def read_csv(filename, delim=',', quote='"'):
     """Extrae el contenido de un archivo CSV."""
-    content = []
+    # Devuelve el contenido del CSV como una lista de filas
+    return list(iter_csv(filename, delim, quote))
+
+
+def iter_csv(filename, delim=',', quote='"'):
+    """Recorre las filas de un archivo CSV sin cargarlo completo.
+
+    El archivo se abre al pedir la primera fila, por lo que un archivo
+    inexistente lanza FileNotFoundError en ese momento.
+    """
     # Abre el archivo de forma segura
     with open(filename, newline='') as csvfile:
         # Crea un objeto lector de CSV con el archivo dado
         csv_reader = csv.reader(csvfile, delimiter=delim, quotechar=quote)
-        for row in csv_reader:
-            # Agrega cada fila del archivo a la lista del contenido
-            content.append(row)
-    # Devuelve el contenido del CSV
-    return content
+        # Genera cada fila del archivo
+        yield from csv_reader
 
 
-def validate_period(user_input, pattern='^\d{4}-(01|IN|02)$'):
+def validate_period(user_input):
     """Verifica si la entrada corresponde con un período académico."""
-    return re.match(pattern, user_input)
+    return is_period(user_input)
+
+
+def validate_period_range(user_input):
+    """Verifica si la entrada es un período o un rango de períodos.
+
+    Ver period.parse_range(), por ejemplo 2018-01..2020-IN.
+    """
+    try:
+        parse_range(user_input)
+    except ValueError:
+        return False
+    return True
+
+
+def period_key(periodo):
+    """Obtiene la clave de orden cronológico de un período académico.
+
+    La clave es el código entero del período (ver period.Period).
+    """
+    return code(periodo)
 
 
 def split_list(s, separator='[,\s]+'):
@@ -0,0 +1,164 @@
+# coding=utf-8
+"""Módulo de carga de calificaciones a partir de archivos CSV.
+
+Los archivos de calificaciones constan de cuatro columnas: número de
+cédula del estudiante, código de materia, calificación obtenida y
+período en que se cursó. La carga es una cadena de generadores que
+recorre el archivo fila por fila: lectura (io.iter_csv()), conversión
+y validación (parse_rows()), agrupación en lotes (batches()) y
+selección de las calificaciones nuevas de cada lote, consultadas en la
+base de datos (check_batch()). La memoria usada depende del tamaño de
+los lotes y no del tamaño del archivo; solo se recuerda, por cada par
+(cédula, materia), la posición de su última fila válida, obtenida con
+un recorrido previo del archivo que no consulta la base de datos (ver
+last_rows()). Si un par se repite, se toma siempre la última fila del
+archivo, sin importar el tamaño de los lotes.
+
+Las funciones iter_new_records() y load_records() reúnen los pasos
+para consultar o registrar las calificaciones nuevas de un archivo.
+Ambas llevan el progreso de la carga en un diccionario (ver
+new_progress()), que se pasa a la función opcional progress después
+de cada lote.
+"""
+
+
+from itertools import islice
+from . import crud, db, io
+from .config import read_config
+
+
+def new_progress():
+    """Crea el diccionario de progreso de la carga de un archivo.
+
+    Cuenta las filas leídas ('filas'), las que no tienen cuatro campos,
+    una calificación entera entre 0 y 20 y un período válido
+    ('invalidas'), las que repiten estudiante y materia ('repetidas'),
+    las de estudiantes inexistentes o materias ya cursadas
+    ('omitidas'), las calificaciones nuevas ('nuevas') y los lotes
+    procesados ('lotes').
+    """
+    return dict.fromkeys(['filas', 'invalidas', 'repetidas', 'omitidas',
+                          'nuevas', 'lotes'], 0)
+
+
+def iter_new_records(filename, progreso=None, progress=None,
+                     batch_size=None):
+    """Recorre por lotes las calificaciones nuevas de un archivo CSV.
+
+    Genera listas de calificaciones (diccionarios con los campos de
+    crud.RECORD_COLUMNS) por registrar. Los lotes tienen hasta
+    batch_size filas del archivo; de forma predeterminada, chunk_rows
+    de la sección [bulk] de la configuración. Si se provee progreso
+    (ver new_progress()), se actualiza durante el recorrido. Lanza
+    FileNotFoundError al empezar el recorrido si el archivo no existe.
+    """
+    if batch_size is None:
+        batch_size = read_config().getint('bulk', 'chunk_rows')
+    if progreso is None:
+        progreso = new_progress()
+    ultimas = last_rows(filename)
+    records = drop_repeated(parse_rows(io.iter_csv(filename), progreso),
+                            ultimas, progreso)
+    for batch in batches(records, batch_size):
+        nuevas = check_batch(batch, progreso)
+        if progress is not None:
+            progress(progreso)
+        if nuevas:
+            yield nuevas
+
+
+def load_records(filename, progreso=None, progress=None, batch_size=None):
+    """Registra las calificaciones nuevas de un archivo CSV.
+
+    Cada lote de iter_new_records() se inserta con
+    crud.create_records() apenas se selecciona, todos en una sola
+    transacción. Devuelve la lista con el resultado de cada lote de
+    inserción (ver crud.chunk_result()).
+    """
+    results = []
+    with db.transaction():
+        for nuevas in iter_new_records(filename, progreso, progress,
+                                       batch_size):
+            results.extend(crud.create_records(nuevas))
+    return results
+
+
+def parse_rows(rows, progreso):
+    """Convierte las filas válidas de un CSV en calificaciones.
+
+    Genera un diccionario con los campos de crud.RECORD_COLUMNS por
+    cada fila con cuatro campos, una calificación entera entre 0 y 20
+    y un período válido; las demás se cuentan como inválidas.
+    """
+    for row in rows:
+        progreso['filas'] += 1
+        if len(row) != len(crud.RECORD_COLUMNS):
+            progreso['invalidas'] += 1
+            continue
+        record = dict(zip(crud.RECORD_COLUMNS, row))
+        try:
+            # Trata de convertir la calificación a entero
+            record['nota'] = int(record['nota'])
+        except ValueError:
+            progreso['invalidas'] += 1
+            continue
+        if (record['nota'] not in range(21)
+                or not io.validate_period(record['periodo'])):
+            progreso['invalidas'] += 1
+            continue
+        yield record
+
+
+def last_rows(filename):
+    """Obtiene la posición de la última fila válida de cada par.
+
+    Recorre el archivo una vez, sin consultar la base de datos, y
+    devuelve un diccionario que asocia cada par (cédula, materia) con
+    la posición de su última calificación válida (ver parse_rows()).
+    """
+    records = parse_rows(io.iter_csv(filename), new_progress())
+    return {(record['ci_estudiante'], record['id_materia']): i
+            for i, record in enumerate(records)}
+
+
+def drop_repeated(records, ultimas, progreso):
+    """Descarta las calificaciones que no son la última de su par.
+
+    ultimas es el resultado de last_rows() para el mismo archivo.
+    """
+    for i, record in enumerate(records):
+        if ultimas[(record['ci_estudiante'], record['id_materia'])] != i:
+            progreso['repetidas'] += 1
+            continue
+        yield record
+
+
+def batches(records, size):
+    """Agrupa las calificaciones en listas de hasta size elementos."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def check_batch(batch, progreso):
+    """Selecciona las calificaciones nuevas de un lote.
+
+    Las calificaciones del lote no repiten pares (ver drop_repeated()).
+    Se seleccionan las de materias no cursadas por estudiantes
+    existentes, consultadas con una sola petición por lote (ver
+    crud.find_subjects_not_taken_by_students()).
+    """
+    por_cursar = {}
+    if batch:
+        por_cursar = crud.find_subjects_not_taken_by_students(
+            list({record['ci_estudiante'] for record in batch}))
+    nuevas = [record for record in batch
+              if record['id_materia'] in por_cursar.get(
+                  record['ci_estudiante'], ())]
+    progreso['omitidas'] += len(batch) - len(nuevas)
+    progreso['nuevas'] += len(nuevas)
+    progreso['lotes'] += 1
+    return nuevas
@@ -0,0 +1,263 @@
+# coding=utf-8
+"""Módulo de migraciones de la estructura de la base de datos.
+
+Las bases de datos creadas con una versión anterior de los archivos
+del directorio db se actualizan aplicando, en orden, las migraciones
+de la lista MIGRATIONS. La tabla schema_version registra las
+migraciones ya aplicadas; las bases de datos sin dicha tabla se
+consideran en la versión 0, la de la estructura original.
+
+La ejecución del módulo debería empezar por la función migrate(), que
+se invoca con la opción --migrate del programa.
+"""
+
+
+from . import crud, db
+
+
+# Tabla de versiones de la estructura, según el motor
+CREATE_SCHEMA_VERSION = {
+    'mysql': ('CREATE TABLE IF NOT EXISTS `schema_version` ('
+              '`version` int(10) unsigned NOT NULL, '
+              '`descripcion` varchar(100) NOT NULL, '
+              '`fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+              'PRIMARY KEY (`version`)'
+              ') ENGINE=InnoDB DEFAULT CHARSET=utf8'),
+    'sqlite': ('CREATE TABLE IF NOT EXISTS `schema_version` ('
+               '`version` int(10) NOT NULL, '
+               '`descripcion` varchar(100) NOT NULL, '
+               '`fecha` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP, '
+               'PRIMARY KEY (`version`))'),
+}
+SELECT_SCHEMA_VERSION = 'SELECT MAX(version) AS version FROM schema_version'
+INSERT_SCHEMA_VERSION = ('INSERT INTO schema_version (version, descripcion) '
+                         'VALUES (%s, %s)')
+# Consulta de la existencia de una tabla, según el motor
+TABLE_EXISTS = {
+    'mysql': ('SELECT 1 FROM information_schema.tables '
+              'WHERE table_schema = DATABASE() AND table_name = %s LIMIT 1'),
+    'sqlite': ("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+               'AND name = %s'),
+}
+# Consulta de la existencia de un índice, según el motor
+INDEX_EXISTS = {
+    'mysql': ('SELECT 1 FROM information_schema.statistics '
+              'WHERE table_schema = DATABASE() AND table_name = %s '
+              'AND index_name = %s LIMIT 1'),
+    'sqlite': ("SELECT 1 FROM sqlite_master WHERE type = 'index' "
+               'AND tbl_name = %s AND name = %s'),
+}
+
+# Tablas de resumen académico (ver crud.refresh_summaries())
+SUMMARY_COLUMNS_DDL = ('`materias` smallint(5) {unsigned}NOT NULL, '
+                       '`uc` smallint(5) {unsigned}NOT NULL, '
+                       '`materias_aprobadas` smallint(5) {unsigned}NOT NULL, '
+                       '`uc_aprobadas` smallint(5) {unsigned}NOT NULL, '
+                       '`suma_ponderada` int(10) {unsigned}NOT NULL, ')
+CREATE_SUMMARY_TABLES = {
+    'mysql': [
+        'CREATE TABLE IF NOT EXISTS `estudiante_resumen` ('
+        '`ci_estudiante` varchar(10) NOT NULL, '
+        + SUMMARY_COLUMNS_DDL.format(unsigned='unsigned ') +
+        'PRIMARY KEY (`ci_estudiante`), '
+        'CONSTRAINT `estudiante_resumen_ibfk_1` FOREIGN KEY '
+        '(`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE'
+        ') ENGINE=InnoDB DEFAULT CHARSET=utf8',
+        'CREATE TABLE IF NOT EXISTS `estudiante_resumen_periodo` ('
+        '`ci_estudiante` varchar(10) NOT NULL, '
+        '`periodo` varchar(7) NOT NULL, '
+        + SUMMARY_COLUMNS_DDL.format(unsigned='unsigned ') +
+        'PRIMARY KEY (`ci_estudiante`,`periodo`), '
+        'CONSTRAINT `estudiante_resumen_periodo_ibfk_1` FOREIGN KEY '
+        '(`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE'
+        ') ENGINE=InnoDB DEFAULT CHARSET=utf8',
+    ],
+    'sqlite': [
+        'CREATE TABLE IF NOT EXISTS `estudiante_resumen` ('
+        '`ci_estudiante` varchar(10) COLLATE NOCASE NOT NULL, '
+        + SUMMARY_COLUMNS_DDL.format(unsigned='') +
+        'PRIMARY KEY (`ci_estudiante`), '
+        'CONSTRAINT `estudiante_resumen_ibfk_1` FOREIGN KEY '
+        '(`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE)',
+        'CREATE TABLE IF NOT EXISTS `estudiante_resumen_periodo` ('
+        '`ci_estudiante` varchar(10) COLLATE NOCASE NOT NULL, '
+        '`periodo` varchar(7) COLLATE NOCASE NOT NULL, '
+        + SUMMARY_COLUMNS_DDL.format(unsigned='') +
+        'PRIMARY KEY (`ci_estudiante`,`periodo`), '
+        'CONSTRAINT `estudiante_resumen_periodo_ibfk_1` FOREIGN KEY '
+        '(`ci_estudiante`) REFERENCES `estudiante` (`ci`) ON UPDATE CASCADE)',
+    ],
+}
+
+# Clave primaria de materia_carrera. Antes de crearla se eliminan las
+# filas repetidas; en SQLite la tabla debe crearse de nuevo.
+CAREER_SUBJECTS_PRIMARY_KEY = {
+    'mysql': [
+        'CREATE TABLE materia_carrera_unica AS '
+        'SELECT DISTINCT id_materia, id_carrera FROM materia_carrera',
+        'DELETE FROM materia_carrera',
+        'INSERT INTO materia_carrera (id_materia, id_carrera) '
+        'SELECT id_materia, id_carrera FROM materia_carrera_unica',
+        'DROP TABLE materia_carrera_unica',
+        'ALTER TABLE materia_carrera '
+        'ADD PRIMARY KEY (`id_carrera`,`id_materia`), '
+        'DROP INDEX `id_carrera`',
+    ],
+    'sqlite': [
+        'CREATE TABLE `materia_carrera_unica` ('
+        '`id_materia` varchar(10) COLLATE NOCASE NOT NULL, '
+        '`id_carrera` varchar(10) COLLATE NOCASE NOT NULL, '
+        'PRIMARY KEY (`id_carrera`,`id_materia`), '
+        'CONSTRAINT `materia_carrera_ibfk_1` FOREIGN KEY (`id_materia`) '
+        'REFERENCES `materia` (`id`) ON UPDATE CASCADE, '
+        'CONSTRAINT `materia_carrera_ibfk_2` FOREIGN KEY (`id_carrera`) '
+        'REFERENCES `carrera` (`id`) ON UPDATE CASCADE)',
+        'INSERT INTO materia_carrera_unica (id_materia, id_carrera) '
+        'SELECT DISTINCT id_materia, id_carrera FROM materia_carrera',
+        'DROP TABLE materia_carrera',
+        'ALTER TABLE materia_carrera_unica RENAME TO materia_carrera',
+        'CREATE INDEX `materia_carrera_ibfk_1` '
+        'ON `materia_carrera` (`id_materia`)',
+    ],
+}
+
+# Índice de record por materia y período, para consultar o eliminar
+# las calificaciones de una sección (ver crud.records_where()). Como
+# empieza por id_materia, reemplaza al índice de esa columna.
+RECORD_SECTION_INDEX = {
+    'mysql': ['ALTER TABLE record '
+              'ADD KEY `materia_periodo` (`id_materia`,`periodo`), '
+              'DROP INDEX `id_materia`'],
+    'sqlite': ['CREATE INDEX `record_materia_periodo` ON `record` '
+               '(`id_materia`, `periodo`)',
+               'DROP INDEX `record_id_materia`'],
+}
+
+# Columna generada de record con el código entero del período (año*3 +
+# lapso, ver period.Period), con un índice por estudiante y código que
+# reemplaza al índice por estudiante y período (texto), si existe
+PERIOD_CODE = {
+    'mysql': ("CAST(SUBSTRING(`periodo`, 1, 4) AS UNSIGNED) * 3 + "
+              "CASE UPPER(SUBSTRING(`periodo`, 6, 2)) "
+              "WHEN '01' THEN 0 WHEN 'IN' THEN 1 ELSE 2 END"),
+    'sqlite': ("CAST(SUBSTR(`periodo`, 1, 4) AS INTEGER) * 3 + "
+               "CASE UPPER(SUBSTR(`periodo`, 6, 2)) "
+               "WHEN '01' THEN 0 WHEN 'IN' THEN 1 ELSE 2 END"),
+}
+RECORD_PERIOD_CODE = {
+    'mysql': ['ALTER TABLE record ADD COLUMN `periodo_num` '
+              'smallint(5) unsigned GENERATED ALWAYS AS '
+              f'({PERIOD_CODE["mysql"]}) VIRTUAL, '
+              'ADD KEY `ci_periodo_num` (`ci_estudiante`,`periodo_num`)'],
+    'sqlite': ['ALTER TABLE record ADD COLUMN `periodo_num` smallint '
+               f'GENERATED ALWAYS AS ({PERIOD_CODE["sqlite"]}) VIRTUAL',
+               'CREATE INDEX `record_ci_periodo_num` ON `record` '
+               '(`ci_estudiante`, `periodo_num`)'],
+}
+RECORD_PERIOD_INDEX_OLD = {
+    'mysql': ('ci_periodo', 'ALTER TABLE record DROP INDEX `ci_periodo`'),
+    'sqlite': ('record_ci_periodo', 'DROP INDEX `record_ci_periodo`'),
+}
+
+
+def migrate(verbose=True):
+    """Aplica las migraciones pendientes de la base de datos.
+
+    Cada migración se aplica en su propia transacción junto con su
+    registro en schema_version. En MySQL, las peticiones que cambian
+    la estructura confirman la transacción implícitamente, por lo que
+    una migración interrumpida puede quedar aplicada a medias.
+
+    Devuelve la lista de versiones aplicadas.
+    """
+    dialect = db.current_backend().name
+    db.execute_sql(CREATE_SCHEMA_VERSION[dialect])
+    current = schema_version()
+    applied = []
+    for version, descripcion, apply in MIGRATIONS:
+        if version <= current:
+            continue
+        if verbose:
+            print(f'Aplicando migración {version}: {descripcion}...')
+        with db.transaction():
+            apply(dialect)
+            db.execute_sql(INSERT_SCHEMA_VERSION, [version, descripcion])
+        applied.append(version)
+    if verbose:
+        if applied:
+            print(f'Base de datos actualizada a la versión {applied[-1]}.')
+        else:
+            print(f'La base de datos ya está en la versión {current}.')
+    return applied
+
+
+def schema_version():
+    """Consulta la versión de la estructura de la base de datos."""
+    row = db.execute_sql(SELECT_SCHEMA_VERSION, rows=1)
+    return row['version'] or 0
+
+
+def is_outdated():
+    """Verifica si la base de datos tiene migraciones pendientes.
+
+    Las bases de datos sin la tabla schema_version están en la versión
+    0, por lo que se consideran desactualizadas.
+    """
+    dialect = db.current_backend().name
+    if not table_exists(dialect, 'schema_version'):
+        return True
+    return schema_version() < MIGRATIONS[-1][0]
+
+
+def table_exists(dialect, table):
+    """Verifica si existe la tabla dada."""
+    return db.execute_sql(TABLE_EXISTS[dialect], [table],
+                          rows=1) is not None
+
+
+def index_exists(dialect, table, index):
+    """Verifica si la tabla dada tiene el índice dado."""
+    return db.execute_sql(INDEX_EXISTS[dialect], [table, index],
+                          rows=1) is not None
+
+
+def add_summary_tables(dialect):
+    """Crea las tablas de resumen académico y calcula su contenido."""
+    for query in CREATE_SUMMARY_TABLES[dialect]:
+        db.execute_sql(query)
+    crud.rebuild_summaries()
+
+
+def add_career_subjects_primary_key(dialect):
+    """Elimina las filas repetidas de materia_carrera y crea su clave."""
+    for query in CAREER_SUBJECTS_PRIMARY_KEY[dialect]:
+        db.execute_sql(query)
+
+
+def add_record_section_index(dialect):
+    """Crea el índice de record por materia y período."""
+    for query in RECORD_SECTION_INDEX[dialect]:
+        db.execute_sql(query)
+
+
+def add_record_period_code(dialect):
+    """Crea la columna de record con el código entero del período.
+
+    Reemplaza al índice por estudiante, período y materia, si existe.
+    """
+    for query in RECORD_PERIOD_CODE[dialect]:
+        db.execute_sql(query)
+    index, query = RECORD_PERIOD_INDEX_OLD[dialect]
+    if index_exists(dialect, 'record', index):
+        db.execute_sql(query)
+
+
+# Migraciones en orden: (versión, descripción, función). La función
+# recibe el nombre del motor de base de datos.
+MIGRATIONS = [
+    (1, 'Tablas de resumen académico', add_summary_tables),
+    (2, 'Clave primaria de materia_carrera',
+     add_career_subjects_primary_key),
+    (3, 'Índice de record por materia y período', add_record_section_index),
+    (4, 'Código entero del período en record', add_record_period_code),
+]
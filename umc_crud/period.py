@@ -0,0 +1,121 @@
+# coding=utf-8
+"""Módulo de períodos académicos.
+
+Un período académico se escribe como el año y el lapso separados por
+un guion, por ejemplo 2018-01, 2018-IN o 2018-02. Los lapsos de un
+año, en orden cronológico, son el primero (01), el intensivo (IN) y el
+segundo (02), por lo que el orden alfabético de los períodos no es el
+cronológico.
+
+La clase Period representa un período con un código entero (año*3 +
+lapso) que se ordena cronológicamente y se compara como un entero. La
+columna periodo_num de la tabla record guarda el mismo código, de modo
+que los filtros y el orden por período se resuelven en la base de
+datos comparando enteros (ver crud.read_records()).
+"""
+
+
+import functools
+
+
+# Lapsos de un año académico en orden cronológico
+TERMS = ('01', 'IN', '02')
+# Posición de cada lapso
+_TERM_INDEX = {term: i for i, term in enumerate(TERMS)}
+# Dígitos del año
+_DIGITS = '0123456789'
+# Separador de los extremos de un rango de períodos
+RANGE_SEPARATOR = '..'
+
+
+@functools.total_ordering
+class Period:
+    """Período académico, representado por su código entero."""
+
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        """Inicializa el período a partir de su código (año*3 + lapso)."""
+        self.code = code
+
+    @classmethod
+    def parse(cls, s):
+        """Obtiene el período a partir de su texto (por ejemplo 2018-IN).
+
+        El texto debe estar en mayúsculas y sin espacios alrededor.
+        Lanza ValueError si no es un período válido.
+        """
+        term = _TERM_INDEX.get(s[5:]) if len(s) == 7 else None
+        if term is None or s[4] != '-' or s[:4].strip(_DIGITS):
+            raise ValueError(f'Período académico inválido: {s!r}')
+        return cls(int(s[:4])*3 + term)
+
+    @property
+    def year(self):
+        """Año del período."""
+        return self.code // 3
+
+    @property
+    def term(self):
+        """Lapso del período ('01', 'IN' o '02')."""
+        return TERMS[self.code % 3]
+
+    def __str__(self):
+        """Texto del período, por ejemplo 2018-IN."""
+        return f'{self.year:04d}-{self.term}'
+
+    def __repr__(self):
+        """Representación del período."""
+        return f'Period({str(self)!r})'
+
+    def __eq__(self, other):
+        """Compara dos períodos."""
+        if not isinstance(other, Period):
+            return NotImplemented
+        return self.code == other.code
+
+    def __lt__(self, other):
+        """Verifica si el período es anterior al dado."""
+        if not isinstance(other, Period):
+            return NotImplemented
+        return self.code < other.code
+
+    def __hash__(self):
+        """Obtiene el hash del período, el de su código."""
+        return hash(self.code)
+
+
+def is_period(s):
+    """Verifica si el texto dado corresponde con un período académico."""
+    try:
+        Period.parse(s)
+    except ValueError:
+        return False
+    return True
+
+
+def code(s):
+    """Obtiene el código de un período, sin distinguir mayúsculas."""
+    return Period.parse(s.upper()).code
+
+
+def parse_range(s):
+    """Obtiene los códigos de los extremos de un rango de períodos.
+
+    El rango se escribe como dos períodos separados por '..' (por
+    ejemplo 2018-01..2020-IN) e incluye a ambos; cualquiera de los dos
+    puede omitirse para dejar el rango abierto (por ejemplo 2019-01..).
+    Un solo período equivale al rango de ese período. Devuelve el par
+    (desde, hasta), con None en los extremos omitidos. Lanza
+    ValueError si el rango no es válido.
+    """
+    s = s.upper().strip()
+    if RANGE_SEPARATOR not in s:
+        desde = hasta = Period.parse(s).code
+        return desde, hasta
+    inicio, fin = (p.strip() for p in s.split(RANGE_SEPARATOR, 1))
+    desde = Period.parse(inicio).code if inicio else None
+    hasta = Period.parse(fin).code if fin else None
+    if desde is not None and hasta is not None and desde > hasta:
+        raise ValueError(f'Rango de períodos inválido: {s!r}')
+    return desde, hasta
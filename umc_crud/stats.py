@@ -0,0 +1,266 @@
+# coding=utf-8
+"""Módulo de estadísticas de peticiones SQL.
+
+Provee un registro en memoria de las peticiones realizadas por el
+módulo db: tiempo de ejecución, filas y bytes devueltos, y la función
+del módulo crud que las originó. Las peticiones se agrupan según su
+texto normalizado, y para cada grupo se calculan percentiles de
+tiempo. Las peticiones que superan el umbral configurado se anotan
+además en el registro de peticiones lentas.
+
+Los parámetros se toman de la sección `[stats]` del archivo de
+configuración. El registro está desactivado de forma predeterminada,
+ya que su costo es comparable al de las peticiones más sencillas; se
+activa con enabled = yes o con enable() (opción --stats).
+"""
+
+
+import functools
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from math import ceil
+from . import io
+
+
+# Máximo de tiempos guardados por petición para calcular percentiles
+MAX_SAMPLES = 10000
+
+# Módulos cuyas funciones se consideran el origen de una petición
+CALLER_MODULES = ('umc_crud.crud', 'umc_crud.aio')
+
+
+class QueryStats:
+    """Estadísticas acumuladas de una petición normalizada."""
+
+    def __init__(self, sql):
+        """Inicializa las estadísticas de la petición dada."""
+        self.sql = sql
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.callers = Counter()
+        # Muestra de tiempos de ejecución (muestreo de reservorio)
+        self.samples = []
+
+    def add(self, elapsed, rows, nbytes, caller):
+        """Agrega una ejecución de la petición."""
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.rows += rows
+        self.bytes += nbytes
+        self.callers[caller] += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(elapsed)
+        else:
+            i = random.randrange(self.calls)
+            if i < MAX_SAMPLES:
+                self.samples[i] = elapsed
+
+    def percentile(self, p):
+        """Calcula el percentil p (0-100) de los tiempos de ejecución."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        # Método del rango más cercano
+        rank = max(0, ceil(p / 100 * len(ordered)) - 1)
+        return ordered[rank]
+
+
+class Registry:
+    """Registro de estadísticas de todas las peticiones del programa."""
+
+    def __init__(self):
+        """Inicializa el registro vacío."""
+        self._queries = {}
+        self._lock = threading.Lock()
+        # Activado mediante enable(), sin importar la configuración
+        self.forced = False
+        # Configuración del pool de conexiones (ver configure())
+        self.settings = None
+        self.active = False
+
+    def configure(self, settings):
+        """Toma los parámetros de la configuración dada.
+
+        El módulo db (y aio) la provee al crear su pool de conexiones,
+        de modo que el registro no lee el archivo en cada petición.
+        """
+        self.settings = settings
+        self.active = settings.getboolean('stats', 'enabled')
+
+    def enabled(self):
+        """Verifica si se deben registrar las peticiones."""
+        return self.forced or self.active
+
+    def record(self, query, elapsed, result=None, caller=None, rows=None):
+        """Registra una ejecución de la petición dada.
+
+        Si no se provee el resultado de la petición, se puede indicar
+        el número de filas devueltas mediante el argumento rows.
+        """
+        if not (self.forced or self.active):
+            return
+        sql = normalize(query)
+        if rows is None:
+            rows = count_rows(result)
+        nbytes = count_bytes(result)
+        if caller is None:
+            caller = find_caller()
+        with self._lock:
+            stats = self._queries.get(sql)
+            if stats is None:
+                stats = self._queries[sql] = QueryStats(sql)
+            stats.add(elapsed, rows, nbytes, caller)
+        settings = self.settings
+        if settings is None:
+            return
+        threshold = settings.getfloat('stats', 'slow_query_threshold')
+        if threshold is not None and elapsed >= threshold:
+            log_slow_query(settings.get('stats', 'slow_query_log'),
+                           sql, elapsed, rows, caller)
+
+    def summary(self):
+        """Devuelve el resumen de las peticiones, de mayor a menor tiempo."""
+        with self._lock:
+            queries = list(self._queries.values())
+        queries.sort(key=lambda q: q.total_time, reverse=True)
+        return [{'sql': q.sql,
+                 'calls': q.calls,
+                 'total': q.total_time,
+                 'p50': q.percentile(50),
+                 'p95': q.percentile(95),
+                 'p99': q.percentile(99),
+                 'max': q.max_time,
+                 'rows': q.rows,
+                 'bytes': q.bytes,
+                 'callers': ', '.join(c for c, _
+                                      in q.callers.most_common(3))}
+                for q in queries]
+
+    def clear(self):
+        """Elimina todas las estadísticas registradas."""
+        with self._lock:
+            self._queries.clear()
+
+
+# Registro del programa
+registry = Registry()
+
+
+def enable():
+    """Activa el registro de estadísticas, sin importar la configuración."""
+    registry.forced = True
+
+
+def enabled():
+    """Verifica si el registro de estadísticas está activado."""
+    return registry.enabled()
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(query):
+    """Normaliza el texto de una petición para agruparla con otras.
+
+    Elimina espacios repetidos, reemplaza los literales por ? y reduce
+    las listas de parámetros de cláusulas IN a un solo elemento. Los
+    resultados se guardan por texto de la petición, ya que el programa
+    genera pocas peticiones distintas.
+    """
+    sql = ' '.join(query.split())
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    sql = re.sub(r'%\(\w+\)s|%s', '?', sql)
+    sql = re.sub(r'\(\?(?:, \?)+\)', '(?, ...)', sql)
+    sql = re.sub(r'\(\?, \.\.\.\)(?:, \(\?, \.\.\.\))+',
+                 '(?, ...), ...', sql)
+    return sql
+
+
+def find_caller():
+    """Encuentra la función de crud (o aio) que originó la petición."""
+    frame = sys._getframe(1)
+    outer = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module in CALLER_MODULES:
+            return f'{module.rsplit(".", 1)[-1]}.{frame.f_code.co_name}'
+        if outer is None and not module.startswith(('umc_crud.db',
+                                                    'umc_crud.stats')):
+            outer = f'{module}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return outer or '?'
+
+
+def count_rows(result):
+    """Cuenta las filas de un resultado de execute_sql()."""
+    if result is None:
+        return 0
+    if isinstance(result, int):
+        # Número de filas afectadas por una modificación
+        return result
+    if isinstance(result, dict):
+        return 1
+    return len(result)
+
+
+def count_bytes(result):
+    """Estima el tamaño en bytes de un resultado de execute_sql()."""
+    if not result or isinstance(result, int):
+        return 0
+    if isinstance(result, dict):
+        result = [result]
+    total = 0
+    for row in result:
+        for value in row.values():
+            if isinstance(value, str):
+                total += len(value)
+            elif isinstance(value, bytes):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+_log_lock = threading.Lock()
+
+
+def log_slow_query(filename, sql, elapsed, rows, caller):
+    """Agrega una petición al registro de peticiones lentas."""
+    line = (f'{time.strftime("%Y-%m-%d %H:%M:%S")}\t{elapsed:.6f}\t'
+            f'{rows}\t{caller}\t{sql}\n')
+    with _log_lock:
+        with open(filename, 'a', encoding='utf-8') as logfile:
+            logfile.write(line)
+
+
+def print_summary():
+    """Muestra el resumen de las estadísticas de peticiones."""
+    io.print_h2('Estadísticas de peticiones SQL')
+    summary = registry.summary()
+    if not summary:
+        print('No se registraron peticiones.')
+        print()
+        return
+    cols = {'calls': 'Llamadas',
+            'total': 'Total (s)',
+            'p50': 'p50 (ms)',
+            'p95': 'p95 (ms)',
+            'p99': 'p99 (ms)',
+            'rows': 'Filas',
+            'bytes': 'Bytes',
+            'callers': 'Origen'}
+    widths = dict(zip(cols.keys(), [9, 10, 9, 9, 9, 8, 10, 30]))
+    for i, item in enumerate(summary):
+        io.print_h3(f'{i+1}. {item["sql"]}', newline=False)
+        row = dict(item)
+        row['total'] = f'{item["total"]:.3f}'
+        for p in ('p50', 'p95', 'p99'):
+            row[p] = f'{item[p]*1000:.2f}'
+        io.print_table([row], cols, widths)
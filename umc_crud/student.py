@@ -16,12 +16,19 @@ from . import crud, io
 
 def main(user_id):
     """Función principal del módulo de estudiante."""
+    # Datos del estudiante, consultados una sola vez por sesión
+    sesion = StudentSession(user_id)
     # Lista de opciones con sus funciones asociadas
-    menu = [['Consultar información personal', get_personal_info],
-            ['Consultar récord académico completo', get_record],
-            ['Consultar calificaciones por materia', find_grades],
-            ['Calcular índice académico acumulado (IAA)', calculate_iaa],
-            ['Calcular índice académico parcial (IAP)', calculate_iap],
+    menu = [['Consultar información personal', sesion.get_personal_info],
+            ['Consultar récord académico completo', sesion.get_record],
+            ['Consultar calificaciones por materia', sesion.find_grades],
+            ['Calcular índice académico acumulado (IAA)',
+             sesion.calculate_iaa],
+            ['Calcular índice académico parcial (IAP)',
+             sesion.calculate_iap],
+            ['Consultar índices académicos por período',
+             sesion.get_timeline],
+            ['Actualizar datos', sesion.refresh],
             ['Salir']]
     while True:
         print()
@@ -40,7 +47,7 @@ def main(user_id):
             # ejecutar la función correspondiente
             io.print_hr()
             func = menu[index-1][1]
-            func(crud.find_student_by_username(user_id))
+            func()
             cont = input('[Enter] para volver al menú principal... ')
         elif index == n:
             # Si se elige la última opción, salir
@@ -48,6 +55,72 @@ def main(user_id):
             return
 
 
+class StudentSession:
+    """Datos de la sesión de un estudiante.
+
+    La información del estudiante y su récord académico completo se
+    consultan una sola vez, los índices académicos se calculan a
+    partir del récord y las opciones del menú se responden desde
+    memoria. La opción de actualizar vuelve a consultarlos.
+    """
+
+    def __init__(self, user_id):
+        """Inicializa la sesión del usuario dado."""
+        self.user_id = user_id
+        self.estudiante = None
+        self._record = None
+        self._resumen = None
+        self.refresh(verbose=False)
+
+    @property
+    def record(self):
+        """Récord académico completo, consultado la primera vez."""
+        if self._record is None:
+            self._record = crud.read_records(self.estudiante['ci'])
+        return self._record
+
+    @property
+    def resumen(self):
+        """Índices académicos, calculados a partir del récord."""
+        if self._resumen is None:
+            self._resumen = record_summary(self.record)
+        return self._resumen
+
+    def refresh(self, verbose=True):
+        """Vuelve a consultar los datos del estudiante y su récord."""
+        self.estudiante = crud.find_student_by_username(self.user_id)
+        self._record = None
+        self._resumen = None
+        if verbose:
+            print('Datos actualizados.')
+            print()
+
+    def get_personal_info(self):
+        """Consulta la información personal del estudiante."""
+        get_personal_info(self.estudiante)
+
+    def get_record(self):
+        """Consulta el récord académico completo del estudiante."""
+        get_record(self.estudiante, record=self.record,
+                   resumen=self.resumen)
+
+    def find_grades(self):
+        """Consulta las calificaciones por materia del estudiante."""
+        find_grades(self.estudiante, record=self.record)
+
+    def calculate_iaa(self):
+        """Calcula el índice académico acumulado (IAA) del estudiante."""
+        calculate_iaa(self.estudiante, resumen=self.resumen)
+
+    def calculate_iap(self):
+        """Calcula el índice académico parcial (IAP) del estudiante."""
+        calculate_iap(self.estudiante, resumen=self.resumen)
+
+    def get_timeline(self):
+        """Consulta los índices académicos por período del estudiante."""
+        get_timeline(self.estudiante, record=self.record)
+
+
 def get_personal_info(estudiante, title=True):
     """Consulta la información personal del estudiante."""
     if title:
@@ -65,24 +138,34 @@ def get_personal_info(estudiante, title=True):
     print()
 
 
-def get_record(estudiante, title=True):
-    """Consulta el record académico completo del estudiante."""
+def get_record(estudiante, title=True, record=None, resumen=None):
+    """Consulta el record académico completo del estudiante.
+
+    Si se proveen el récord académico completo o los índices
+    académicos (ver crud.academic_summary()), no se consultan.
+    """
     if title:
         io.print_h2(f'Récord académico: {estudiante["id_usuario"]}')
-    record = crud.read_records(estudiante['ci'])
+    if record is None:
+        record = crud.read_records(estudiante['ci'])
+    if resumen is None:
+        resumen = crud.academic_summary(estudiante['ci'])
     # Muestra la tabla
     print_record(record)
     # Muestra información adicional
-    uc_cursadas = [r['uc'] for r in record]
-    print(f'Materias cursadas: {len(uc_cursadas)} ({sum(uc_cursadas)} UC)')
-    uc_aprobadas = [r['uc'] for r in record if r['nota'] >= 12]
-    print(f'Materias aprobadas: {len(uc_aprobadas)} ({sum(uc_aprobadas)} UC)')
-    print(f'Índice Académico Acumulado (IAA): {calculate_ia(record)}')
+    print(f'Materias cursadas: {resumen["materias"]} ({resumen["uc"]} UC)')
+    print(f'Materias aprobadas: {resumen["materias_aprobadas"]} '
+          f'({resumen["uc_aprobadas"]} UC)')
+    print(f'Índice Académico Acumulado (IAA): {resumen["iaa"]}')
     print()
 
 
-def find_grades(estudiante, title=True, intro=True):
-    """Consulta las calificaciones por materia del estudiante."""
+def find_grades(estudiante, title=True, intro=True, record=None):
+    """Consulta las calificaciones por materia del estudiante.
+
+    Si se provee el récord académico completo, las calificaciones se
+    buscan en él en lugar de consultarlas.
+    """
     if title:
         io.print_h2(f'Consulta de calificaciones: {estudiante["id_usuario"]}')
     if intro:
@@ -93,22 +176,33 @@ def find_grades(estudiante, title=True, intro=True):
                       'sus códigos separados por espacios o comas.')
     # Pide al usuario los códigos de materia y los separa en una lista
     materia_ids = [m.upper() for m in io.input_list('Materia(s): ')]
+    if record is None:
+        record = crud.read_records(estudiante['ci'], materia_ids)
+    else:
+        record = filter_record(record, materia_ids=materia_ids)
     # Muestra la tabla
-    print_record(crud.read_records(estudiante['ci'], materia_ids))
+    print_record(record)
 
 
-def calculate_iaa(estudiante, title=True):
-    """Calcula el índice académico acumulado (IAA) del estudiante."""
+def calculate_iaa(estudiante, title=True, resumen=None):
+    """Calcula el índice académico acumulado (IAA) del estudiante.
+
+    Si se proveen los índices académicos, no se consultan.
+    """
     if title:
         io.print_h2(f'Índice Académico Acumulado: {estudiante["id_usuario"]}')
-    record = crud.read_records(estudiante['ci'])
-    iaa = calculate_ia(record)
+    if resumen is None:
+        resumen = crud.academic_summary(estudiante['ci'])
+    iaa = resumen['iaa']
     print(f'Su IAA es de {iaa} según su récord académico completo.')
     print()
 
 
-def calculate_iap(estudiante, title=True, intro=True):
-    """Calcula el índice académico parcial (IAP) del estudiante por período."""
+def calculate_iap(estudiante, title=True, intro=True, resumen=None):
+    """Calcula el índice académico parcial (IAP) del estudiante por período.
+
+    Si se proveen los índices académicos, no se consultan.
+    """
     if title:
         io.print_h2(f'Índice Académico Parcial: {estudiante["id_usuario"]}')
     if intro:
@@ -118,11 +212,10 @@ def calculate_iap(estudiante, title=True, intro=True):
                       'IAP (ejemplos: 2020-01, 2018-IN, 2019-02).')
     # Pide al usuario el período académico límite
     periodo = io.input_period('Período académico: ')
-    # Filtrar record de materias
-    record = [r for r in crud.read_records(estudiante['ci'])
-              if r['periodo'] == periodo]
-    # Calcular índice académico parcial
-    iap = calculate_ia(record)
+    if resumen is None:
+        resumen = crud.academic_summary(estudiante['ci'])
+    # Índice académico parcial del período, calculado por el servidor
+    iap = resumen['iap'].get(periodo)
     if iap is not None:
         print(f'Su IAP para el período {periodo} es de {iap}.')
     else:
@@ -130,12 +223,143 @@ def calculate_iap(estudiante, title=True, intro=True):
     print()
 
 
+def get_timeline(estudiante, title=True, record=None):
+    """Consulta los índices académicos del estudiante por período.
+
+    Si se provee el récord académico completo, no se consulta.
+    """
+    if title:
+        io.print_h2(f'Índices por período: {estudiante["id_usuario"]}')
+    if record is None:
+        record = crud.read_records(estudiante['ci'])
+    # Muestra la tabla
+    cols = {'periodo': 'Período',
+            'uc': 'UC cursadas',
+            'uc_aprobadas': 'UC aprobadas',
+            'iap': 'IAP',
+            'iaa': 'IAA'}
+    widths = dict(zip(cols.keys(), [10, 12, 12, 6, 6]))
+    io.print_table(academic_timeline(record), cols, widths)
+
+
+def academic_timeline(record):
+    """Calcula los índices académicos del récord período por período.
+
+    Agrupa el récord por período en un solo recorrido y devuelve, en
+    orden cronológico (ver io.period_key()), un diccionario por
+    período con el período ('periodo'), las UC cursadas y aprobadas
+    en él ('uc', 'uc_aprobadas'), su IAP ('iap') y el IAA al final
+    del período ('iaa').
+    """
+    periodos = {}
+    for registro in record:
+        periodo = registro['periodo'].upper()
+        if periodo not in periodos:
+            periodos[periodo] = IndexAccumulator()
+        periodos[periodo].add(registro)
+    timeline = []
+    suma_uc = suma_ponderada = 0
+    for periodo in sorted(periodos, key=io.period_key):
+        indices = periodos[periodo]
+        suma_uc += indices.uc
+        suma_ponderada += indices.suma_ponderada
+        timeline.append({'periodo': periodo,
+                         'uc': indices.uc,
+                         'uc_aprobadas': indices.uc_aprobadas,
+                         'iap': indices.ia,
+                         'iaa': crud.academic_index(suma_ponderada,
+                                                    suma_uc)})
+    return timeline
+
+
+def record_summary(record):
+    """Calcula los índices académicos a partir del récord dado.
+
+    Devuelve un diccionario como el de crud.academic_summary().
+    """
+    total = IndexAccumulator()
+    periodos = {}
+    for registro in record:
+        total.add(registro)
+        if registro['periodo'] not in periodos:
+            periodos[registro['periodo']] = IndexAccumulator()
+        periodos[registro['periodo']].add(registro)
+    return {'materias': total.materias,
+            'uc': total.uc,
+            'materias_aprobadas': total.materias_aprobadas,
+            'uc_aprobadas': total.uc_aprobadas,
+            'suma_ponderada': total.suma_ponderada,
+            'iaa': total.ia,
+            'iap': {p: indices.ia for p, indices in periodos.items()}}
+
+
 def calculate_ia(record):
     """Calcula el índice académico acumulado a partir del récord dado."""
-    suma_uc = sum([r['uc'] for r in record])
-    if suma_uc == 0: return None
-    suma_ponderada = sum([r['uc']*r['nota'] for r in record])
-    return round(suma_ponderada/suma_uc, 2)
+    return IndexAccumulator(record).ia
+
+
+class IndexAccumulator:
+    """Sumas de un récord académico para calcular su índice al instante.
+
+    Lleva la cuenta de las materias y UC cursadas y aprobadas y de la
+    suma de las notas ponderadas por sus UC. Al agregar o quitar un
+    registro, o al cambiar una nota, las sumas se actualizan sin
+    recorrer el récord.
+    """
+
+    def __init__(self, record=()):
+        """Inicializa las sumas con los registros dados."""
+        self.materias = 0
+        self.uc = 0
+        self.materias_aprobadas = 0
+        self.uc_aprobadas = 0
+        self.suma_ponderada = 0
+        for registro in record:
+            self.add(registro)
+
+    @property
+    def ia(self):
+        """Índice académico de los registros, o None si no hay UC."""
+        return crud.academic_index(self.suma_ponderada, self.uc)
+
+    def add(self, registro):
+        """Agrega un registro (con sus campos uc y nota) a las sumas."""
+        self._count(registro['uc'], registro['nota'], 1)
+
+    def remove(self, registro):
+        """Quita un registro de las sumas."""
+        self._count(registro['uc'], registro['nota'], -1)
+
+    def change_grade(self, registro, nota):
+        """Actualiza las sumas al cambiar la nota de un registro.
+
+        Se debe llamar antes de guardar la nueva nota en el registro.
+        """
+        self._count(registro['uc'], registro['nota'], -1)
+        self._count(registro['uc'], nota, 1)
+
+    def _count(self, uc, nota, signo):
+        """Suma (signo 1) o resta (signo -1) una calificación."""
+        uc = int(uc)
+        nota = int(nota)
+        self.materias += signo
+        self.uc += signo * uc
+        self.suma_ponderada += signo * uc * nota
+        if nota >= 12:
+            self.materias_aprobadas += signo
+            self.uc_aprobadas += signo * uc
+
+
+def filter_record(record, materia_ids=None):
+    """Filtra un récord académico por materias.
+
+    Equivale a las condiciones de crud.read_records(), sin distinguir
+    mayúsculas en los códigos de materia.
+    """
+    if materia_ids:
+        materia_ids = {m.upper() for m in materia_ids}
+        record = [r for r in record if r['id'].upper() in materia_ids]
+    return list(record)
 
 
 def print_record(record):